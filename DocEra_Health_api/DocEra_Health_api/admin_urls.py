@@ -0,0 +1,9 @@
+from django.contrib import admin
+from django.urls import path
+
+# a no-op after AdminConfig.ready; the first admin request in the slim runtime (SimpleAdminConfig)
+admin.autodiscover()
+
+urlpatterns = [
+    path('', admin.site.urls),
+]
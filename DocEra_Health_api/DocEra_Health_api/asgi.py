@@ -12,5 +12,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'DocEra_Health_api.settings')
+# settings.ASGI: async read views and no persistent connections
+os.environ.setdefault('DJANGO_ASGI', 'true')
 
 application = get_asgi_application()
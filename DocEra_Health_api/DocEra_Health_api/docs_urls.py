@@ -0,0 +1,14 @@
+from django.conf import settings
+from django.urls import path
+from drf_spectacular.views import SpectacularAPIView, SpectacularRedocView, SpectacularSwaggerView
+
+import core.openapi  # noqa: F401  (not registered by CoreConfig in the slim runtime)
+from core.views import schema_view
+
+urlpatterns = [
+    # the build artifact of `manage.py build_schema` (core.schema), or generated per request
+    path('', schema_view if settings.PRECOMPILED_SCHEMA else SpectacularAPIView.as_view(), name='schema'),
+    # Optional UI:
+    path('swagger-ui/', SpectacularSwaggerView.as_view(url_name='schema'), name='swagger-ui'),
+    path('redoc/', SpectacularRedocView.as_view(url_name='schema'), name='redoc'),
+]
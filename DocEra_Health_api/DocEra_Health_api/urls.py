@@ -1,26 +1,33 @@
-from django.contrib import admin
+import re
+
 from django.urls import path, include, re_path
 from django.conf import settings
-from django.conf.urls.static import static
-from drf_spectacular.views import SpectacularAPIView, SpectacularRedocView, SpectacularSwaggerView
+from core import media
+from core.slim import include_urls
+from rest_framework_simplejwt import views as jwt_views
 
 
 urlpatterns = [
-    path('admin/', admin.site.urls),
+    include_urls('admin/', 'DocEra_Health_api.admin_urls'),
 
-    re_path(r'^auth/', include('djoser.urls')),  # /auth/users/, /auth/users/me/
-    re_path(r'^auth/', include('djoser.urls.jwt')),  # /auth/jwt/create/, etc.
+    # djoser.urls.jwt spelled out: importing it imports djoser.urls, i.e. the user views and their
+    # email machinery, which the slim runtime defers to the first /auth/users/ request
+    re_path(r'^auth/jwt/create/?', jwt_views.TokenObtainPairView.as_view(), name='jwt-create'),
+    re_path(r'^auth/jwt/refresh/?', jwt_views.TokenRefreshView.as_view(), name='jwt-refresh'),
+    re_path(r'^auth/jwt/verify/?', jwt_views.TokenVerifyView.as_view(), name='jwt-verify'),
+    include_urls('auth/', 'djoser.urls'),  # /auth/users/, /auth/users/me/
 
     path('contact_us/', include('contact_us.urls')),
     path('service/', include('service.urls')),
     path('patient/', include('patient.urls')),
     path('doctor/', include('doctor.urls')),
     path('appointment/', include('appointment.urls')),
+    path('schedule/', include('schedule.urls')),
+    path('core/', include('core.urls')),
     
-    path('api/schema/', SpectacularAPIView.as_view(), name='schema'),
-    # Optional UI:
-    path('api/schema/swagger-ui/', SpectacularSwaggerView.as_view(url_name='schema'), name='swagger-ui'),
-    path('api/schema/redoc/', SpectacularRedocView.as_view(url_name='schema'), name='redoc'),
+    include_urls('api/schema/', 'DocEra_Health_api.docs_urls'),
 ]
 
-urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+urlpatterns += [
+    re_path(r'^%s(?P<path>.+)$' % re.escape(settings.MEDIA_URL.lstrip('/')), media.serve, name='media'),
+]
@@ -1,28 +1,16 @@
 from django.contrib import admin
 from .models import Appointment
+from .emails import send_running_appointment_emails
 
-from django.core.mail import EmailMultiAlternatives
-from django.template.loader import render_to_string
 from django.shortcuts import redirect
 
 # Register your models here.
 class AppointmentAdmin(admin.ModelAdmin):
     list_display = ['doctor_name', 'patient_name', 'appointment_type', 'appointment_status', 'symptom', 'time', 'cancel']
+    list_select_related = ['time']
 
-    def doctor_name(self, obj):
-        return obj.doctor.user.first_name
-
-    def patient_name(self, obj):
-        return obj.patient.user.first_name
-    
     def save_model(self, request, obj, form, change):
-        if obj.appointment_type == "Online" and obj.appointment_status == "Running" :
-            email_subject = "Yor Online Appointment is Running"
-            email_body = render_to_string('./appointment/appointment_email.html', {"user" : obj.patient.user, "doctor" : obj.doctor})
-
-            email = EmailMultiAlternatives(email_subject, '', to=[obj.patient.user.email])
-            email.attach_alternative(email_body, "text/html")
-            email.send()
+        send_running_appointment_emails([obj])
         return super().save_model(request, obj, form, change)
     
-admin.site.register(Appointment, AppointmentAdmin)
\ No newline at end of file
+admin.site.register(Appointment, AppointmentAdmin)
@@ -0,0 +1,168 @@
+"""
+Batch versions of the appointment write paths used by clinics (intake, status close-out, cancellation).
+
+Every operation validates the whole batch against a handful of IN queries, writes the valid items
+with one bulk_create / bulk_update inside a transaction, and reports a result per input item.
+Status changes and cancellations read the rows locked, inside the transaction that writes them.
+"""
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import F
+
+from . import models, rollups
+from .emails import send_running_appointment_emails
+from patient.models import Patient
+from doctor.models import Doctor, AvailableTime
+from schedule.models import Slot
+
+# forward-only status flow: Pending -> Running -> Completed
+STATUS_TRANSITIONS = {
+    'Pending': {'Running', 'Completed'},
+    'Running': {'Completed'},
+    'Completed': set(),
+}
+
+
+def bulk_create(items):
+    """items: dicts shaped by BulkAppointmentItemSerializer; references are checked here."""
+    patients = Patient.objects.select_related('user').in_bulk({item.get('patient_id') for item in items} - {None})
+    doctors = Doctor.objects.select_related('user').in_bulk({item.get('doctor_id') for item in items} - {None})
+    times = AvailableTime.objects.in_bulk({item.get('time_id') for item in items} - {None})
+    slots = Slot.objects.select_related('doctor__user').in_bulk({item.get('slot_id') for item in items} - {None})
+
+    results = [None] * len(items)
+    valid = []
+    for index, item in enumerate(items):
+        errors = {}
+        patient = patients.get(item.get('patient_id'))
+        if patient is None:
+            errors['patient_id'] = "Unknown patient."
+
+        slot = None
+        if item.get('slot_id') is not None:
+            slot = slots.get(item['slot_id'])
+            if slot is None:
+                errors['slot_id'] = "Unknown slot."
+
+        doctor = doctors.get(item.get('doctor_id'))
+        if slot is not None:
+            if item.get('doctor_id') is not None and item['doctor_id'] != slot.doctor_id:
+                errors['slot_id'] = "The slot belongs to another doctor."
+            doctor = slot.doctor
+        elif doctor is None:
+            errors['doctor_id'] = "Unknown doctor." if item.get('doctor_id') is not None else "Either doctor_id or slot_id is required."
+
+        time = None
+        if item.get('time_id') is not None:
+            time = times.get(item['time_id'])
+            if time is None:
+                errors['time_id'] = "Unknown available time."
+
+        if errors:
+            results[index] = {'index': index, 'status': 'invalid', 'errors': errors}
+            continue
+
+        valid.append((index, models.Appointment(
+            patient=patient,
+            doctor=doctor,
+            time=time,
+            slot=slot,
+            appointment_type=item['appointment_type'],
+            appointment_status=item.get('appointment_status', 'Pending'),
+            symptom=item['symptom'],
+            patient_name=str(patient),
+            doctor_name=str(doctor),
+        )))
+
+    with transaction.atomic():
+        # every slot has to have room for all the items booking it, or those items are rejected
+        wanted = Counter(appointment.slot_id for _, appointment in valid if appointment.slot_id)
+        full = set()
+        for slot_id, seats in wanted.items():
+            reserved = Slot.objects.filter(pk=slot_id, booked__lte=F('capacity') - seats).update(booked=F('booked') + seats)
+            if not reserved:
+                full.add(slot_id)
+
+        to_create = []
+        for index, appointment in valid:
+            if appointment.slot_id in full:
+                results[index] = {'index': index, 'status': 'invalid', 'errors': {'slot_id': "Not enough free seats in this slot."}}
+            else:
+                to_create.append((index, appointment))
+
+        created = models.Appointment.objects.bulk_create([appointment for _, appointment in to_create])
+        # bulk_create skips the post_save hook that maintains the rollups
+        rollups.record(added=[rollups.state(appointment) for appointment in created])
+        for (index, _), appointment in zip(to_create, created):
+            results[index] = {'index': index, 'status': 'created', 'id': appointment.pk}
+
+        send_running_appointment_emails(created)
+    return results
+
+
+def locked(queryset, ids):
+    """
+    The appointments by id, row-locked until the caller's transaction ends, so the state checked
+    is the state written over. Locks are taken in id order to keep concurrent batches from deadlocking.
+    """
+    return queryset.select_for_update(of=('self',)).order_by('pk').in_bulk(ids)
+
+
+@transaction.atomic
+def bulk_transition(ids, status):
+    appointments = locked(models.Appointment.objects.select_related('patient__user', 'doctor__user'), ids)
+
+    results = []
+    changed = []
+    previous = []
+    for appointment_id in ids:
+        appointment = appointments.get(appointment_id)
+        if appointment is None:
+            results.append({'id': appointment_id, 'status': 'not_found'})
+        elif appointment.cancel:
+            results.append({'id': appointment_id, 'status': 'invalid', 'error': "The appointment is cancelled."})
+        elif status not in STATUS_TRANSITIONS[appointment.appointment_status]:
+            results.append({
+                'id': appointment_id,
+                'status': 'invalid',
+                'error': f"Cannot move from {appointment.appointment_status} to {status}.",
+            })
+        else:
+            previous.append(rollups.state(appointment))
+            appointment.appointment_status = status
+            changed.append(appointment)
+            results.append({'id': appointment_id, 'status': 'updated'})
+
+    models.Appointment.objects.bulk_update(changed, ['appointment_status'])
+    rollups.record(added=[rollups.state(appointment) for appointment in changed], removed=previous)
+    send_running_appointment_emails(changed)
+    return results
+
+
+@transaction.atomic
+def bulk_cancel(ids):
+    appointments = locked(models.Appointment.objects.all(), ids)
+
+    results = []
+    cancelled = []
+    previous = []
+    for appointment_id in ids:
+        appointment = appointments.get(appointment_id)
+        if appointment is None:
+            results.append({'id': appointment_id, 'status': 'not_found'})
+        elif appointment.cancel:
+            results.append({'id': appointment_id, 'status': 'already_cancelled'})
+        else:
+            previous.append(rollups.state(appointment))
+            appointment.cancel = True
+            cancelled.append(appointment)
+            results.append({'id': appointment_id, 'status': 'cancelled'})
+
+    models.Appointment.objects.bulk_update(cancelled, ['cancel'])
+    rollups.record(added=[rollups.state(appointment) for appointment in cancelled], removed=previous)
+    # give the seats back, one UPDATE per slot
+    released = Counter(appointment.slot_id for appointment in cancelled if appointment.slot_id)
+    for slot_id, seats in released.items():
+        Slot.objects.filter(pk=slot_id).update(booked=F('booked') - seats)
+    return results
@@ -0,0 +1,66 @@
+"""
+A doctor's consultation-room dashboard, refreshed every few seconds: five indexed queries. The
+queue and review lists are bounded; the all-time counts are summed from the doctor's
+AppointmentDailyRollup totals (a few rows per day with bookings) rather than from every
+appointment the doctor ever had.
+"""
+from django.db.models import F, Q, Sum
+from django.utils import timezone
+
+from . import models
+from core.mixins import eager_load
+from doctor.models import DoctorRating, Review
+from doctor.serializers import ReviewSerializer
+
+NEXT_PENDING = 5
+MAX_NEXT_PENDING = 20
+RECENT_REVIEWS = 5
+
+
+def status_counts(doctor_id):
+    """Non-cancelled appointments by status and by type, plus the cancelled ones, in one query."""
+    # rollup rows count the cancelled appointments too, and hold them apart in `cancelled`
+    active = F('count') - F('cancelled')
+    aggregates = {'total': Sum('count'), 'total_cancelled': Sum('cancelled')}
+    aggregates.update({
+        f"status:{status}": Sum(active, filter=Q(appointment_status=status))
+        for status, _ in models.APPOINTMENT_SATUS
+    })
+    aggregates.update({
+        f"type:{kind}": Sum(active, filter=Q(appointment_type=kind))
+        for kind, _ in models.APPOINTMENT_TYPE
+    })
+    # the doctor's total rows only: the per-specialization ones repeat the same appointments
+    rows = models.AppointmentDailyRollup.objects.filter(doctor_id=doctor_id, specialization__isnull=True)
+    row = {name: value or 0 for name, value in rows.aggregate(**aggregates).items()}
+    return {
+        'total': row['total'],
+        'cancelled': row['total_cancelled'],
+        'by_status': {status: row[f"status:{status}"] for status, _ in models.APPOINTMENT_SATUS},
+        'by_type': {kind: row[f"type:{kind}"] for kind, _ in models.APPOINTMENT_TYPE},
+    }
+
+
+def doctor_dashboard(doctor_id, next_count=NEXT_PENDING):
+    today = timezone.localdate()
+    appointments = models.Appointment.objects.filter(doctor_id=doctor_id, cancel=False).select_related('slot')
+
+    # booked slots only: the legacy `time` choice has no date to queue by
+    today_queue = appointments.filter(slot__date=today).order_by('slot__start_time', 'id')
+    # served by appointment_doctor_open_idx; undated bookings after the dated ones, oldest first
+    next_pending = appointments.filter(
+        Q(slot__isnull=True) | Q(slot__date__gte=today), appointment_status='Pending',
+    ).order_by(
+        F('slot__date').asc(nulls_last=True), F('slot__start_time').asc(nulls_last=True), 'id',
+    )[:next_count]
+    reviews = eager_load(Review.objects.filter(doctor_id=doctor_id), ReviewSerializer)
+
+    return {
+        'doctor_id': doctor_id,
+        'date': today,
+        'counts': status_counts(doctor_id),
+        'today': list(today_queue),
+        'next_pending': list(next_pending),
+        'recent_reviews': list(reviews.order_by('-created', '-id')[:RECENT_REVIEWS]),
+        'rating': DoctorRating.objects.filter(doctor_id=doctor_id).first() or DoctorRating(doctor_id=doctor_id),
+    }
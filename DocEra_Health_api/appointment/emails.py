@@ -0,0 +1,23 @@
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.template.loader import render_to_string
+
+
+def running_appointment_email(appointment):
+    email_subject = "Yor Online Appointment is Running"
+    email_body = render_to_string('./appointment/appointment_email.html', {"user" : appointment.patient.user, "doctor" : appointment.doctor})
+
+    email = EmailMultiAlternatives(email_subject, '', to=[appointment.patient.user.email])
+    email.attach_alternative(email_body, "text/html")
+    return email
+
+
+def send_running_appointment_emails(appointments):
+    """Notify patients whose online appointment is now running, in one send_messages call."""
+    emails = [
+        running_appointment_email(appointment)
+        for appointment in appointments
+        if appointment.appointment_type == "Online" and appointment.appointment_status == "Running"
+    ]
+    if emails:
+        get_connection().send_messages(emails)
+    return len(emails)
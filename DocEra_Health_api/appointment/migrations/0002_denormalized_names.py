@@ -0,0 +1,45 @@
+# Generated by Django 5.2.1 on 2026-10-18 13:04
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery, Value
+from django.db.models.functions import Concat
+
+
+def backfill_names(apps, schema_editor):
+    Appointment = apps.get_model('appointment', 'Appointment')
+    User = apps.get_model('auth', 'User')
+
+    Appointment.objects.update(
+        patient_name=Subquery(
+            User.objects.filter(patient=OuterRef('patient'))
+            .annotate(full_name=Concat('first_name', Value(' '), 'last_name'))
+            .values('full_name')[:1]
+        ),
+        doctor_name=Subquery(
+            User.objects.filter(doctor=OuterRef('doctor'))
+            .annotate(full_name=Concat('first_name', Value(' '), 'last_name'))
+            .values('full_name')[:1]
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('appointment', '0001_initial'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='appointment',
+            name='doctor_name',
+            field=models.CharField(blank=True, editable=False, max_length=301),
+        ),
+        migrations.AddField(
+            model_name='appointment',
+            name='patient_name',
+            field=models.CharField(blank=True, editable=False, max_length=301),
+        ),
+        migrations.RunPython(backfill_names, migrations.RunPython.noop),
+    ]
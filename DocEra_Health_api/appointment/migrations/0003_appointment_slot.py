@@ -0,0 +1,26 @@
+# Generated by Django 5.2.1 on 2026-10-18 13:07
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('appointment', '0002_denormalized_names'),
+        ('doctor', '0003_doctor_rating'),
+        ('schedule', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='appointment',
+            name='slot',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='appointments', to='schedule.slot'),
+        ),
+        migrations.AlterField(
+            model_name='appointment',
+            name='time',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='doctor.availabletime'),
+        ),
+    ]
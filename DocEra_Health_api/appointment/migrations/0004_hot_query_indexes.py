@@ -0,0 +1,28 @@
+# Generated by Django 5.2.1 on 2026-10-18 13:38
+
+from django.db import migrations, models
+
+import core.operations
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY on PostgreSQL can't run in a transaction
+    atomic = False
+
+    dependencies = [
+        ('appointment', '0003_appointment_slot'),
+        ('doctor', '0005_doctor_image_variants'),
+        ('patient', '0002_patient_image_variants'),
+        ('schedule', '0001_initial'),
+    ]
+
+    operations = [
+        core.operations.AddIndexConcurrently(
+            model_name='appointment',
+            index=models.Index(condition=models.Q(('cancel', False)), fields=['doctor', 'appointment_status'], name='appointment_doctor_open_idx'),
+        ),
+        core.operations.AddIndexConcurrently(
+            model_name='appointment',
+            index=models.Index(fields=['patient', 'id'], name='appointment_patient_id_idx'),
+        ),
+    ]
@@ -0,0 +1,77 @@
+# Generated by Django 5.2.1 on 2026-10-18 13:43
+
+import django.db.models.deletion
+import django.utils.timezone
+from collections import defaultdict
+
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models.functions import TruncDate
+
+
+def backfill_rollups(apps, schema_editor):
+    # existing appointments all get the migration time as `created`, so this is one day's rows
+    Appointment = apps.get_model('appointment', 'Appointment')
+    AppointmentDailyRollup = apps.get_model('appointment', 'AppointmentDailyRollup')
+    Doctor = apps.get_model('doctor', 'Doctor')
+
+    specializations = defaultdict(list)
+    for doctor_id, specialization_id in Doctor.specialization.through.objects.values_list('doctor_id', 'specialization_id'):
+        specializations[doctor_id].append(specialization_id)
+
+    rows = defaultdict(lambda: [0, 0])
+    groups = (
+        Appointment.objects.annotate(day=TruncDate('created'))
+        .values('day', 'doctor_id', 'appointment_type', 'appointment_status', 'cancel')
+        .annotate(number=Count('id'))
+        .order_by()
+    )
+    for group in groups:
+        for specialization_id in (None, *specializations.get(group['doctor_id'], ())):
+            row = rows[(group['day'], group['doctor_id'], specialization_id, group['appointment_type'], group['appointment_status'])]
+            row[0] += group['number']
+            row[1] += group['number'] if group['cancel'] else 0
+
+    AppointmentDailyRollup.objects.bulk_create(
+        [
+            AppointmentDailyRollup(
+                day=day, doctor_id=doctor_id, specialization_id=specialization_id,
+                appointment_type=kind, appointment_status=status, count=count, cancelled=cancelled,
+            )
+            for (day, doctor_id, specialization_id, kind, status), (count, cancelled) in rows.items()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('appointment', '0004_hot_query_indexes'),
+        ('doctor', '0006_review_doctor_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='appointment',
+            name='created',
+            field=models.DateTimeField(db_index=True, default=django.utils.timezone.now, editable=False),
+        ),
+        migrations.CreateModel(
+            name='AppointmentDailyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('appointment_type', models.CharField(choices=[('Offline', 'Offline'), ('Online', 'Online')], max_length=10)),
+                ('appointment_status', models.CharField(choices=[('Completed', 'Completed'), ('Pending', 'Pending'), ('Running', 'Running')], max_length=10)),
+                ('count', models.IntegerField(default=0)),
+                ('cancelled', models.IntegerField(default=0)),
+                ('doctor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='appointment_rollups', to='doctor.doctor')),
+                ('specialization', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='doctor.specialization')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(condition=models.Q(('specialization__isnull', False)), fields=('day', 'doctor', 'specialization', 'appointment_type', 'appointment_status'), name='appointment_rollup_unique'), models.UniqueConstraint(condition=models.Q(('specialization__isnull', True)), fields=('day', 'doctor', 'appointment_type', 'appointment_status'), name='appointment_rollup_doctor_unique')],
+            },
+        ),
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop),
+    ]
@@ -1,6 +1,9 @@
 from django.db import models
+from django.db.models import Q
+from django.utils import timezone
 from patient.models import Patient
-from doctor.models import Doctor, AvailableTime
+from doctor.models import Doctor, AvailableTime, Specialization
+from schedule.models import Slot
 
 # Create your models here.
 APPOINTMENT_TYPE = [
@@ -21,8 +24,80 @@ class Appointment(models.Model):
     appointment_type = models.CharField(choices= APPOINTMENT_TYPE, max_length=10)
     appointment_status = models.CharField(choices= APPOINTMENT_SATUS, max_length= 10, default= "Pending")
     symptom = models.TextField()
-    time = models.ForeignKey(AvailableTime, on_delete= models.CASCADE)
+    time = models.ForeignKey(AvailableTime, on_delete= models.CASCADE, null=True, blank=True)
+    slot = models.ForeignKey(Slot, on_delete= models.PROTECT, related_name= 'appointments', null=True, blank=True)
     cancel = models.BooleanField(default=False)
+    # denormalized display names so listings don't have to join through to auth_user.
+    # kept in sync with User renames by core.signals.sync_appointment_names
+    patient_name = models.CharField(max_length= 301, blank=True, editable=False)
+    doctor_name = models.CharField(max_length= 301, blank=True, editable=False)
+    # booking time; the day the appointment counts towards in AppointmentDailyRollup
+    created = models.DateTimeField(default=timezone.now, db_index=True, editable=False)
+
+    class Meta:
+        indexes = [
+            # a doctor's open queue: ?status=Pending,Running&cancel=false
+            models.Index(fields=['doctor', 'appointment_status'], condition=Q(cancel=False), name='appointment_doctor_open_idx'),
+            # a patient's appointments in the listing's cursor order (-id)
+            models.Index(fields=['patient', 'id'], name='appointment_patient_id_idx'),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._named_parties = instance.parties()
+        return instance
+
+    def parties(self):
+        # the loaded patient / doctor ids, so save() can tell when one was reassigned
+        return {field: self.__dict__.get(field) for field in ('patient_id', 'doctor_id')}
+
+    def save(self, *args, **kwargs):
+        named = getattr(self, '_named_parties', {})
+        if self._state.adding or not self.patient_name or named.get('patient_id') != self.patient_id:
+            self.patient_name = str(self.patient)
+        if self._state.adding or not self.doctor_name or named.get('doctor_id') != self.doctor_id:
+            self.doctor_name = str(self.doctor)
+        super().save(*args, **kwargs)
+        self._named_parties = self.parties()
+
+    def __str__(self):
+        return f"Doctor: {self.doctor.user.first_name} , Patient: {self.patient.user.first_name}"
+
+
+class AppointmentDailyRollup(models.Model):
+    """
+    Appointment counts per booking day, doctor, specialization, type and (current) status, kept
+    up to date on every appointment write by appointment.rollups so reports never scan the
+    appointment table.
+
+    Rows with a null specialization hold the doctor's totals; an appointment is counted there once
+    and once more under each of the doctor's specializations, so per-specialization reports don't
+    need the doctor / specialization join either. `count` includes the cancelled appointments.
+    """
+    day = models.DateField()
+    doctor = models.ForeignKey(Doctor, on_delete= models.CASCADE, related_name= 'appointment_rollups')
+    specialization = models.ForeignKey(Specialization, on_delete= models.CASCADE, null=True, blank=True, related_name= '+')
+    appointment_type = models.CharField(choices= APPOINTMENT_TYPE, max_length=10)
+    appointment_status = models.CharField(choices= APPOINTMENT_SATUS, max_length= 10)
+    # plain integers: a drifted row may dip below zero until `rollup_appointments` reconciles it
+    count = models.IntegerField(default=0)
+    cancelled = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            # NULLs are distinct in a unique constraint, so the doctor-total rows get their own
+            models.UniqueConstraint(
+                fields=['day', 'doctor', 'specialization', 'appointment_type', 'appointment_status'],
+                condition=Q(specialization__isnull=False),
+                name='appointment_rollup_unique',
+            ),
+            models.UniqueConstraint(
+                fields=['day', 'doctor', 'appointment_type', 'appointment_status'],
+                condition=Q(specialization__isnull=True),
+                name='appointment_rollup_doctor_unique',
+            ),
+        ]
 
     def __str__(self):
-        return f"Doctor: {self.doctor.user.first_name} , Patient: {self.patient.user.first_name}"
\ No newline at end of file
+        return f"{self.day} {self.doctor_id}/{self.specialization_id}: {self.appointment_type} {self.appointment_status} x{self.count}"
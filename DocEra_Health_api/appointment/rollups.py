@@ -0,0 +1,183 @@
+"""
+Incremental maintenance of AppointmentDailyRollup, and the reports read from it.
+
+Every appointment write (see core.signals, and appointment.bulk for the bulk paths) passes the
+appointment's old and new rollup state to `record`, which turns them into +/- deltas on the
+affected rows. `reconcile` recomputes a date range from the appointment table for the backfill
+and to repair drift (writes that bypassed the hooks, doctors whose specializations changed);
+run it through `manage.py rollup_appointments`.
+"""
+import datetime
+from collections import defaultdict
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from . import models
+from doctor.models import Doctor
+
+STATE_FIELDS = ('created', 'doctor_id', 'appointment_type', 'appointment_status', 'cancel')
+KEY_FIELDS = ('day', 'doctor_id', 'specialization_id', 'appointment_type', 'appointment_status')
+
+# report dimension -> rollup column(s)
+DIMENSIONS = {
+    'day': ('day',),
+    'doctor': ('doctor_id', 'doctor__user__first_name', 'doctor__user__last_name'),
+    'specialization': ('specialization_id', 'specialization__name'),
+    'type': ('appointment_type',),
+    'status': ('appointment_status',),
+}
+
+
+def state(appointment):
+    """What one appointment contributes: (day, doctor_id, type, status, cancel)."""
+    return (
+        timezone.localdate(appointment.created), appointment.doctor_id,
+        appointment.appointment_type, appointment.appointment_status, appointment.cancel,
+    )
+
+
+def stored_states(ids, lock=False):
+    """
+    {id: state} of appointments as they are in the database, before an update. With `lock` the
+    rows stay locked until the surrounding transaction ends, so the state can't change under
+    the update it is the old side of.
+    """
+    rows = models.Appointment.objects.filter(pk__in=ids)
+    if lock:
+        rows = rows.select_for_update().order_by('pk')
+    rows = rows.values_list('pk', *STATE_FIELDS)
+    return {pk: (timezone.localdate(created), *rest) for pk, created, *rest in rows}
+
+
+def doctor_specializations(doctor_ids):
+    specializations = defaultdict(list)
+    rows = Doctor.specialization.through.objects.filter(doctor_id__in=doctor_ids).values_list('doctor_id', 'specialization_id')
+    for doctor_id, specialization_id in rows:
+        specializations[doctor_id].append(specialization_id)
+    return specializations
+
+
+def expand(counts):
+    """
+    {(day, doctor_id, type, status, cancel): n} -> {rollup key: [count, cancelled]}, counting each
+    appointment in its doctor's total row and in one row per specialization.
+    """
+    specializations = doctor_specializations({doctor_id for _, doctor_id, *_ in counts})
+    rows = defaultdict(lambda: [0, 0])
+    for (day, doctor_id, kind, status, cancel), number in counts.items():
+        for specialization_id in (None, *specializations.get(doctor_id, ())):
+            row = rows[(day, doctor_id, specialization_id, kind, status)]
+            row[0] += number
+            row[1] += number if cancel else 0
+    return rows
+
+
+def record(added=(), removed=()):
+    """Apply appointments entering (`added`) and leaving (`removed`) rollup states."""
+    counts = defaultdict(int)
+    for item in added:
+        counts[item] += 1
+    for item in removed:
+        counts[item] -= 1
+    counts = {item: number for item, number in counts.items() if number}
+    if not counts:
+        return
+
+    changes = {key: delta for key, delta in expand(counts).items() if any(delta)}
+    with transaction.atomic():
+        # a fixed order, so concurrent writers lock the rows in the same sequence
+        for key in sorted(changes, key=lambda key: (key[0], key[1], key[2] or 0, key[3], key[4])):
+            count, cancelled = changes[key]
+            rows = models.AppointmentDailyRollup.objects.filter(**dict(zip(KEY_FIELDS, key)))
+            if rows.update(count=F('count') + count, cancelled=F('cancelled') + cancelled) or count <= 0:
+                # nothing to take away from a missing row (e.g. its doctor is being deleted)
+                continue
+            try:
+                with transaction.atomic():
+                    models.AppointmentDailyRollup.objects.create(**dict(zip(KEY_FIELDS, key)), count=count, cancelled=cancelled)
+            except IntegrityError:
+                # created by a concurrent booking meanwhile
+                rows.update(count=F('count') + count, cancelled=F('cancelled') + cancelled)
+
+
+def day_bounds(start, end):
+    """[from, until) aware datetimes of the local days start..end, for an index range on `created`."""
+    zone = timezone.get_current_timezone()
+    return (
+        datetime.datetime.combine(start, datetime.time.min, tzinfo=zone),
+        datetime.datetime.combine(end + datetime.timedelta(days=1), datetime.time.min, tzinfo=zone),
+    )
+
+
+def compute(start, end):
+    """The rollup rows of start..end recomputed from the appointment table."""
+    since, until = day_bounds(start, end)
+    rows = (
+        models.Appointment.objects.filter(created__gte=since, created__lt=until)
+        .annotate(day=TruncDate('created'))
+        .values('day', 'doctor_id', 'appointment_type', 'appointment_status', 'cancel')
+        .annotate(number=Count('id'))
+        .order_by()
+    )
+    return expand({
+        (row['day'], row['doctor_id'], row['appointment_type'], row['appointment_status'], row['cancel']): row['number']
+        for row in rows
+    })
+
+
+def reconcile(start, end, fix=True):
+    """Compare (and with `fix`, correct) the rollups of start..end. Returns the number of wrong rows."""
+    with transaction.atomic():
+        expected = {key: tuple(value) for key, value in compute(start, end).items()}
+        stored = models.AppointmentDailyRollup.objects.filter(day__range=(start, end))
+        # rows emptied by deletions and status changes stay behind at zero; they aren't drift
+        actual = {
+            tuple(row[:5]): (row[5], row[6])
+            for row in stored.values_list(*KEY_FIELDS, 'count', 'cancelled')
+            if row[5] or row[6]
+        }
+        wrong = {key for key in expected.keys() | actual.keys() if expected.get(key) != actual.get(key)}
+        if fix and wrong:
+            stored.delete()
+            models.AppointmentDailyRollup.objects.bulk_create(
+                [
+                    models.AppointmentDailyRollup(**dict(zip(KEY_FIELDS, key)), count=count, cancelled=cancelled)
+                    for key, (count, cancelled) in expected.items()
+                ],
+                batch_size=1000,
+            )
+    return len(wrong)
+
+
+def report(start, end, group_by, doctor_id=None, specialization_id=None, appointment_type=None, appointment_status=None):
+    """Appointment volumes and cancellation rates of start..end grouped by `group_by` dimensions."""
+    filters = {
+        'day__range': (start, end), 'doctor_id': doctor_id, 'specialization_id': specialization_id,
+        'appointment_type': appointment_type, 'appointment_status': appointment_status,
+    }
+    filters = {field: value for field, value in filters.items() if value is not None}
+    doctor_totals = models.AppointmentDailyRollup.objects.filter(specialization__isnull=True, **filters)
+    # specialization rows when the report is about specializations, the doctor totals otherwise
+    if 'specialization' in group_by or specialization_id is not None:
+        rows = models.AppointmentDailyRollup.objects.filter(specialization__isnull=False, **filters)
+    else:
+        rows = doctor_totals
+
+    columns = [column for dimension in group_by for column in DIMENSIONS[dimension]]
+    results = []
+    for row in rows.values(*columns).annotate(count=Sum('count'), cancelled=Sum('cancelled')).order_by(*columns):
+        if 'doctor' in group_by:
+            row['doctor_name'] = f"{row.pop('doctor__user__first_name')} {row.pop('doctor__user__last_name')}"
+        if 'specialization' in group_by:
+            row['specialization_name'] = row.pop('specialization__name')
+        row['cancellation_rate'] = round(row['cancelled'] / row['count'], 4) if row['count'] else 0
+        results.append(row)
+
+    # an appointment is in one row per specialization of its doctor, but only once in the totals
+    totals = (rows if specialization_id is not None else doctor_totals).aggregate(count=Sum('count'), cancelled=Sum('cancelled'))
+    totals = {name: value or 0 for name, value in totals.items()}
+    totals['cancellation_rate'] = round(totals['cancelled'] / totals['count'], 4) if totals['count'] else 0
+    return {'start': start, 'end': end, 'group_by': group_by, 'totals': totals, 'results': results}
@@ -1,10 +1,167 @@
+import datetime
+
+from django.db import transaction
+from django.utils import timezone
 from rest_framework import serializers
-from . import models 
+from . import models, rollups
+from core.authentication import user_claims
+from patient.models import Patient
+from doctor.models import Doctor, AvailableTime
+from doctor.serializers import DoctorRatingSerializer, ReviewSerializer
+from schedule.models import Slot
 
 class AppointmentSerializer(serializers.ModelSerializer):
     patient = serializers.StringRelatedField(many= False)
     doctor = serializers.StringRelatedField(many= False)
     time = serializers.StringRelatedField(many= False)
+    slot = serializers.StringRelatedField(many= False)
+    # write side of the relations above
+    patient_id = serializers.PrimaryKeyRelatedField(source='patient', queryset=Patient.objects.all(), write_only=True)
+    doctor_id = serializers.PrimaryKeyRelatedField(source='doctor', queryset=Doctor.objects.all(), write_only=True, required=False)
+    time_id = serializers.PrimaryKeyRelatedField(source='time', queryset=AvailableTime.objects.all(), write_only=True, required=False)
+    slot_id = serializers.PrimaryKeyRelatedField(source='slot', queryset=Slot.objects.all(), write_only=True, required=False)
+
+    class Meta:
+        model = models.Appointment
+        fields = '__all__'
+        # patient and doctor render through user.first_name / last_name
+        select_related_fields = ('patient__user', 'doctor__user', 'time', 'slot')
+
+    def validate_patient_id(self, patient):
+        # staff book for anyone; everyone else only for their own patient profile
+        request = self.context.get('request')
+        if request is not None and not request.user.is_staff and patient.pk != user_claims(request.user)['patient_id']:
+            raise serializers.ValidationError("Appointments can only be booked for your own patient profile.")
+        return patient
+
+    def validate(self, attrs):
+        slot = attrs.get('slot')
+        if slot:
+            if attrs.setdefault('doctor', slot.doctor) != slot.doctor:
+                raise serializers.ValidationError({'slot_id': "The slot belongs to another doctor."})
+        elif not self.instance and not attrs.get('doctor'):
+            raise serializers.ValidationError({'doctor_id': "Either doctor_id or slot_id is required."})
+        return attrs
+
+    def create(self, validated_data):
+        slot = validated_data.get('slot')
+        with transaction.atomic():
+            if slot and not Slot.objects.reserve(slot.pk):
+                raise serializers.ValidationError({'slot_id': "This slot is fully booked."})
+            return super().create(validated_data)
+
+    def update(self, instance, validated_data):
+        with transaction.atomic():
+            # the row as it is now, locked against concurrent updates until the seat and the
+            # rollups (core.signals) have moved with it
+            stored = models.Appointment.objects.select_for_update().only('slot_id', 'cancel').get(pk=instance.pk)
+            # a seat is held by every non-cancelled appointment on a slot; move it when the slot or cancel flag changes
+            held_slot_id = None if stored.cancel else stored.slot_id
+            appointment = super().update(instance, validated_data)
+            needed_slot_id = None if appointment.cancel else appointment.slot_id
+            if needed_slot_id != held_slot_id:
+                if needed_slot_id and not Slot.objects.reserve(needed_slot_id):
+                    raise serializers.ValidationError({'slot_id': "This slot is fully booked."})
+                if held_slot_id:
+                    Slot.objects.release(held_slot_id)
+            return appointment
+
+
+BULK_LIMIT = 500
+
+
+class BulkAppointmentItemSerializer(serializers.Serializer):
+    patient_id = serializers.IntegerField()
+    doctor_id = serializers.IntegerField(required=False)
+    time_id = serializers.IntegerField(required=False)
+    slot_id = serializers.IntegerField(required=False)
+    appointment_type = serializers.ChoiceField(choices=models.APPOINTMENT_TYPE)
+    appointment_status = serializers.ChoiceField(choices=models.APPOINTMENT_SATUS, default='Pending')
+    symptom = serializers.CharField()
+
+
+class BulkAppointmentCreateSerializer(serializers.Serializer):
+    appointments = BulkAppointmentItemSerializer(many=True, allow_empty=False, max_length=BULK_LIMIT)
+
+
+class BulkAppointmentIdsSerializer(serializers.Serializer):
+    ids = serializers.ListField(child=serializers.IntegerField(), allow_empty=False, max_length=BULK_LIMIT)
+
+    def validate_ids(self, value):
+        return list(dict.fromkeys(value))
+
+
+class BulkAppointmentStatusSerializer(BulkAppointmentIdsSerializer):
+    appointment_status = serializers.ChoiceField(choices=models.APPOINTMENT_SATUS)
+
+
+class QueueEntrySerializer(serializers.ModelSerializer):
+    slot = serializers.StringRelatedField()
+    date = serializers.DateField(source='slot.date', default=None)
+    start_time = serializers.TimeField(source='slot.start_time', default=None)
+
     class Meta:
         model = models.Appointment
-        fields = '__all__'
\ No newline at end of file
+        fields = ('id', 'patient_id', 'patient_name', 'appointment_type', 'appointment_status', 'symptom', 'slot', 'date', 'start_time')
+
+
+class StatusCountsSerializer(serializers.Serializer):
+    total = serializers.IntegerField()
+    cancelled = serializers.IntegerField()
+    by_status = serializers.DictField(child=serializers.IntegerField())
+    by_type = serializers.DictField(child=serializers.IntegerField())
+
+
+class DoctorDashboardSerializer(serializers.Serializer):
+    doctor_id = serializers.IntegerField()
+    date = serializers.DateField()
+    counts = StatusCountsSerializer()
+    today = QueueEntrySerializer(many=True)
+    next_pending = QueueEntrySerializer(many=True)
+    recent_reviews = ReviewSerializer(many=True)
+    rating = DoctorRatingSerializer()
+
+
+ANALYTICS_MAX_DAYS = 366
+
+
+class AnalyticsQuerySerializer(serializers.Serializer):
+    start = serializers.DateField(required=False)
+    end = serializers.DateField(required=False)
+    # comma-separated dimensions from rollups.DIMENSIONS, e.g. "day,specialization"
+    group_by = serializers.CharField(default='day')
+    doctor_id = serializers.IntegerField(required=False)
+    specialization_id = serializers.IntegerField(required=False)
+    appointment_type = serializers.ChoiceField(choices=models.APPOINTMENT_TYPE, required=False)
+    appointment_status = serializers.ChoiceField(choices=models.APPOINTMENT_SATUS, required=False)
+
+    def validate_group_by(self, value):
+        dimensions = [dimension.strip() for dimension in value.split(',') if dimension.strip()]
+        unknown = set(dimensions) - set(rollups.DIMENSIONS)
+        if unknown:
+            raise serializers.ValidationError(f"Unknown dimensions {sorted(unknown)}; expected some of {list(rollups.DIMENSIONS)}.")
+        return list(dict.fromkeys(dimensions))
+
+    def validate(self, attrs):
+        attrs.setdefault('end', timezone.localdate())
+        attrs.setdefault('start', attrs['end'] - datetime.timedelta(days=29))
+        if attrs['start'] > attrs['end']:
+            raise serializers.ValidationError({'start': "start is after end."})
+        if (attrs['end'] - attrs['start']).days >= ANALYTICS_MAX_DAYS:
+            raise serializers.ValidationError({'start': f"At most {ANALYTICS_MAX_DAYS} days per report."})
+        return attrs
+
+
+class AnalyticsTotalsSerializer(serializers.Serializer):
+    count = serializers.IntegerField()
+    cancelled = serializers.IntegerField()
+    cancellation_rate = serializers.FloatField()
+
+
+class AnalyticsReportSerializer(serializers.Serializer):
+    start = serializers.DateField()
+    end = serializers.DateField()
+    group_by = serializers.ListField(child=serializers.CharField())
+    totals = AnalyticsTotalsSerializer()
+    # one object per group: the group_by columns, count, cancelled, cancellation_rate
+    results = serializers.ListField(child=serializers.DictField())
@@ -1,3 +1,246 @@
+import datetime
+from unittest import skipUnless
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.db.models import Count, Q
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from core.testing import QueryPlanMixin
+from doctor.models import Doctor, Specialization
+from schedule.models import Slot
+from . import bulk, dashboard, rollups
+from .models import Appointment, AppointmentDailyRollup
+from .serializers import AppointmentSerializer
+
+
+class AppointmentIndexTests(QueryPlanMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        # the post_save signal gives every new user a Patient profile
+        cls.patient = User.objects.create(username='patient').patient
+        cls.doctor = Doctor.objects.create(user=User.objects.create(username='doctor'))
+        for status in ('Pending', 'Running', 'Completed'):
+            for cancel in (False, True):
+                Appointment.objects.create(
+                    patient=cls.patient, doctor=cls.doctor, appointment_type='Online',
+                    appointment_status=status, symptom='Headache', cancel=cancel,
+                )
+
+    def test_doctor_open_queue_uses_partial_index(self):
+        queue = Appointment.objects.filter(doctor=self.doctor, appointment_status='Pending', cancel=False)
+        self.assertUsesIndex(queue, 'appointment_doctor_open_idx')
+        self.assertEqual(queue.count(), 1)
+
+    def test_doctor_open_counts_use_partial_index(self):
+        counts = Appointment.objects.filter(
+            doctor=self.doctor, appointment_status__in=['Pending', 'Running'], cancel=False,
+        ).aggregate(pending=Count('id', filter=Q(appointment_status='Pending')), total=Count('id'))
+        self.assertEqual(counts, {'pending': 1, 'total': 2})
+        self.assertUsesIndex(
+            Appointment.objects.filter(doctor=self.doctor, appointment_status__in=['Pending', 'Running'], cancel=False),
+            'appointment_doctor_open_idx',
+        )
+
+    def test_patient_listing_uses_patient_id_index(self):
+        listing = Appointment.objects.filter(patient=self.patient).order_by('-id')[:20]
+        self.assertUsesIndex(listing, 'appointment_patient_id_idx')
+        self.assertEqual(len(listing), 6)
+
+
+class DoctorDashboardTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.patient = User.objects.create(username='patient', first_name='Pat').patient
+        cls.doctor = Doctor.objects.create(user=User.objects.create(username='doctor'))
+        for status, kind, cancel in [
+            ('Pending', 'Online', False), ('Pending', 'Offline', False), ('Running', 'Online', False),
+            ('Completed', 'Offline', False), ('Pending', 'Online', True),
+        ]:
+            Appointment.objects.create(
+                patient=cls.patient, doctor=cls.doctor, appointment_type=kind,
+                appointment_status=status, symptom='Headache', cancel=cancel,
+            )
+
+    def test_constant_queries_and_conditional_counts(self):
+        with self.assertNumQueries(5):
+            data = dashboard.doctor_dashboard(self.doctor.pk)
+        self.assertEqual(data['counts'], {
+            'total': 5,
+            'cancelled': 1,
+            'by_status': {'Completed': 1, 'Pending': 2, 'Running': 1},
+            'by_type': {'Offline': 2, 'Online': 2},
+        })
+        self.assertEqual([appointment.appointment_status for appointment in data['next_pending']], ['Pending', 'Pending'])
+
+    def test_counts_come_from_the_rollups_not_the_appointment_history(self):
+        with CaptureQueriesContext(connection) as queries:
+            dashboard.status_counts(self.doctor.pk)
+        self.assertIn(AppointmentDailyRollup._meta.db_table, queries[0]['sql'])
+        self.assertNotIn(f'"{Appointment._meta.db_table}"', queries[0]['sql'])
+
+
+class AppointmentRollupTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.patient = User.objects.create(username='patient').patient
+        cls.doctor = Doctor.objects.create(user=User.objects.create(username='doctor'))
+        cls.cardiology = Specialization.objects.create(name='Cardiology', slug='cardiology')
+        cls.doctor.specialization.add(cls.cardiology)
+
+    def book(self, status='Pending'):
+        return Appointment.objects.create(
+            patient=self.patient, doctor=self.doctor, appointment_type='Online',
+            appointment_status=status, symptom='Headache',
+        )
+
+    def rows(self):
+        return {
+            (row.specialization_id, row.appointment_status): (row.count, row.cancelled)
+            for row in AppointmentDailyRollup.objects.filter(count__gt=0)
+        }
+
+    def test_writes_keep_rollups_in_step(self):
+        first, second = self.book(), self.book()
+        first.appointment_status = 'Running'
+        first.save()
+        bulk.bulk_cancel([second.pk])
+        third = self.book('Completed')
+        third.delete()
+
+        specialization = self.cardiology.pk
+        self.assertEqual(self.rows(), {
+            (None, 'Pending'): (1, 1), (specialization, 'Pending'): (1, 1),
+            (None, 'Running'): (1, 0), (specialization, 'Running'): (1, 0),
+        })
+        today = timezone.localdate()
+        self.assertEqual(rollups.reconcile(today, today, fix=False), 0)
+
+    @skipUnless(connection.features.has_select_for_update, "row locks need SELECT ... FOR UPDATE")
+    def test_updates_lock_the_row_they_take_the_old_state_from(self):
+        appointment = self.book()
+        serializer = AppointmentSerializer(appointment, data={'appointment_status': 'Running'}, partial=True)
+        serializer.is_valid(raise_exception=True)
+        with CaptureQueriesContext(connection) as queries:
+            serializer.save()
+        self.assertIn('FOR UPDATE', queries[0]['sql'])
+
+    def test_report_counts_appointments_once_in_totals(self):
+        self.book()
+        self.book('Completed')
+        self.doctor.specialization.add(Specialization.objects.create(name='Neurology', slug='neurology'))
+        today = timezone.localdate()
+        # the specialization added after the bookings was reconciled into the rollups
+        self.assertEqual(rollups.reconcile(today, today), 2)
+
+        report = rollups.report(today, today, ['specialization'])
+        self.assertEqual(report['totals'], {'count': 2, 'cancelled': 0, 'cancellation_rate': 0})
+        self.assertEqual([row['count'] for row in report['results']], [2, 2])
+        self.assertEqual(rollups.report(today, today, ['day', 'status'])['results'], [
+            {'day': today, 'appointment_status': 'Completed', 'count': 1, 'cancelled': 0, 'cancellation_rate': 0},
+            {'day': today, 'appointment_status': 'Pending', 'count': 1, 'cancelled': 0, 'cancellation_rate': 0},
+        ])
+
+
+class AppointmentScopeTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.patient = User.objects.create(username='patient', first_name='Pat').patient
+        cls.other = User.objects.create(username='other', first_name='Otto').patient
+        cls.doctor = Doctor.objects.create(user=User.objects.create(username='doctor', first_name='Doc'))
+        cls.appointment = Appointment.objects.create(
+            patient=cls.other, doctor=cls.doctor, appointment_type='Online', symptom='Headache',
+        )
+
+    def test_patient_id_filter_stays_within_the_callers_appointments(self):
+        client = APIClient()
+        self.assertEqual(client.get(f'/appointment/?patient_id={self.other.pk}').status_code, 401)
+        client.force_authenticate(self.patient.user)
+        self.assertEqual(client.get(f'/appointment/?patient_id={self.other.pk}&page=1').json()['results'], [])
+        self.assertEqual(client.get(f'/appointment/{self.appointment.pk}/?patient_id={self.other.pk}').status_code, 404)
+        self.assertEqual(client.delete(f'/appointment/{self.appointment.pk}/?patient_id={self.other.pk}').status_code, 404)
+        self.assertEqual(client.get('/appointment/?patient_id=abc').status_code, 400)
+
+        client.force_authenticate(self.other.user)
+        results = client.get(f'/appointment/?patient_id={self.other.pk}&page=1').json()['results']
+        self.assertEqual([appointment['id'] for appointment in results], [self.appointment.pk])
+
+    def test_patients_book_only_for_themselves(self):
+        client = APIClient()
+        client.force_authenticate(self.patient.user)
+        booking = {'doctor_id': self.doctor.pk, 'appointment_type': 'Online', 'symptom': 'Headache'}
+        response = client.post('/appointment/', {**booking, 'patient_id': self.other.pk})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('patient_id', response.json())
+        own = client.post('/appointment/', {**booking, 'patient_id': self.patient.pk})
+        self.assertEqual(own.status_code, 201)
+        # nor hand their own booking over to someone else
+        self.assertEqual(client.patch(f"/appointment/{own.json()['id']}/", {'patient_id': self.other.pk}).status_code, 400)
+
+        client.force_authenticate(User.objects.create(username='admin', is_staff=True))
+        self.assertEqual(client.post('/appointment/', {**booking, 'patient_id': self.other.pk}).status_code, 201)
+
+    def appointment_writes(self, save):
+        with CaptureQueriesContext(connection) as queries:
+            save()
+        return [query['sql'] for query in queries if query['sql'].startswith(f'UPDATE "{Appointment._meta.db_table}"')]
+
+    def test_user_saves_rewrite_names_only_when_they_change(self):
+        user = User.objects.get(pk=self.other.user_id)
+        user.email = 'otto@example.com'
+        self.assertEqual(self.appointment_writes(user.save), [])
+        user.first_name = 'Ottilie'
+        self.assertEqual(len(self.appointment_writes(user.save)), 2)
+        self.assertEqual(Appointment.objects.get(pk=self.appointment.pk).patient_name, 'Ottilie ')
+        # the new name is the loaded one from now on
+        self.assertEqual(self.appointment_writes(user.save), [])
+
+    def test_reassigning_refreshes_the_denormalized_names(self):
+        appointment = Appointment.objects.get(pk=self.appointment.pk)
+        self.assertEqual((appointment.patient_name, appointment.doctor_name), ('Otto ', 'Doc '))
+        appointment.patient = self.patient
+        appointment.save()
+        self.assertEqual(Appointment.objects.get(pk=appointment.pk).patient_name, 'Pat ')
+
+
+class BulkWriteTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.patient = User.objects.create(username='patient').patient
+        cls.doctor = Doctor.objects.create(user=User.objects.create(username='doctor'))
+        cls.slot = Slot.objects.create(
+            doctor=cls.doctor, date=timezone.localdate(), start_time=datetime.time(9), end_time=datetime.time(9, 30),
+            capacity=2, booked=2,
+        )
+
+    def book(self):
+        return Appointment.objects.create(
+            patient=self.patient, doctor=self.doctor, slot=self.slot, appointment_type='Online', symptom='Headache',
+        )
+
+    def test_repeated_cancels_release_each_seat_once(self):
+        first, second = self.book(), self.book()
+        self.assertEqual([row['status'] for row in bulk.bulk_cancel([first.pk, first.pk])], ['cancelled', 'already_cancelled'])
+        self.assertEqual([row['status'] for row in bulk.bulk_cancel([first.pk, second.pk])], ['already_cancelled', 'cancelled'])
+        self.slot.refresh_from_db()
+        self.assertEqual(self.slot.booked, 0)
+
+    def test_transitions_are_checked_against_the_current_row(self):
+        first, second = self.book(), self.book()
+        bulk.bulk_cancel([second.pk])
+        self.assertEqual(
+            [row['status'] for row in bulk.bulk_transition([first.pk, second.pk], 'Completed')],
+            ['updated', 'invalid'],
+        )
+        self.assertEqual(bulk.bulk_transition([first.pk], 'Running')[0]['error'], "Cannot move from Completed to Running.")
 
-# Create your tests here.
+    @skipUnless(connection.features.has_select_for_update, "row locks need SELECT ... FOR UPDATE")
+    def test_rows_are_read_locked(self):
+        appointment = self.book()
+        for write in (lambda: bulk.bulk_transition([appointment.pk], 'Running'), lambda: bulk.bulk_cancel([appointment.pk])):
+            with CaptureQueriesContext(connection) as queries:
+                write()
+            self.assertIn('FOR UPDATE', queries[0]['sql'])
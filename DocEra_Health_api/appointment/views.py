@@ -1,18 +1,123 @@
+import operator
+from functools import reduce
+
 from django.shortcuts import render
+from django.db import transaction
+from django.db.models import Q
+from drf_spectacular.utils import extend_schema
 from rest_framework import viewsets
+from rest_framework.decorators import action
+from rest_framework.exceptions import PermissionDenied, ValidationError
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
+from rest_framework.response import Response
 from . import models
 from . import serializers
+from . import bulk
+from . import dashboard
+from . import rollups
+from core.authentication import user_claims
+from core.mixins import EagerLoadingMixin, SerializerTimingMixin
+from core.pagination import KeysetPagination
+from schedule.models import Slot
 
 # Create your views here.
-class AppointmentViewset(viewsets.ModelViewSet):
+class AppointmentViewset(EagerLoadingMixin, SerializerTimingMixin, viewsets.ModelViewSet):
+    permission_classes = [IsAuthenticated]
     queryset = models.Appointment.objects.all()
     serializer_class = serializers.AppointmentSerializer
+    pagination_class = KeysetPagination
+    cursor_ordering = '-id'
 
     def get_queryset(self):
         queryset = super().get_queryset()
 
+        if not self.request.user.is_staff:
+            # only staff see every appointment; everyone else sees their own, whatever the filters
+            claims = user_claims(self.request.user)
+            # only the roles the user has, so a plain patient / doctor lookup can use its index
+            scope = [Q(**{field: claims[field]}) for field in ('patient_id', 'doctor_id') if claims[field] is not None]
+            if not scope:
+                return queryset.none()
+            queryset = queryset.filter(reduce(operator.or_, scope))
+
         patient_id = self.request.query_params.get('patient_id')
         if patient_id:
-            queryset = queryset.filter(patient_id= patient_id)
-        
-        return queryset
\ No newline at end of file
+            try:
+                queryset = queryset.filter(patient_id= int(patient_id))
+            except ValueError:
+                raise ValidationError({'patient_id': "Expected an integer."})
+
+        # ?status=Pending,Running&cancel=false is a doctor's open queue (appointment_doctor_open_idx)
+        status = self.request.query_params.get('status')
+        if status:
+            queryset = queryset.filter(appointment_status__in= status.split(','))
+        cancel = self.request.query_params.get('cancel')
+        if cancel in ('true', 'false'):
+            queryset = queryset.filter(cancel= cancel == 'true')
+
+        return queryset
+
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            # the stored row, locked: the seat and rollup row it leaves are the current ones
+            instance = models.Appointment.objects.select_for_update().get(pk=instance.pk)
+            instance.delete()
+            # the seat a live booking holds goes back to the slot
+            if instance.slot_id and not instance.cancel:
+                Slot.objects.release(instance.slot_id)
+
+    @action(detail=False, methods=['get'], permission_classes=[IsAuthenticated],
+            serializer_class=serializers.DoctorDashboardSerializer, pagination_class=None)
+    def dashboard(self, request):
+        """The signed-in doctor's counts, today's queue, next pending patients and reviews. Staff pass ?doctor_id=."""
+        doctor_id = user_claims(request.user)['doctor_id']
+        if request.user.is_staff and request.query_params.get('doctor_id'):
+            doctor_id = request.query_params['doctor_id']
+        if doctor_id is None:
+            raise PermissionDenied("Only doctors have a dashboard.")
+        try:
+            doctor_id = int(doctor_id)
+            next_count = int(request.query_params.get('next', dashboard.NEXT_PENDING))
+        except ValueError:
+            raise ValidationError("doctor_id and next must be integers.")
+        next_count = max(0, min(next_count, dashboard.MAX_NEXT_PENDING))
+        return Response(self.get_serializer(dashboard.doctor_dashboard(doctor_id, next_count)).data)
+
+    @extend_schema(parameters=[serializers.AnalyticsQuerySerializer], responses=serializers.AnalyticsReportSerializer)
+    @action(detail=False, methods=['get'], permission_classes=[IsAdminUser],
+            serializer_class=serializers.AnalyticsReportSerializer, pagination_class=None, filter_backends=[])
+    def analytics(self, request):
+        """
+        Appointment volumes and cancellation rates from the daily rollups, e.g.
+        ?start=2026-01-01&end=2026-03-31&group_by=day,specialization&appointment_type=Online
+        """
+        query = serializers.AnalyticsQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        params = dict(query.validated_data)
+        report = rollups.report(params.pop('start'), params.pop('end'), params.pop('group_by'), **params)
+        return Response(self.get_serializer(report).data)
+
+    @action(detail=False, methods=['post'], url_path='bulk-create', permission_classes=[IsAdminUser],
+            serializer_class=serializers.BulkAppointmentCreateSerializer)
+    def bulk_create(self, request):
+        """{"appointments": [{patient_id, doctor_id | slot_id, appointment_type, symptom, ...}, ...]}"""
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        return Response({'results': bulk.bulk_create(serializer.validated_data['appointments'])})
+
+    @action(detail=False, methods=['post'], url_path='bulk-status', permission_classes=[IsAdminUser],
+            serializer_class=serializers.BulkAppointmentStatusSerializer)
+    def bulk_status(self, request):
+        """{"ids": [...], "appointment_status": "Running"}"""
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        results = bulk.bulk_transition(serializer.validated_data['ids'], serializer.validated_data['appointment_status'])
+        return Response({'results': results})
+
+    @action(detail=False, methods=['post'], url_path='bulk-cancel', permission_classes=[IsAdminUser],
+            serializer_class=serializers.BulkAppointmentIdsSerializer)
+    def bulk_cancel(self, request):
+        """{"ids": [...]}"""
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        return Response({'results': bulk.bulk_cancel(serializer.validated_data['ids'])})
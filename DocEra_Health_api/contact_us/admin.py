@@ -3,6 +3,6 @@ from .models import ContactUs
 
 # Register your models here.
 class ContactModelAdmin(admin.ModelAdmin):
-    list_display = ['name', 'phone', 'problem']
+    list_display = ['name', 'phone', 'problem', 'created']
     
 admin.site.register(ContactUs, ContactModelAdmin)
\ No newline at end of file
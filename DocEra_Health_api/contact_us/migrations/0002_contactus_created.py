@@ -0,0 +1,19 @@
+# Generated by Django 5.2.1 on 2026-10-18 13:46
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contact_us', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='contactus',
+            name='created',
+            field=models.DateTimeField(db_index=True, default=django.utils.timezone.now, editable=False),
+        ),
+    ]
@@ -1,10 +1,12 @@
 from django.db import models
+from django.utils import timezone
 
 # Create your models here.
 class ContactUs(models.Model):
     name = models.CharField(max_length= 40)
     phone = models.CharField(max_length= 14)
     problem = models.TextField()
+    created = models.DateTimeField(default=timezone.now, db_index=True, editable=False)
 
     class Meta:
         verbose_name_plural = "Contact Us"
@@ -2,8 +2,12 @@ from django.shortcuts import render
 from rest_framework import viewsets
 from . import models 
 from . import serializers 
+from core.mixins import SerializerTimingMixin
+from core.pagination import KeysetPagination
 
 # Create your views here.
-class ContactUsViewset(viewsets.ModelViewSet):
+class ContactUsViewset(SerializerTimingMixin, viewsets.ModelViewSet):
     queryset = models.ContactUs.objects.all()
-    serializer_class = serializers.ContactUsSerializer
\ No newline at end of file
+    serializer_class = serializers.ContactUsSerializer
+    pagination_class = KeysetPagination
+    cursor_ordering = '-id'
\ No newline at end of file
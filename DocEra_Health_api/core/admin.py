@@ -1,5 +1,26 @@
 from django.contrib import admin
-from .models import UserProfile
+from .models import UserProfile, OutboxEmail, SlowQuery
 
 # Register your models here.
-admin.site.register(UserProfile)
\ No newline at end of file
+class OutboxEmailAdmin(admin.ModelAdmin):
+    list_display = ['subject', 'to', 'status', 'attempts', 'next_attempt_at', 'sent_at']
+    list_filter = ['status']
+
+
+class SlowQueryAdmin(admin.ModelAdmin):
+    list_display = ['short_statement', 'view', 'count', 'total_ms', 'mean_ms', 'max_ms', 'last_seen']
+    list_filter = ['database', 'view']
+    search_fields = ['statement', 'view']
+    readonly_fields = ['fingerprint', 'database', 'statement', 'example', 'view', 'count', 'total_ms', 'max_ms',
+                       'plan', 'first_seen', 'last_seen']
+
+    @admin.display(description='statement')
+    def short_statement(self, obj):
+        return obj.statement[:120]
+
+    def has_add_permission(self, request):
+        return False
+
+admin.site.register(UserProfile)
+admin.site.register(OutboxEmail, OutboxEmailAdmin)
+admin.site.register(SlowQuery, SlowQueryAdmin)
@@ -1,4 +1,5 @@
 from django.apps import AppConfig
+from django.conf import settings
 
 
 class CoreConfig(AppConfig):
@@ -6,4 +7,10 @@ class CoreConfig(AppConfig):
     name = 'core'
 
     def ready(self):
-        import core.signals
\ No newline at end of file
+        import core.signals
+        if not settings.SLIM_RUNTIME:
+            # the OpenAPI extension for ClaimsJWTAuthentication, for `manage.py spectacular` too
+            import core.openapi
+        if settings.SLOW_QUERY_MS:
+            from core import slow_queries
+            slow_queries.install()
@@ -0,0 +1,100 @@
+"""
+Async (ASGI) read path for the public directory endpoints.
+
+Viewsets opt in with AsyncReadMixin, which provides `alist` / `aretrieve` on the async ORM; urls
+built by AsyncReadRouter then answer GET / HEAD on the list and detail routes with those, on the
+same URLs and with the same payloads. Writes, the browsable API (text/html, ?format=) and
+viewsets without the mixin still go through the regular DRF view.
+
+Enabled with ASYNC_READ_PATH (on by default when started through asgi.py). Under WSGI each async
+view would need its own event loop, so the sync views are kept there.
+"""
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.http import Http404
+from django.urls import URLPattern
+from rest_framework.response import Response
+from rest_framework.routers import DefaultRouter
+
+
+class AsyncReadMixin:
+    async def alist(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        paginator = self.paginator
+        if paginator is not None:
+            page = await paginator.apaginate_queryset(queryset, request, view=self)
+            if page is not None:
+                return self.get_paginated_response(self.get_serializer(page, many=True).data)
+        objects = [obj async for obj in queryset]
+        return Response(self.get_serializer(objects, many=True).data)
+
+    async def aretrieve(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        # the same 404s as DRF's get_object_or_404
+        try:
+            instance = await queryset.aget(**{self.lookup_field: self.kwargs[lookup_url_kwarg]})
+        except queryset.model.DoesNotExist:
+            raise Http404(f"No {queryset.model._meta.object_name} matches the given query.")
+        except (TypeError, ValueError, ValidationError):
+            raise Http404
+        self.check_object_permissions(request, instance)
+        return Response(self.get_serializer(instance).data)
+
+
+def wants_browsable_api(request):
+    return 'format' in request.GET or 'text/html' in request.headers.get('Accept', '')
+
+
+async def dispatch_async(sync_view, request, *args, **kwargs):
+    """APIView.dispatch for one list / retrieve action, awaiting the viewset's a<action>."""
+    self = sync_view.cls(**sync_view.initkwargs)
+    self.action_map = sync_view.actions
+    self.action = sync_view.actions['get']
+    self.args, self.kwargs = args, kwargs
+    self.headers = self.default_response_headers
+
+    request = self.initialize_request(request, *args, **kwargs)
+    self.request = request
+    try:
+        if 'HTTP_AUTHORIZATION' in request.META:
+            # authentication may fall back to loading the user from the database
+            await sync_to_async(self.initial)(request, *args, **kwargs)
+        else:
+            self.initial(request, *args, **kwargs)
+        response = await getattr(self, 'a' + self.action)(request, *args, **kwargs)
+    except Exception as exc:
+        response = self.handle_exception(exc)
+
+    self.response = self.finalize_response(request, response, *args, **kwargs)
+    return self.response.render()
+
+
+def async_read(sync_view):
+    async def view(request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD') or wants_browsable_api(request):
+            return await sync_to_async(sync_view)(request, *args, **kwargs)
+        return await dispatch_async(sync_view, request, *args, **kwargs)
+
+    # what drf-spectacular and the CSRF middleware read off DRF views
+    for attr in ('cls', 'initkwargs', 'actions', 'csrf_exempt'):
+        setattr(view, attr, getattr(sync_view, attr))
+    view.__name__ = sync_view.__name__
+    return view
+
+
+class AsyncReadRouter(DefaultRouter):
+    def get_urls(self):
+        urls = super().get_urls()
+        if not settings.ASYNC_READ_PATH:
+            return urls
+        return [self.async_pattern(url) if isinstance(url, URLPattern) else url for url in urls]
+
+    def async_pattern(self, url):
+        view = url.callback
+        cls = getattr(view, 'cls', None)
+        action = getattr(view, 'actions', {}).get('get')
+        if cls is None or not issubclass(cls, AsyncReadMixin) or action not in ('list', 'retrieve'):
+            return url
+        return URLPattern(url.pattern, async_read(view), url.default_args, url.name)
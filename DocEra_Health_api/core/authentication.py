@@ -0,0 +1,140 @@
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import router
+from django.utils import timezone
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.settings import api_settings
+
+from .models import UserProfile
+
+# claims stamped into every token by core.serializers.TokenObtainPairSerializer / TokenRefreshSerializer
+CLAIM_NAMES = ('role', 'patient_id', 'doctor_id')
+USER_CLAIM_FIELDS = ('username', 'is_staff', 'is_superuser', 'is_active')
+
+
+def claims_queryset():
+    return get_user_model().objects.select_related('profile', 'patient', 'doctor')
+
+
+def role_claims(user, loaded=False):
+    """
+    Read role, patient_id and doctor_id (plus the flags permissions need) for a token. One query,
+    none when the user already comes from claims_queryset() (loaded=True).
+    """
+    if not loaded:
+        user = claims_queryset().get(pk=user.pk)
+    profile = getattr(user, 'profile', None)
+    patient = getattr(user, 'patient', None)
+    doctor = getattr(user, 'doctor', None)
+    claims = {field: getattr(user, field) for field in USER_CLAIM_FIELDS}
+    claims.update({
+        'role': profile.role if profile else None,
+        'patient_id': patient.pk if patient else None,
+        'doctor_id': doctor.pk if doctor else None,
+    })
+    return claims
+
+
+def stamp_claims(token, user, loaded=False):
+    for name, value in role_claims(user, loaded).items():
+        token[name] = value
+    return token
+
+
+def claims_changed_key(user_id):
+    return f"auth:claims-changed:{user_id}"
+
+
+def claims_marker_timeout():
+    return int(max(api_settings.ACCESS_TOKEN_LIFETIME, api_settings.REFRESH_TOKEN_LIFETIME).total_seconds())
+
+
+def invalidate_claims(user_id):
+    """
+    Called when a user's role, profiles or flags change: tokens issued up to now stop being trusted
+    and authenticate against the database until they are refreshed. The time is kept on the user's
+    UserProfile and mirrored in the cache, so an evicted cache entry is reloaded rather than lost.
+    """
+    now = timezone.now()
+    UserProfile.objects.filter(user_id=user_id).update(claims_changed_at=now)
+    cache.set(claims_changed_key(user_id), int(now.timestamp()), timeout=claims_marker_timeout())
+
+
+def claims_changed_at(user_id):
+    """
+    Epoch seconds of the user's last claims change (0 if never), or None when the user has no
+    profile (deleted, or never set up), whose tokens are never trusted.
+    """
+    key = claims_changed_key(user_id)
+    changed_at = cache.get(key)
+    if changed_at is None:
+        profile = UserProfile.objects.filter(user_id=user_id).values_list('claims_changed_at', flat=True)
+        if not profile:
+            return None
+        changed_at = int(profile[0].timestamp()) if profile[0] else 0
+        cache.add(key, changed_at, timeout=claims_marker_timeout())
+    return changed_at
+
+
+def user_claims(user):
+    """
+    role / patient_id / doctor_id of the requesting user: straight from the token when authenticated
+    by ClaimsJWTAuthentication, otherwise looked up (session auth, stale or old tokens).
+    """
+    claims = getattr(user, 'token_claims', None)
+    if claims is None:
+        claims = role_claims(user) if user.is_authenticated else dict.fromkeys(CLAIM_NAMES)
+        if user.is_authenticated:
+            user.token_claims = claims
+    return claims
+
+
+def load_rest_together(user):
+    # touching one deferred field (e.g. email in /auth/users/me/) loads all of them in one query
+    refresh_from_db = user.refresh_from_db
+
+    def load(using=None, fields=None, **kwargs):
+        if fields is not None:
+            fields = {*fields, *user.get_deferred_fields()}
+        return refresh_from_db(using=using, fields=fields, **kwargs)
+
+    user.refresh_from_db = load
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """
+    JWT authentication that trusts the signed claims instead of loading the user row.
+
+    request.user is a real User instance built from the token, with every other field deferred
+    (loaded on first access). Tokens without claims, or issued before the user's role last changed,
+    fall back to the regular database lookup. Off unless JWT_TRUST_CLAIMS is set (see settings).
+    """
+
+    def get_user(self, validated_token):
+        if not self.claims_are_current(validated_token):
+            return super().get_user(validated_token)
+
+        user_model = get_user_model()
+        known = {user_model._meta.pk.attname: validated_token[api_settings.USER_ID_CLAIM]}
+        known.update((field, validated_token[field]) for field in USER_CLAIM_FIELDS)
+        # from_db wants the values in concrete field order
+        field_names = [f.attname for f in user_model._meta.concrete_fields if f.attname in known]
+        user = user_model.from_db(router.db_for_read(user_model), field_names, [known[name] for name in field_names])
+        load_rest_together(user)
+        user.token_claims = {name: validated_token[name] for name in CLAIM_NAMES}
+        return user
+
+    def claims_are_current(self, validated_token):
+        if any(name not in validated_token for name in (*CLAIM_NAMES, *USER_CLAIM_FIELDS, 'iat')):
+            return False
+        if not validated_token['is_active']:
+            return False
+        if not getattr(settings, 'JWT_TRUST_CLAIMS', False):
+            return False
+        # iat has one-second resolution: a token issued in the same second as the change may have
+        # been stamped before it, so only later tokens are trusted
+        changed_at = claims_changed_at(validated_token[api_settings.USER_ID_CLAIM])
+        return changed_at is not None and validated_token['iat'] > changed_at
@@ -0,0 +1,69 @@
+"""Shared helpers of the benchmark management commands (latency summaries, simulated DB latency)."""
+import math
+import time
+from contextlib import contextmanager
+
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+
+def percentile(ordered, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not ordered:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def summarize(latencies, elapsed):
+    """latencies and elapsed in seconds; the summary is in requests/s and milliseconds."""
+    ordered = sorted(latencies)
+    return {
+        'requests': len(ordered),
+        'rps': round(len(ordered) / elapsed, 1) if elapsed else 0.0,
+        'p50_ms': round(percentile(ordered, 50) * 1000, 2),
+        'p95_ms': round(percentile(ordered, 95) * 1000, 2),
+        'p99_ms': round(percentile(ordered, 99) * 1000, 2),
+        'max_ms': round((ordered[-1] if ordered else 0.0) * 1000, 2),
+    }
+
+
+def format_table(rows, columns):
+    """Plain-text table of dict rows, one column per key in `columns`."""
+    widths = {column: max(len(column), *(len(str(row.get(column, ''))) for row in rows)) for column in columns}
+    lines = ['  '.join(column.ljust(widths[column]) for column in columns)]
+    lines.append('  '.join('-' * widths[column] for column in columns))
+    for row in rows:
+        lines.append('  '.join(str(row.get(column, '')).ljust(widths[column]) for column in columns))
+    return '\n'.join(lines)
+
+
+@contextmanager
+def db_latency(seconds):
+    """
+    Add `seconds` of blocking wait to every query, on every connection opened meanwhile, to
+    emulate a database across the network (the local SQLite file answers in microseconds).
+    """
+    if not seconds:
+        yield
+        return
+
+    def wait(execute, sql, params, many, context):
+        time.sleep(seconds)
+        return execute(sql, params, many, context)
+
+    def install(sender, connection, **kwargs):
+        # fired again each time a closed connection object reconnects
+        if wait not in connection.execute_wrappers:
+            connection.execute_wrappers.append(wait)
+
+    connection_created.connect(install, weak=False)
+    for connection in connections.all(initialized_only=True):
+        install(None, connection)
+    try:
+        yield
+    finally:
+        connection_created.disconnect(install)
+        for connection in connections.all(initialized_only=True):
+            if wait in connection.execute_wrappers:
+                connection.execute_wrappers.remove(wait)
@@ -0,0 +1,207 @@
+import asyncio
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction
+from rest_framework.response import Response
+
+KEY_PREFIX = "catalog"
+
+# every viewset using CachedResponseMixin, for the hit/miss report
+cached_views = []
+
+
+def local_cache():
+    """True for the per-process caches (locmem / dummy), which other workers can't see."""
+    return isinstance(caches['default'], (LocMemCache, DummyCache))
+
+
+async def acache(method, *args, **kwargs):
+    """
+    await cache.a<method>(...). Django's async cache methods run the sync ones in a worker thread;
+    the in-process cache never blocks, so it is called directly.
+    """
+    if local_cache():
+        return getattr(cache, method)(*args, **kwargs)
+    return await getattr(cache, f"a{method}")(*args, **kwargs)
+
+
+def version_key(model):
+    return f"{KEY_PREFIX}:version:{model._meta.label_lower}"
+
+
+def model_versions(models):
+    """
+    Current version of each model. A version is created on first use from the clock, so a version
+    evicted from the cache comes back as a new value and can never revive stale entries.
+    """
+    keys = [version_key(model) for model in models]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, time.time_ns(), timeout=None)
+            versions[key] = cache.get(key)
+    return [versions[key] for key in keys]
+
+
+async def amodel_versions(models):
+    keys = [version_key(model) for model in models]
+    versions = await acache('get_many', keys)
+    for key in keys:
+        if key not in versions:
+            await acache('add', key, time.time_ns(), timeout=None)
+            versions[key] = await acache('get', key)
+    return [versions[key] for key in keys]
+
+
+def invalidate(*models):
+    """
+    Bump the version of the given models once the current transaction commits (right away outside
+    one); every cached response built from them goes stale at once. Bumping before the commit would
+    let a concurrent read cache the uncommitted-away rows under the new version.
+    """
+    transaction.on_commit(lambda: bump(models))
+
+
+def bump(models):
+    for model in models:
+        key = version_key(model)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, time.time_ns(), timeout=None)
+
+
+def count(view_name, outcome):
+    key = f"{KEY_PREFIX}:stats:{view_name}:{outcome}"
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, 0, timeout=None)
+        cache.incr(key)
+
+
+async def acount(view_name, outcome):
+    key = f"{KEY_PREFIX}:stats:{view_name}:{outcome}"
+    try:
+        await acache('incr', key)
+    except ValueError:
+        await acache('add', key, 0, timeout=None)
+        await acache('incr', key)
+
+
+def stats():
+    names = [view.__name__ for view in cached_views]
+    keys = {
+        name: (f"{KEY_PREFIX}:stats:{name}:hit", f"{KEY_PREFIX}:stats:{name}:miss")
+        for name in names
+    }
+    values = cache.get_many([key for pair in keys.values() for key in pair])
+    return {
+        name: {"hits": values.get(hit, 0), "misses": values.get(miss, 0)}
+        for name, (hit, miss) in keys.items()
+    }
+
+
+class CachedResponseMixin:
+    """
+    Read-through cache for list/retrieve responses of rarely changing viewsets.
+
+    `cache_models` lists every model the response is built from. Entries are keyed on those
+    models' versions, the full URL (host, path, query string, pagination) and the action, so a
+    save/delete/m2m change on any of them (see core.signals) makes the entry unreachable.
+    Only one request recomputes a missing key; concurrent requests wait for its result.
+    """
+
+    cache_models = ()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cached_views.append(cls)
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(super().retrieve, request, *args, **kwargs)
+
+    # the async read path (core.async_views) shares the entries of the sync views
+    async def alist(self, request, *args, **kwargs):
+        return await self.acached_response(super().alist, request, *args, **kwargs)
+
+    async def aretrieve(self, request, *args, **kwargs):
+        return await self.acached_response(super().aretrieve, request, *args, **kwargs)
+
+    def response_cache_key(self, request, versions=None):
+        if versions is None:
+            versions = model_versions(self.cache_models or (self.queryset.model,))
+        url = request.build_absolute_uri(request.path)
+        query = sorted(request.query_params.lists())
+        raw = f"{self.__class__.__name__}|{self.action}|{versions}|{url}|{query}"
+        return f"{KEY_PREFIX}:response:{hashlib.md5(raw.encode()).hexdigest()}"
+
+    def cached_response(self, render, request, *args, **kwargs):
+        view_name = self.__class__.__name__
+        key = self.response_cache_key(request)
+
+        data = cache.get(key)
+        if data is not None:
+            count(view_name, "hit")
+            return Response(data)
+
+        lock_key = f"{key}:lock"
+        if not cache.add(lock_key, 1, timeout=settings.CATALOG_CACHE_LOCK_TIMEOUT):
+            # another request is building this entry; wait for it rather than stampeding the database
+            deadline = time.monotonic() + settings.CATALOG_CACHE_LOCK_TIMEOUT
+            while time.monotonic() < deadline:
+                time.sleep(0.05)
+                data = cache.get(key)
+                if data is not None:
+                    count(view_name, "hit")
+                    return Response(data)
+            lock_key = None
+
+        try:
+            response = render(request, *args, **kwargs)
+            if response.status_code == 200:
+                cache.set(key, response.data, timeout=settings.CATALOG_CACHE_TIMEOUT)
+        finally:
+            if lock_key:
+                cache.delete(lock_key)
+        count(view_name, "miss")
+        return response
+
+    async def acached_response(self, render, request, *args, **kwargs):
+        view_name = self.__class__.__name__
+        versions = await amodel_versions(self.cache_models or (self.queryset.model,))
+        key = self.response_cache_key(request, versions)
+
+        data = await acache('get', key)
+        if data is not None:
+            await acount(view_name, "hit")
+            return Response(data)
+
+        lock_key = f"{key}:lock"
+        if not await acache('add', lock_key, 1, timeout=settings.CATALOG_CACHE_LOCK_TIMEOUT):
+            deadline = time.monotonic() + settings.CATALOG_CACHE_LOCK_TIMEOUT
+            while time.monotonic() < deadline:
+                await asyncio.sleep(0.05)
+                data = await acache('get', key)
+                if data is not None:
+                    await acount(view_name, "hit")
+                    return Response(data)
+            lock_key = None
+
+        try:
+            response = await render(request, *args, **kwargs)
+            if response.status_code == 200:
+                await acache('set', key, response.data, timeout=settings.CATALOG_CACHE_TIMEOUT)
+        finally:
+            if lock_key:
+                await acache('delete', lock_key)
+        await acount(view_name, "miss")
+        return response
@@ -0,0 +1,182 @@
+"""
+Streaming CSV / NDJSON exports of appointments, patients and contact requests, served by
+/core/export/<kind>/ and `manage.py export_data`.
+
+An export is a single SELECT of flat columns (values_list across the joins, no model instances
+or serializers) read with QuerySet.iterator(chunk_size=...), a server-side cursor on PostgreSQL,
+and encoded one chunk of rows at a time, gzipped on the fly if asked. Memory stays flat whatever
+the row count, and the first bytes are sent as soon as the first chunk has been fetched (under
+ASGI too, see core.streaming).
+"""
+import csv
+import datetime
+import io
+import zlib
+from itertools import islice
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from appointment.models import APPOINTMENT_SATUS, Appointment
+from contact_us.models import ContactUs
+from patient.models import Patient
+
+FORMATS = ('csv', 'ndjson')
+CONTENT_TYPES = {'csv': 'text/csv; charset=utf-8', 'ndjson': 'application/x-ndjson'}
+CHUNK_SIZE = 2000
+
+
+def boolean(value):
+    if value in (True, False):
+        return value
+    if value not in ('true', 'false'):
+        raise ValueError("Expected true or false.")
+    return value == 'true'
+
+
+def choice_list(choices):
+    def parse(value):
+        values = value.split(',') if isinstance(value, str) else list(value)
+        unknown = set(values) - {choice for choice, _ in choices}
+        if unknown:
+            raise ValueError(f"Unknown values {sorted(unknown)}.")
+        return values
+    return parse
+
+
+def day_start(day):
+    return datetime.datetime.combine(day, datetime.time.min, tzinfo=timezone.get_current_timezone())
+
+
+def as_date(value):
+    if isinstance(value, datetime.date):
+        return value
+    try:
+        day = parse_date(value or '')
+    except ValueError:
+        day = None
+    if day is None:
+        raise ValueError(f"Expected a date as YYYY-MM-DD, got {value!r}.")
+    return day
+
+
+class Export:
+    def __init__(self, model, columns, date_field, filters=None):
+        self.model = model
+        # CSV header / NDJSON key -> ORM path
+        self.columns = columns
+        # a DateTimeField; ?since= / ?until= select whole local days of it
+        self.date_field = date_field
+        # filter name -> (lookup, parser of the query string value)
+        self.filters = filters or {}
+
+    @property
+    def headers(self):
+        return list(self.columns)
+
+    def queryset(self, since=None, until=None, **filters):
+        """The export's rows as value tuples. Raises ValueError for bad or unsupported filters."""
+        lookups = {}
+        if since is not None:
+            lookups[f'{self.date_field}__gte'] = day_start(as_date(since))
+        if until is not None:
+            lookups[f'{self.date_field}__lt'] = day_start(as_date(until) + datetime.timedelta(days=1))
+        for name, value in filters.items():
+            if name not in self.filters:
+                supported = ', '.join(sorted(self.filters)) or 'only since / until'
+                raise ValueError(f"Unsupported filter {name!r} ({supported}).")
+            lookup, parse = self.filters[name]
+            lookups[lookup] = parse(value)
+        # in primary key order, so the cursor walks the pk index
+        return self.model.objects.filter(**lookups).order_by('pk').values_list(*self.columns.values())
+
+    def rows(self, chunk_size=CHUNK_SIZE, **filters):
+        return self.queryset(**filters).iterator(chunk_size=chunk_size)
+
+
+EXPORTS = {
+    'appointments': Export(
+        Appointment,
+        {
+            'id': 'id', 'created': 'created',
+            'patient_id': 'patient_id', 'patient_name': 'patient_name',
+            'doctor_id': 'doctor_id', 'doctor_name': 'doctor_name',
+            'type': 'appointment_type', 'status': 'appointment_status', 'cancel': 'cancel',
+            'symptom': 'symptom', 'time': 'time__time', 'slot_date': 'slot__date', 'slot_start': 'slot__start_time',
+        },
+        date_field='created',
+        filters={'status': ('appointment_status__in', choice_list(APPOINTMENT_SATUS)), 'cancel': ('cancel', boolean)},
+    ),
+    'patients': Export(
+        Patient,
+        {
+            'id': 'id', 'user_id': 'user_id', 'username': 'user__username',
+            'first_name': 'user__first_name', 'last_name': 'user__last_name', 'email': 'user__email',
+            'mobile_no': 'mobile_no', 'date_joined': 'user__date_joined', 'active': 'user__is_active',
+        },
+        date_field='user__date_joined',
+        filters={'active': ('user__is_active', boolean)},
+    ),
+    'contacts': Export(
+        ContactUs,
+        {'id': 'id', 'created': 'created', 'name': 'name', 'phone': 'phone', 'problem': 'problem'},
+        date_field='created',
+    ),
+}
+KINDS = tuple(EXPORTS)
+
+
+def filename(kind, fmt, compress=False):
+    return f"{kind}-{timezone.localdate()}.{fmt}" + ('.gz' if compress else '')
+
+
+def plain(value):
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    return '' if value is None else value
+
+
+def chunked(rows, size):
+    rows = iter(rows)
+    while chunk := list(islice(rows, size)):
+        yield chunk
+
+
+def encode(headers, rows, fmt, chunk_size=CHUNK_SIZE):
+    """UTF-8 encoded CSV (with a header line) or NDJSON, one bytes chunk per `chunk_size` rows."""
+    if fmt == 'csv':
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        # before the query runs: the client gets its first byte right away
+        writer.writerow(headers)
+        yield buffer.getvalue().encode()
+        for chunk in chunked(rows, chunk_size):
+            buffer.seek(0)
+            buffer.truncate()
+            writer.writerows([plain(value) for value in row] for row in chunk)
+            yield buffer.getvalue().encode()
+        return
+    encoder = DjangoJSONEncoder(ensure_ascii=False)
+    for chunk in chunked(rows, chunk_size):
+        yield ''.join(encoder.encode(dict(zip(headers, row))) + '\n' for row in chunk).encode()
+
+
+def gzipped(chunks):
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    first = True
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if first:
+            # flush the gzip header and the first chunk instead of waiting for a full deflate block
+            data += compressor.flush(zlib.Z_SYNC_FLUSH)
+            first = False
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def stream(export, rows, fmt, compress=False, chunk_size=CHUNK_SIZE):
+    """The bytes of an export of `rows` (see Export.rows), lazily."""
+    chunks = encode(export.headers, rows, fmt, chunk_size)
+    return gzipped(chunks) if compress else chunks
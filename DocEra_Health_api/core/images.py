@@ -0,0 +1,175 @@
+"""
+Resized / WebP derivatives of uploaded images (Doctor, Patient and Service).
+
+Uploads are stored as they come, the model's `image_variants` is emptied and `variants_pending`
+set (a partial index keeps the queue a short index read); the `process_images` worker picks those
+rows up and writes the variants under `variants/` with content-hashed names
+(so they can be cached forever), then records them:
+
+    {"source": "doctors/images/a.jpg", "width": 3024, "height": 4032,
+     "variants": {"thumb": {"width": 96, "height": 96, "webp": "variants/...-96.webp", "jpeg": "..."}, ...}}
+"""
+import hashlib
+import io
+import posixpath
+import re
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import models
+from django.db.models import Q
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import extend_schema_field
+from PIL import Image, ImageOps, UnidentifiedImageError
+from rest_framework import serializers
+
+from . import cache
+
+FORMATS = {'webp': ('WEBP', 'webp'), 'jpeg': ('JPEG', 'jpg')}
+# "<stem>.<16 hex digest>-<width>.<ext>", as written by store()
+HASHED_NAME_RE = re.compile(r'\.[0-9a-f]{16}-\d+\.[a-z]+$')
+
+
+class ImageVariantsModel(models.Model):
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
+    variants_pending = models.BooleanField(default=False, editable=False)
+
+    class Meta:
+        abstract = True
+        indexes = [
+            # the process_images queue
+            models.Index(fields=['id'], condition=Q(variants_pending=True), name='%(app_label)s_%(class)s_pending'),
+        ]
+
+    def save(self, *args, **kwargs):
+        # a new or replaced image goes back in the process_images queue
+        if self.image and self.image_variants.get('source') != self.image.name:
+            self.image_variants = {}
+            self.variants_pending = True
+            if kwargs.get('update_fields') is not None:
+                kwargs['update_fields'] = {*kwargs['update_fields'], 'image_variants', 'variants_pending'}
+        return super().save(*args, **kwargs)
+
+
+def variant_models():
+    from django.apps import apps
+    return [model for model in apps.get_models() if issubclass(model, ImageVariantsModel)]
+
+
+def pending(model):
+    """Rows with an image whose variants haven't been generated yet."""
+    return model.objects.filter(variants_pending=True)
+
+
+def resize(image, name, width):
+    # "thumb" is a square crop for avatars and cards; the others keep the aspect ratio
+    if name == 'thumb':
+        return ImageOps.fit(image, (width, width), Image.Resampling.LANCZOS)
+    if image.width <= width:
+        return image.copy()
+    return image.resize((width, round(image.height * width / image.width)), Image.Resampling.LANCZOS)
+
+
+def encode(image, fmt):
+    pil_format, _ = FORMATS[fmt]
+    if fmt == 'jpeg' and image.mode != 'RGB':
+        image = image.convert('RGB')
+    buffer = io.BytesIO()
+    image.save(buffer, pil_format, quality=settings.IMAGE_VARIANT_QUALITY, optimize=True)
+    return buffer.getvalue()
+
+
+def store(content, source_name, width, fmt):
+    digest = hashlib.sha256(content).hexdigest()[:16]
+    stem = posixpath.splitext(posixpath.basename(source_name))[0]
+    name = posixpath.join('variants', posixpath.dirname(source_name), f"{stem}.{digest}-{width}.{FORMATS[fmt][1]}")
+    # same bytes, same name: an existing file is already the right one
+    if not default_storage.exists(name):
+        name = default_storage.save(name, ContentFile(content))
+    return name
+
+
+def is_hashed_name(name):
+    """Variant files never change under their name, so they can be cached for good."""
+    return name.startswith('variants/') and HASHED_NAME_RE.search(name) is not None
+
+
+def build_variants(field_file):
+    with field_file.open('rb') as handle:
+        image = Image.open(handle)
+        image.load()
+    image = ImageOps.exif_transpose(image)
+    if image.mode not in ('RGB', 'RGBA'):
+        image = image.convert('RGBA' if 'transparency' in image.info or image.mode in ('LA', 'PA') else 'RGB')
+
+    variants = {}
+    for name, width in settings.IMAGE_VARIANT_SIZES.items():
+        resized = resize(image, name, width)
+        variant = {'width': resized.width, 'height': resized.height}
+        for fmt in FORMATS:
+            variant[fmt] = store(encode(resized, fmt), field_file.name, width, fmt)
+        variants[name] = variant
+    return {'source': field_file.name, 'width': image.width, 'height': image.height, 'variants': variants}
+
+
+def process(instance):
+    """Generate and record the variants of one row. Returns False if the image can't be read."""
+    source = instance.image.name
+    try:
+        data = build_variants(instance.image)
+        ok = True
+    except (OSError, UnidentifiedImageError, Image.DecompressionBombError) as exc:
+        # recorded so the row leaves the queue; re-uploading the image queues it again
+        data = {'source': source, 'error': str(exc), 'variants': {}}
+        ok = False
+    # only if the image wasn't replaced while we were working on it
+    type(instance).objects.filter(pk=instance.pk, image=source).update(image_variants=data, variants_pending=False)
+    return ok
+
+
+def process_pending(batch_size):
+    """Process up to batch_size queued images per model. Returns (processed, failed)."""
+    processed = failed = 0
+    for model in variant_models():
+        batch = list(pending(model).order_by('pk')[:batch_size])
+        for instance in batch:
+            if process(instance):
+                processed += 1
+            else:
+                failed += 1
+        if batch:
+            # the rows were updated without signals; drop cached listings that embed them
+            cache.invalidate(model)
+    return processed, failed
+
+
+@extend_schema_field(OpenApiTypes.OBJECT)
+class ImageVariantsField(serializers.Field):
+    """
+    Read-only map of an instance's image variants: per size the URLs and dimensions, plus ready
+    made srcset strings per format. Empty until process_images has handled the upload.
+    """
+
+    def __init__(self, **kwargs):
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def url(self, name):
+        url = default_storage.url(name)
+        request = self.context.get('request')
+        return request.build_absolute_uri(url) if request is not None else url
+
+    def to_representation(self, value):
+        variants = (value or {}).get('variants') or {}
+        data = {}
+        srcset = {fmt: [] for fmt in FORMATS}
+        for name, variant in variants.items():
+            data[name] = {'width': variant['width'], 'height': variant['height']}
+            for fmt in FORMATS:
+                data[name][fmt] = self.url(variant[fmt])
+                if name != 'thumb':
+                    srcset[fmt].append(f"{data[name][fmt]} {variant['width']}w")
+        if variants:
+            data['srcset'] = {fmt: ', '.join(entries) for fmt, entries in srcset.items()}
+        return data
@@ -0,0 +1,267 @@
+"""
+Streaming roster import: creates User + UserProfile + Patient (or Doctor with its M2M links) rows
+in chunks with bulk_create.
+
+bulk_create doesn't send post_save, so the per-row handlers in core.signals (profile creation,
+doctor role switch, rating aggregate, cache invalidation) do not fan out; their work is done here
+once per chunk instead.
+"""
+import csv
+import json
+import time
+from itertools import islice
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
+from django.core.validators import URLValidator, validate_email
+from django.db import IntegrityError, transaction
+
+from . import cache
+from .models import UserProfile
+from patient.models import Patient
+from patient.serializers import MOBILE_NO_PATTERN
+from doctor.models import Doctor, DoctorRating, Designation, Specialization, AvailableTime
+
+KINDS = ('patients', 'doctors')
+FORMATS = ('csv', 'ndjson')
+MAX_REPORTED_ERRORS = 1000
+MAX_CHUNK_SIZE = 5000
+# marks an NDJSON line that could not be parsed into a record
+INVALID = '__invalid__'
+
+
+def read_rows(stream, fmt):
+    """Yield one dict per record of a CSV (with header) or NDJSON text stream."""
+    if fmt == 'csv':
+        yield from csv.DictReader(stream)
+        return
+    for line in stream:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as exc:
+            record = {INVALID: f"Invalid JSON: {exc}"}
+        yield record if isinstance(record, dict) else {INVALID: "Expected a JSON object."}
+
+
+def format_for(filename, default='csv'):
+    if filename and filename.lower().endswith(('.ndjson', '.jsonl')):
+        return 'ndjson'
+    if filename and filename.lower().endswith('.csv'):
+        return 'csv'
+    return default
+
+
+def split_values(value):
+    # M2M columns: a list in NDJSON, "a|b|c" in CSV
+    if not value:
+        return []
+    if isinstance(value, (list, tuple)):
+        return [str(item).strip() for item in value if str(item).strip()]
+    return [item.strip() for item in str(value).split('|') if item.strip()]
+
+
+def parse_bool(value, default=True):
+    if value in (None, ''):
+        return default
+    if isinstance(value, bool):
+        return value
+    return str(value).strip().lower() in ('1', 'true', 'yes', 'y')
+
+
+class RosterImporter:
+    def __init__(self, kind, chunk_size=1000):
+        if kind not in KINDS:
+            raise ValueError(f"kind must be one of {KINDS}")
+        if not 1 <= chunk_size <= MAX_CHUNK_SIZE:
+            raise ValueError(f"chunk_size must be between 1 and {MAX_CHUNK_SIZE}")
+        self.kind = kind
+        self.chunk_size = chunk_size
+        self.processed = 0
+        self.created = 0
+        self.errors = []
+        self.error_count = 0
+        self.elapsed = 0.0
+
+    def run(self, rows, progress=None):
+        started = time.monotonic()
+        rows = iter(rows)
+        row_number = 0
+        while True:
+            chunk = []
+            broken = None
+            try:
+                chunk.extend(islice(rows, self.chunk_size))
+            except UnicodeDecodeError as exc:
+                # the decoder reads ahead, so the exact row is unknown; import what was read before
+                # it and report the rest of the file as one error
+                broken = exc
+            if not chunk and broken is None:
+                break
+            numbered = list(enumerate(chunk, start=row_number + 1))
+            row_number += len(chunk)
+            if numbered:
+                self.import_chunk(numbered)
+                self.processed += len(chunk)
+            if broken is not None:
+                self.add_error(row_number + 1, {'non_field_errors': f"The file is not valid UTF-8 from here on: {broken}"})
+            if progress:
+                progress(self)
+            if broken is not None:
+                break
+
+        if self.created and self.kind == 'doctors':
+            cache.invalidate(Doctor, User)
+        self.elapsed = time.monotonic() - started
+        return self.report()
+
+    @property
+    def throughput(self):
+        return self.processed / self.elapsed if self.elapsed else 0.0
+
+    def report(self):
+        return {
+            'kind': self.kind,
+            'processed': self.processed,
+            'created': self.created,
+            'failed': self.error_count,
+            'seconds': round(self.elapsed, 3),
+            'rows_per_second': round(self.throughput, 1),
+            'errors': self.errors,
+            'errors_truncated': self.error_count > len(self.errors),
+        }
+
+    def add_error(self, row_number, errors):
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({'row': row_number, 'errors': errors})
+
+    def import_chunk(self, numbered):
+        usernames = [str(row.get('username') or '').strip() for _, row in numbered]
+        taken = set(User.objects.filter(username__in=usernames).values_list('username', flat=True))
+        lookups = self.load_lookups([row for _, row in numbered]) if self.kind == 'doctors' else None
+
+        valid = []
+        seen = set()
+        for (row_number, row), username in zip(numbered, usernames):
+            errors = self.validate(row, username, taken | seen, lookups)
+            if errors:
+                self.add_error(row_number, errors)
+                continue
+            seen.add(username)
+            valid.append((row_number, row, username))
+
+        if not valid:
+            return
+        try:
+            with transaction.atomic():
+                self.write(valid, lookups)
+        except IntegrityError as exc:
+            # e.g. a username created concurrently; the chunk is rolled back as a whole
+            for row_number, _, _ in valid:
+                self.add_error(row_number, {'non_field_errors': str(exc)})
+            return
+        self.created += len(valid)
+
+    def validate(self, row, username, taken, lookups):
+        if INVALID in row:
+            return {'non_field_errors': row[INVALID]}
+        errors = {}
+        if not username:
+            errors['username'] = "This field is required."
+        elif len(username) > 150:
+            errors['username'] = "Ensure this field has no more than 150 characters."
+        elif username in taken:
+            errors['username'] = "A user with that username already exists."
+
+        email = str(row.get('email') or '').strip()
+        if email:
+            try:
+                validate_email(email)
+            except ValidationError:
+                errors['email'] = "Enter a valid email address."
+
+        if self.kind == 'patients':
+            mobile_no = str(row.get('mobile_no') or '').strip()
+            if mobile_no and not MOBILE_NO_PATTERN.match(mobile_no):
+                errors['mobile_no'] = "Invalid mobile number format."
+            return errors
+
+        fee = row.get('fee')
+        if fee not in (None, ''):
+            try:
+                if int(fee) <= 0:
+                    raise ValueError
+            except (TypeError, ValueError):
+                errors['fee'] = "Fee must be a positive integer."
+        meet_link = str(row.get('meet_link') or '').strip()
+        if meet_link:
+            try:
+                URLValidator()(meet_link)
+            except ValidationError:
+                errors['meet_link'] = "Enter a valid URL."
+        for column, known in lookups.items():
+            unknown = [value for value in split_values(row.get(column)) if value not in known]
+            if unknown:
+                errors[column] = f"Unknown values: {', '.join(unknown)}."
+        return errors
+
+    def load_lookups(self, rows):
+        def wanted(column):
+            return {value for row in rows for value in split_values(row.get(column))}
+
+        return {
+            'designations': Designation.objects.in_bulk(wanted('designations'), field_name='slug'),
+            'specializations': Specialization.objects.in_bulk(wanted('specializations'), field_name='slug'),
+            'available_times': AvailableTime.objects.in_bulk(wanted('available_times'), field_name='time'),
+        }
+
+    def write(self, valid, lookups):
+        # imported accounts get an unusable password: hashing one per row would dominate the run,
+        # and users set their own through the password reset flow
+        password = make_password(None)
+        users = User.objects.bulk_create([
+            User(
+                username=username,
+                email=str(row.get('email') or '').strip(),
+                first_name=str(row.get('first_name') or '').strip(),
+                last_name=str(row.get('last_name') or '').strip(),
+                is_active=parse_bool(row.get('is_active')),
+                password=password,
+            )
+            for _, row, username in valid
+        ])
+
+        if self.kind == 'patients':
+            UserProfile.objects.bulk_create([UserProfile(user=user, role='patient') for user in users])
+            Patient.objects.bulk_create([
+                Patient(user=user, mobile_no=str(row.get('mobile_no') or '').strip())
+                for user, (_, row, _) in zip(users, valid)
+            ])
+            return
+
+        UserProfile.objects.bulk_create([UserProfile(user=user, role='doctor') for user in users])
+        doctors = Doctor.objects.bulk_create([
+            Doctor(
+                user=user,
+                fee=int(row['fee']) if row.get('fee') not in (None, '') else None,
+                meet_link=str(row.get('meet_link') or '').strip() or None,
+            )
+            for user, (_, row, _) in zip(users, valid)
+        ])
+        DoctorRating.objects.bulk_create([DoctorRating(doctor=doctor) for doctor in doctors])
+
+        links = {
+            'designations': (Doctor.designation.through, 'designation'),
+            'specializations': (Doctor.specialization.through, 'specialization'),
+            'available_times': (Doctor.available_time.through, 'availabletime'),
+        }
+        for column, (through, field) in links.items():
+            through.objects.bulk_create([
+                through(doctor=doctor, **{field: lookups[column][value]})
+                for doctor, (_, row, _) in zip(doctors, valid)
+                for value in split_values(row.get(column))
+            ], ignore_conflicts=True)
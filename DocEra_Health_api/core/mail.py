@@ -0,0 +1,147 @@
+import base64
+import hashlib
+import json
+from datetime import timedelta
+from email.mime.base import MIMEBase
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.core.mail.backends.base import BaseEmailBackend
+from django.db import transaction
+from django.utils import timezone
+
+from .models import OutboxEmail
+
+
+class OutboxBackend(BaseEmailBackend):
+    """
+    Email backend that only writes messages to the OutboxEmail table, inside whatever transaction
+    the caller is in. Nothing talks to the mail server during a request; `send_outbox` delivers them.
+    """
+
+    def send_messages(self, email_messages):
+        rows = [to_outbox(message) for message in email_messages]
+        OutboxEmail.objects.bulk_create(rows, ignore_conflicts=True)
+        return len(rows)
+
+
+def outbox_attachment(attachment):
+    if isinstance(attachment, MIMEBase):
+        # a prebuilt MIME part can't be stored faithfully; refuse it rather than drop it
+        raise ValueError("The outbox only queues (filename, content, mimetype) attachments.")
+    filename, content, mimetype = attachment
+    if isinstance(content, str):
+        content = content.encode()
+    return [filename, base64.b64encode(content).decode('ascii'), mimetype]
+
+
+def to_outbox(message):
+    alternatives = [[content, mimetype] for content, mimetype in getattr(message, 'alternatives', [])]
+    attachments = [outbox_attachment(attachment) for attachment in message.attachments]
+    fields = {
+        'subject': str(message.subject),
+        'body': str(message.body),
+        'from_email': message.from_email or settings.DEFAULT_FROM_EMAIL,
+        'to': list(message.to),
+        'cc': list(message.cc),
+        'bcc': list(message.bcc),
+        'reply_to': list(message.reply_to),
+        'headers': dict(message.extra_headers),
+        'alternatives': alternatives,
+        'attachments': attachments,
+    }
+    fields['dedupe_key'] = hashlib.sha256(json.dumps(fields, sort_keys=True).encode()).hexdigest()
+    return OutboxEmail(**fields)
+
+
+def to_message(email, connection):
+    message = EmailMultiAlternatives(
+        subject=email.subject,
+        body=email.body,
+        from_email=email.from_email,
+        to=email.to,
+        cc=email.cc,
+        bcc=email.bcc,
+        reply_to=email.reply_to,
+        headers=email.headers,
+        connection=connection,
+    )
+    for content, mimetype in email.alternatives:
+        message.attach_alternative(content, mimetype)
+    for filename, content, mimetype in email.attachments:
+        message.attach(filename, base64.b64decode(content), mimetype)
+    return message
+
+
+def retry_delay(attempts):
+    return timedelta(seconds=min(settings.OUTBOX_RETRY_BASE_SECONDS * 2 ** (attempts - 1), 6 * 60 * 60))
+
+
+def record_failure(email, exc):
+    email.attempts += 1
+    email.last_error = repr(exc)
+    if email.attempts >= settings.OUTBOX_MAX_ATTEMPTS:
+        email.status = 'failed'
+    else:
+        email.status = 'pending'
+        email.next_attempt_at = timezone.now() + retry_delay(email.attempts)
+
+
+def claim_batch(batch_size):
+    """
+    Claim up to batch_size due emails for this worker in one short transaction: they move to
+    'sending' until a lease runs out, so other workers skip them while they are sent without any
+    transaction or lock held. A worker that dies mid-batch leaves rows that become due again when
+    the lease expires. The lease end doubles as the claim token, so only rows this call moved
+    are returned.
+    """
+    now = timezone.now()
+    lease = now + timedelta(seconds=settings.OUTBOX_LEASE_SECONDS)
+    with transaction.atomic():
+        due = OutboxEmail.objects.filter(status__in=('pending', 'sending'), next_attempt_at__lte=now)
+        ids = list(
+            due.select_for_update(skip_locked=True).order_by('next_attempt_at').values_list('pk', flat=True)[:batch_size]
+        )
+        due.filter(pk__in=ids).update(status='sending', next_attempt_at=lease)
+    return list(OutboxEmail.objects.filter(pk__in=ids, status='sending', next_attempt_at=lease).order_by('pk'))
+
+
+def deliver_batch(batch_size):
+    """
+    Send up to batch_size due emails over one connection to the delivery backend.
+    Returns (sent, failed) counts. The rows are claimed first (see claim_batch) and the results
+    recorded in a second short transaction, so no lock is held while talking to the mail server.
+    """
+    sent = failed = 0
+    emails = claim_batch(batch_size)
+    if not emails:
+        return sent, failed
+
+    connection = get_connection(settings.OUTBOX_DELIVERY_BACKEND, fail_silently=False)
+    try:
+        connection.open()
+    except Exception as exc:
+        # mail server unreachable: the whole batch is retried later
+        for email in emails:
+            record_failure(email, exc)
+        failed = len(emails)
+    else:
+        try:
+            for email in emails:
+                try:
+                    connection.send_messages([to_message(email, connection)])
+                except Exception as exc:
+                    record_failure(email, exc)
+                    failed += 1
+                else:
+                    email.attempts += 1
+                    email.status = 'sent'
+                    email.sent_at = timezone.now()
+                    email.last_error = ''
+                    sent += 1
+        finally:
+            connection.close()
+
+    with transaction.atomic():
+        OutboxEmail.objects.bulk_update(emails, ['status', 'attempts', 'next_attempt_at', 'last_error', 'sent_at'])
+    return sent, failed
@@ -0,0 +1,253 @@
+import http.client
+import json
+import random
+import time
+from contextlib import nullcontext
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, setup_test_environment
+
+from appointment.models import Appointment
+from core.benchmark import format_table, summarize
+from core.seed import PATIENT_PREFIX, SEED_PASSWORD
+from doctor.models import Doctor, Review, Specialization
+from patient.models import Patient
+
+COLUMNS = ["flow", "requests", "errors", "rps", "p50_ms", "p95_ms", "p99_ms", "max_ms", "queries_avg", "queries_max"]
+
+
+class Rollback(Exception):
+    pass
+
+
+class LiveResponse:
+    def __init__(self, status_code, content):
+        self.status_code = status_code
+        self.content = content
+
+    def json(self):
+        return json.loads(self.content)
+
+
+class LiveClient:
+    """
+    The test Client's get / post, sent over HTTP to a running server. Each request opens its own
+    connection: sync gunicorn workers close them anyway, and runserver's keep-alive responses stall
+    on delayed ACKs.
+    """
+
+    def __init__(self, base_url):
+        parts = urlsplit(base_url)
+        if parts.scheme not in ("http", "https") or not parts.hostname:
+            raise CommandError(f"--url must be an http(s) URL, not {base_url!r}.")
+        self.connection_class = http.client.HTTPSConnection if parts.scheme == "https" else http.client.HTTPConnection
+        self.host, self.port = parts.hostname, parts.port
+        self.prefix = parts.path.rstrip("/")
+
+    def request(self, method, path, body=None, content_type=None, **extra):
+        # HTTP_AUTHORIZATION=... as the test client takes it
+        headers = {key[5:].replace("_", "-").title(): value for key, value in extra.items() if key.startswith("HTTP_")}
+        if content_type:
+            headers["Content-Type"] = content_type
+        connection = self.connection_class(self.host, self.port, timeout=30)
+        try:
+            connection.request(method, self.prefix + path, body=body, headers=headers)
+            response = connection.getresponse()
+            return LiveResponse(response.status, response.read())
+        except (OSError, http.client.HTTPException) as exc:
+            raise CommandError(f"{method} {path} failed: {exc}")
+        finally:
+            connection.close()
+
+    def get(self, path, **extra):
+        return self.request("GET", path, **extra)
+
+    def post(self, path, data, content_type=None, **extra):
+        return self.request("POST", path, body=data, content_type=content_type, **extra)
+
+
+class Flows:
+    """One method per replayed endpoint, each returning (response, expected status)."""
+
+    names = ["doctor_list", "doctor_detail", "doctor_search", "reviews", "jwt_create", "jwt_refresh",
+             "appointments", "book"]
+
+    def __init__(self, client, rng, bypass_cache=False):
+        self.client = client
+        self.random = rng
+        self.bypass_cache = bypass_cache
+        # unique per run, so entries cached by an earlier run aren't hit either
+        self.run_id = f"{time.time_ns():x}"
+        self.sent = 0
+        self.doctor_ids = list(Doctor.objects.values_list("id", flat=True))
+        self.specializations = list(Specialization.objects.values_list("slug", flat=True))
+        patient = Patient.objects.select_related("user").filter(user__username__startswith=PATIENT_PREFIX).first()
+        if not self.doctor_ids or patient is None:
+            raise CommandError("No seeded data to replay against, run `seed_hospital` first.")
+        self.patient = patient
+        self.credentials = {"username": patient.user.username, "password": SEED_PASSWORD}
+        tokens = self.post("/auth/jwt/create/", self.credentials).json()
+        self.access, self.refresh = tokens["access"], tokens["refresh"]
+        self.pages = max(1, len(self.doctor_ids) // 20)
+
+    def get(self, path, **extra):
+        if self.bypass_cache:
+            # the response cache keys on the query string: a parameter no view reads makes every request a miss
+            self.sent += 1
+            path += f"{'&' if '?' in path else '?'}_bench={self.run_id}-{self.sent}"
+        return self.client.get(path, **extra)
+
+    def post(self, path, data, **extra):
+        return self.client.post(path, json.dumps(data), content_type="application/json", **extra)
+
+    def doctor_list(self):
+        return self.get(f"/doctor/list/?page={self.random.randint(1, self.pages)}"), 200
+
+    def doctor_detail(self):
+        return self.get(f"/doctor/list/{self.random.choice(self.doctor_ids)}/"), 200
+
+    def doctor_search(self):
+        return self.get(f"/doctor/search/?specialization={self.random.choice(self.specializations)}"), 200
+
+    def reviews(self):
+        return self.get(f"/doctor/reviews/?doctor_id={self.random.choice(self.doctor_ids)}&page_size=20"), 200
+
+    def jwt_create(self):
+        return self.post("/auth/jwt/create/", self.credentials), 200
+
+    def jwt_refresh(self):
+        # refresh tokens rotate, so every call spends the previous one
+        response = self.post("/auth/jwt/refresh/", {"refresh": self.refresh})
+        if response.status_code == 200:
+            self.refresh = response.json().get("refresh", self.refresh)
+        return response, 200
+
+    def appointments(self):
+        return self.get("/appointment/?page_size=20", HTTP_AUTHORIZATION=f"Bearer {self.access}"), 200
+
+    def book(self):
+        return self.post("/appointment/", {
+            "patient_id": self.patient.pk,
+            "doctor_id": self.random.choice(self.doctor_ids),
+            "appointment_type": "Online",
+            "symptom": "Benchmark booking",
+        }, HTTP_AUTHORIZATION=f"Bearer {self.access}"), 201
+
+
+class Command(BaseCommand):
+    help = (
+        "Replay the main API flows (doctor directory, reviews, JWT create / refresh, appointment "
+        "listing and booking) and report latency percentiles, throughput and queries per request. "
+        "By default the requests go through Django's test client in this process, with the writes "
+        "rolled back in one transaction unless --keep is given; --url sends them to a running server "
+        "instead (using the same database, which the ids are read from), where every request "
+        "commits and queries aren't counted. --no-cache makes every read miss the response cache."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--flow", action="append", dest="flows", choices=Flows.names, help="Flow to run (repeatable).")
+        parser.add_argument("--requests", type=int, default=200, help="Requests per flow.")
+        parser.add_argument("--warmup", type=int, default=5, help="Untimed requests per flow first.")
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--keep", action="store_true", help="Commit the bookings and tokens made by the run.")
+        parser.add_argument("--url", help="Base URL of a running server, e.g. http://127.0.0.1:8000 (needs --keep).")
+        parser.add_argument("--no-cache", action="store_true", help="Bypass the catalog response cache.")
+        parser.add_argument("--save-baseline", metavar="PATH", help="Write the results to this JSON file.")
+        parser.add_argument("--compare", metavar="PATH", help="Compare with a baseline saved by --save-baseline.")
+        parser.add_argument("--tolerance", type=float, default=20,
+                            help="Allowed p95 slowdown over the baseline, in percent, before failing.")
+
+    def handle(self, *args, **options):
+        if options["url"]:
+            if not options["keep"]:
+                raise CommandError("A running server commits the bookings and tokens of the run; pass --keep with --url.")
+            client = LiveClient(options["url"])
+        else:
+            setup_test_environment()
+            client = Client()
+        rows = []
+        try:
+            # with --keep every request commits on its own, as it would when served
+            with nullcontext() if options["keep"] else transaction.atomic():
+                flows = Flows(client, random.Random(options["seed"]), bypass_cache=options["no_cache"])
+                for name in options["flows"] or Flows.names:
+                    rows.append(self.run_flow(name, getattr(flows, name), options))
+                if not options["keep"]:
+                    raise Rollback
+        except Rollback:
+            pass
+
+        report = {"dataset": self.dataset(), "results": {row["flow"]: row for row in rows}}
+        self.stdout.write("Dataset: " + ", ".join(f"{count} {name}" for name, count in report["dataset"].items()))
+        columns = COLUMNS
+        if options["compare"]:
+            columns = COLUMNS + ["base_p95_ms", "p95_change"]
+            regressions = self.compare(rows, options["compare"], options["tolerance"])
+        self.stdout.write(format_table(rows, columns))
+
+        if options["save_baseline"]:
+            with open(options["save_baseline"], "w") as baseline:
+                json.dump(report, baseline, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Baseline saved to {options['save_baseline']}."))
+        if options["compare"]:
+            if regressions:
+                raise CommandError("Regressed against the baseline: " + "; ".join(regressions))
+            self.stdout.write(self.style.SUCCESS("No regressions against the baseline."))
+
+    def run_flow(self, name, flow, options):
+        for _ in range(options["warmup"]):
+            flow()
+        latencies, queries, errors = [], [], 0
+        started = time.perf_counter()
+        for _ in range(options["requests"]):
+            with CaptureQueriesContext(connection) as captured:
+                sent = time.perf_counter()
+                response, expected = flow()
+                latencies.append(time.perf_counter() - sent)
+            queries.append(len(captured))
+            errors += response.status_code != expected
+        elapsed = time.perf_counter() - started
+        if options["url"]:
+            # the server's queries run in another process
+            queries = None
+        return {
+            "flow": name,
+            "errors": errors,
+            **summarize(latencies, elapsed),
+            "queries_avg": round(sum(queries) / len(queries), 1) if queries else "-",
+            "queries_max": max(queries) if queries else "-",
+        }
+
+    def dataset(self):
+        return {
+            "doctors": Doctor.objects.count(),
+            "patients": Patient.objects.count(),
+            "appointments": Appointment.objects.count(),
+            "reviews": Review.objects.count(),
+        }
+
+    def compare(self, rows, path, tolerance):
+        try:
+            with open(path) as baseline:
+                baseline = json.load(baseline)["results"]
+        except (OSError, ValueError, KeyError) as exc:
+            raise CommandError(f"Can't read the baseline {path}: {exc}")
+
+        regressions = []
+        for row in rows:
+            base = baseline.get(row["flow"])
+            if base is None:
+                continue
+            row["base_p95_ms"] = base["p95_ms"]
+            change = (row["p95_ms"] - base["p95_ms"]) / base["p95_ms"] * 100 if base["p95_ms"] else 0
+            row["p95_change"] = f"{change:+.0f}%"
+            if change > tolerance:
+                regressions.append(f"{row['flow']} p95 {base['p95_ms']} -> {row['p95_ms']} ms")
+            # cached responses make the average wobble; an N+1 adds at least one query per request
+            counted = "-" not in (row["queries_avg"], base["queries_avg"])
+            if counted and row["queries_avg"] - base["queries_avg"] >= 1:
+                regressions.append(f"{row['flow']} queries {base['queries_avg']} -> {row['queries_avg']}")
+        return regressions
@@ -0,0 +1,144 @@
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.core.asgi import get_asgi_application
+from django.core.wsgi import get_wsgi_application
+from django.test import RequestFactory
+from django.test.utils import setup_test_environment
+
+from core.benchmark import db_latency, format_table, summarize
+
+DEFAULT_PATHS = ['/doctor/list/', '/doctor/reviews/?page_size=20', '/service/', '/doctor/specializations/']
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the sync (thread per request) and async (ASGI, core.async_views) read paths at "
+        "increasing concurrency. Each stack runs in its own process, against the configured database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--path", action="append", dest="paths", help="URL to request (repeatable).")
+        parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 10, 50])
+        parser.add_argument("--requests", type=int, default=200, help="Requests per path and concurrency level.")
+        parser.add_argument("--db-latency", type=float, default=0, help="Milliseconds added to every query.")
+        parser.add_argument("--threads", type=int, default=8, help="Worker threads of the sync stack.")
+        parser.add_argument("--stack", choices=["sync", "async"], help="Run one stack in this process and print JSON.")
+
+    def handle(self, *args, **options):
+        options["paths"] = options["paths"] or DEFAULT_PATHS
+        if options["stack"]:
+            self.stdout.write(json.dumps(self.run_stack(options)))
+            return
+
+        rows = []
+        for stack in ("sync", "async"):
+            rows.extend(self.spawn(stack, options))
+        self.stdout.write(format_table(rows, ["stack", "path", "concurrency", "requests", "errors", "rps", "p50_ms", "p95_ms", "p99_ms", "max_ms"]))
+
+    def spawn(self, stack, options):
+        # URL patterns are fixed at import time, so each stack gets a fresh process
+        command = [sys.executable, sys.argv[0], "bench_concurrency", "--stack", stack,
+                   "--requests", str(options["requests"]), "--db-latency", str(options["db_latency"]),
+                   "--threads", str(options["threads"]), "--concurrency", *map(str, options["concurrency"])]
+        for path in options["paths"]:
+            command += ["--path", path]
+        env = {**os.environ, "ASYNC_READ_PATH": "true" if stack == "async" else "false"}
+        result = subprocess.run(command, env=env, capture_output=True, text=True)
+        if result.returncode:
+            raise CommandError(f"{stack} run failed:\n{result.stderr}")
+        return json.loads(result.stdout.strip().splitlines()[-1])
+
+    def run_stack(self, options):
+        setup_test_environment()
+        stack = "async" if settings.ASYNC_READ_PATH else "sync"
+        rows = []
+        with db_latency(options["db_latency"] / 1000):
+            for path in options["paths"]:
+                for concurrency in options["concurrency"]:
+                    if stack == "async":
+                        latencies, errors, elapsed = asyncio.run(self.run_async(path, concurrency, options["requests"]))
+                    else:
+                        latencies, errors, elapsed = self.run_sync(path, concurrency, options["requests"], options["threads"])
+                    rows.append({"stack": stack, "path": path, "concurrency": concurrency, "errors": errors,
+                                 **summarize(latencies, elapsed)})
+        return rows
+
+    def run_sync(self, path, concurrency, total, threads):
+        # Django's WSGI handler on a pool of `threads` workers, like a threaded WSGI server;
+        # `concurrency` clients keep a request in flight each, so time spent waiting for a free
+        # worker counts towards the latency
+        application = get_wsgi_application()
+        environ = RequestFactory().get(path).environ
+
+        def one():
+            statuses = []
+            body = application(dict(environ), lambda status, headers, exc_info=None: statuses.append(status))
+            b"".join(body)
+            body.close()
+            return int(statuses[0].split()[0])
+
+        clients = threading.BoundedSemaphore(concurrency)
+        results = []
+
+        def done(future, sent):
+            results.append((time.perf_counter() - sent, future.result()))
+            clients.release()
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            for _ in range(total):
+                clients.acquire()
+                sent = time.perf_counter()
+                pool.submit(one).add_done_callback(lambda future, sent=sent: done(future, sent))
+        elapsed = time.perf_counter() - started
+        return [latency for latency, _ in results], sum(status != 200 for _, status in results), elapsed
+
+    async def run_async(self, path, concurrency, total):
+        # Django's ASGI handler called directly, as an ASGI server would (AsyncClient skips the
+        # per-request thread context the real handler runs the async ORM in)
+        application = get_asgi_application()
+        url = urlsplit(path)
+        scope = {
+            "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET", "scheme": "http",
+            "path": url.path, "raw_path": url.path.encode(), "query_string": url.query.encode(),
+            "headers": [(b"host", b"testserver")], "server": ("testserver", 80), "client": ("127.0.0.1", 0),
+        }
+        gate = asyncio.Semaphore(concurrency)
+
+        async def one():
+            async with gate:
+                disconnected = asyncio.Event()
+                statuses = []
+                requested = False
+
+                async def receive():
+                    nonlocal requested
+                    if not requested:
+                        requested = True
+                        return {"type": "http.request", "body": b"", "more_body": False}
+                    await disconnected.wait()
+                    return {"type": "http.disconnect"}
+
+                async def send(message):
+                    if message["type"] == "http.response.start":
+                        statuses.append(message["status"])
+
+                started = time.perf_counter()
+                await application(dict(scope), receive, send)
+                disconnected.set()
+                return time.perf_counter() - started, statuses[0]
+
+        started = time.perf_counter()
+        results = await asyncio.gather(*(one() for _ in range(total)))
+        elapsed = time.perf_counter() - started
+        return [latency for latency, _ in results], sum(status != 200 for _, status in results), elapsed
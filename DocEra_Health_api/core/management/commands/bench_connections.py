@@ -0,0 +1,124 @@
+import copy
+import time
+
+from django.contrib.sessions.backends.db import SessionStore
+from django.core.management.base import BaseCommand
+from django.core.signals import request_finished, request_started
+from django.db import connection
+from django.db.backends.signals import connection_created
+
+from core.benchmark import format_table, summarize
+from doctor.models import Doctor
+
+COLUMNS = ["profile", "conn_max_age", "options", "connect_ms", "connects", "requests", "rps",
+           "p50_ms", "p95_ms", "p99_ms", "max_ms"]
+# OPTIONS added by the connection settings (DATABASE_POOL, SQLITE_TUNING), left out of the defaults
+TUNING_OPTIONS = ("pool", "init_command", "transaction_mode", "timeout")
+# journal_mode=WAL is stored in the database file, so the defaults have to switch it back
+DEFAULT_OPTIONS = {"sqlite": {"init_command": "PRAGMA journal_mode=DELETE"}}
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure what database connections cost per request: Django's defaults (a new, untuned "
+        "connection for every request) against the configured DATABASES (persistent connections "
+        "or the psycopg pool, SQLite PRAGMAs). A request is the request_started / request_finished "
+        "signals around a page of the doctor directory and a session write, against the configured "
+        "database; the session row is deleted afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=500, help="Requests per profile.")
+        parser.add_argument("--warmup", type=int, default=10, help="Untimed requests per profile first.")
+        parser.add_argument("--reads", type=int, default=3, help="Doctor directory pages read per request.")
+        parser.add_argument("--no-write", action="store_true", help="Leave out the session write.")
+        parser.add_argument("--connects", type=int, default=100,
+                            help="Connections opened per profile to time connection setup alone.")
+
+    def handle(self, *args, **options):
+        configured = copy.deepcopy(connection.settings_dict)
+        connects = []
+
+        def counter(sender, connection, **kwargs):
+            connects.append(connection.alias)
+
+        connection_created.connect(counter, weak=False)
+        session = SessionStore()
+        session.create()
+        rows = []
+        try:
+            for name, settings_dict in self.profiles(configured):
+                connection.close()
+                connection.settings_dict.clear()
+                connection.settings_dict.update(copy.deepcopy(settings_dict))
+                connects.clear()
+                rows.append({
+                    "profile": name,
+                    "conn_max_age": settings_dict["CONN_MAX_AGE"],
+                    "options": ", ".join(sorted(settings_dict["OPTIONS"])) or "-",
+                    **self.run_profile(session, options, connects),
+                })
+        finally:
+            connection_created.disconnect(counter)
+            connection.close()
+            connection.settings_dict.clear()
+            connection.settings_dict.update(configured)
+            session.delete()
+        self.stdout.write(f"Database: {connection.vendor} {connection.settings_dict['NAME']}")
+        self.stdout.write(format_table(rows, COLUMNS))
+        self.stdout.write(self.style.SUCCESS("Done."))
+
+    def profiles(self, configured):
+        options = {name: value for name, value in configured["OPTIONS"].items() if name not in TUNING_OPTIONS}
+        defaults = {
+            **configured,
+            "CONN_MAX_AGE": 0,
+            "CONN_HEALTH_CHECKS": False,
+            "OPTIONS": {**options, **DEFAULT_OPTIONS.get(connection.vendor, {})},
+        }
+        profiles = [("defaults", defaults)]
+        if configured["CONN_MAX_AGE"] != 0:
+            # the tuning alone, still opening a connection per request
+            profiles.append(("tuned, per request", {**configured, "CONN_MAX_AGE": 0}))
+        profiles.append(("configured", configured))
+        return profiles
+
+    def run_profile(self, session, options, connects):
+        # connection setup alone; with a pool, what a checkout costs
+        setup = []
+        for _ in range(options["connects"]):
+            connection.close()
+            started = time.perf_counter()
+            connection.ensure_connection()
+            setup.append(time.perf_counter() - started)
+        connection.close()
+
+        for number in range(options["warmup"]):
+            self.request(session, number, options)
+        connects.clear()
+        latencies = []
+        started = time.perf_counter()
+        for number in range(options["requests"]):
+            sent = time.perf_counter()
+            self.request(session, number, options)
+            latencies.append(time.perf_counter() - sent)
+        elapsed = time.perf_counter() - started
+        return {
+            "connect_ms": round(sum(setup) / len(setup) * 1000, 3) if setup else "-",
+            "connects": len(connects),
+            **summarize(latencies, elapsed),
+        }
+
+    def request(self, session, number, options):
+        # what the handler does around a view: close_old_connections runs on both signals and
+        # closes the connection at the end of the request unless it may persist
+        request_started.send(sender=self.__class__)
+        try:
+            for page in range(options["reads"]):
+                start = (number + page) % 10 * 20
+                list(Doctor.objects.select_related("user").order_by("pk")[start:start + 20])
+            if not options["no_write"]:
+                session["bench_connections"] = number
+                session.save()
+        finally:
+            request_finished.send(sender=self.__class__)
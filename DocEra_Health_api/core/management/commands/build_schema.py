@@ -0,0 +1,47 @@
+import difflib
+
+from django.core.management.base import BaseCommand, CommandError
+from drf_spectacular.drainage import GENERATOR_STATS
+
+from core import schema
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate the OpenAPI schema into the committed artifacts served by /api/schema/ "
+        "(see core.schema). With --check, fail instead when they differ from the code."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--check", action="store_true", help="Only compare the artifacts with a fresh build.")
+        parser.add_argument("--fail-on-warn", action="store_true", help="Fail on drf-spectacular warnings and errors.")
+
+    def handle(self, *args, **options):
+        rendered, clean = schema.generate()
+        GENERATOR_STATS.emit_summary()
+        if options["fail_on_warn"] and not clean:
+            raise CommandError("Schema generation reported warnings or errors (see above).")
+
+        if options["check"]:
+            stale = []
+            for fmt, content in rendered.items():
+                path = schema.artifact_path(fmt)
+                current = path.read_bytes() if path.exists() else b""
+                if current != content:
+                    stale.append(path.name)
+                    if fmt == "yaml":
+                        diff = difflib.unified_diff(
+                            current.decode().splitlines(), content.decode().splitlines(),
+                            f"{path.name} (committed)", f"{path.name} (code)", lineterm="",
+                        )
+                        self.stdout.write("\n".join(list(diff)[:200]))
+            if stale:
+                raise CommandError(f"{', '.join(stale)} out of date; run `manage.py build_schema` and commit the result.")
+            self.stdout.write(self.style.SUCCESS("The schema artifacts match the code."))
+            return
+
+        for fmt, content in rendered.items():
+            schema.artifact_path(fmt).write_bytes(content)
+        self.stdout.write(self.style.SUCCESS(
+            f"Wrote {', '.join(schema.artifact_path(fmt).name for fmt in rendered)}."
+        ))
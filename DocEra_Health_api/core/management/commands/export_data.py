@@ -0,0 +1,60 @@
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.exports import CHUNK_SIZE, EXPORTS, FORMATS, KINDS, filename, stream
+
+
+class Command(BaseCommand):
+    help = "Stream appointments, patients or contact requests to a CSV or NDJSON file, optionally gzipped."
+
+    def add_arguments(self, parser):
+        parser.add_argument("kind", choices=KINDS)
+        parser.add_argument("--output", help="File to write, or - for stdout. Defaults to <kind>-<today>.<format>[.gz].")
+        parser.add_argument("--format", choices=FORMATS, default="csv")
+        parser.add_argument("--gzip", action="store_true")
+        parser.add_argument("--since", help="First day (YYYY-MM-DD) of bookings, sign-ups or submissions.")
+        parser.add_argument("--until", help="Last day, inclusive.")
+        parser.add_argument("--status", help="Appointments only, e.g. Pending,Running.")
+        parser.add_argument("--cancel", choices=("true", "false"), help="Appointments only.")
+        parser.add_argument("--active", choices=("true", "false"), help="Patients only.")
+        parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        kind, fmt = options["kind"], options["format"]
+        export = EXPORTS[kind]
+        filters = {name: options[name] for name in ("since", "until", "status", "cancel", "active") if options[name]}
+        try:
+            rows = export.rows(chunk_size=options["chunk_size"], **filters)
+        except ValueError as exc:
+            raise CommandError(exc)
+
+        exported = 0
+
+        def counted(rows):
+            nonlocal exported
+            for row in rows:
+                exported += 1
+                yield row
+
+        path = options["output"] or filename(kind, fmt, options["gzip"])
+        chunks = stream(export, counted(rows), fmt, options["gzip"], options["chunk_size"])
+        started = time.monotonic()
+        if path == "-":
+            for chunk in chunks:
+                sys.stdout.buffer.write(chunk)
+            sys.stdout.buffer.flush()
+        else:
+            try:
+                with open(path, "wb") as output:
+                    for chunk in chunks:
+                        output.write(chunk)
+            except OSError as exc:
+                raise CommandError(exc)
+
+        # on stderr when the export itself goes to stdout
+        (self.stderr if path == "-" else self.stdout).write(
+            f"Exported {exported} {kind} to {'stdout' if path == '-' else path} in {time.monotonic() - started:.1f}s.",
+            style_func=self.style.SUCCESS,
+        )
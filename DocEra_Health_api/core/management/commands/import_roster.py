@@ -0,0 +1,45 @@
+import json
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.importer import FORMATS, KINDS, MAX_CHUNK_SIZE, RosterImporter, format_for, read_rows
+
+
+class Command(BaseCommand):
+    help = "Import patients or doctors from a CSV or NDJSON file in bulk-inserted chunks."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="File to import, or - for stdin.")
+        parser.add_argument("--kind", choices=KINDS, required=True)
+        parser.add_argument("--format", choices=FORMATS, help="Defaults to the file extension, then csv.")
+        parser.add_argument("--chunk-size", type=int, default=1000)
+        parser.add_argument("--errors-file", help="Write the per-row errors to this file as JSON.")
+
+    def handle(self, *args, **options):
+        if not 1 <= options["chunk_size"] <= MAX_CHUNK_SIZE:
+            raise CommandError(f"--chunk-size must be between 1 and {MAX_CHUNK_SIZE}.")
+        fmt = options["format"] or format_for(options["path"])
+        importer = RosterImporter(options["kind"], chunk_size=options["chunk_size"])
+
+        def progress(importer):
+            self.stdout.write(f"{importer.processed} rows, {importer.created} created, {importer.error_count} failed")
+
+        try:
+            stream = sys.stdin if options["path"] == "-" else open(options["path"], newline="", encoding="utf-8")
+        except OSError as exc:
+            raise CommandError(exc)
+        with stream:
+            report = importer.run(read_rows(stream, fmt), progress=progress)
+
+        if options["errors_file"]:
+            with open(options["errors_file"], "w") as errors_file:
+                json.dump(report["errors"], errors_file, indent=2)
+        else:
+            for error in report["errors"][:20]:
+                self.stderr.write(f"row {error['row']}: {error['errors']}")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {report['created']} of {report['processed']} {report['kind']} "
+            f"in {report['seconds']}s ({report['rows_per_second']} rows/s), {report['failed']} failed."
+        ))
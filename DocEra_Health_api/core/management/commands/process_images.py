@@ -0,0 +1,30 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.images import process_pending
+
+
+class Command(BaseCommand):
+    help = "Generate thumbnail and WebP variants for uploaded doctor, patient and service images."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=settings.IMAGE_BATCH_SIZE)
+        parser.add_argument("--loop", action="store_true", help="Keep polling for new uploads instead of exiting once the queue is empty.")
+        parser.add_argument("--interval", type=float, default=5, help="Seconds to sleep between polls with --loop.")
+
+    def handle(self, *args, **options):
+        total_processed = total_failed = 0
+        while True:
+            processed, failed = process_pending(options["batch_size"])
+            total_processed += processed
+            total_failed += failed
+            if processed or failed:
+                self.stdout.write(f"Batch: {processed} processed, {failed} unreadable.")
+                continue
+            if not options["loop"]:
+                break
+            time.sleep(options["interval"])
+
+        self.stdout.write(self.style.SUCCESS(f"Images done: {total_processed} processed, {total_failed} unreadable."))
@@ -0,0 +1,50 @@
+import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Max, Min
+from django.utils import timezone
+
+from appointment import rollups
+from appointment.models import Appointment
+
+
+class Command(BaseCommand):
+    help = (
+        "Backfill or reconcile the appointment daily rollups from the appointment table, a chunk of "
+        "days at a time. Bookings made while a chunk is rewritten may need another run."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--start", type=datetime.date.fromisoformat, help="First day (YYYY-MM-DD); defaults to the oldest booking.")
+        parser.add_argument("--end", type=datetime.date.fromisoformat, help="Last day; defaults to today.")
+        parser.add_argument("--chunk-days", type=int, default=31)
+        parser.add_argument("--check", action="store_true", help="Only report drift, and fail if there is any.")
+
+    def handle(self, *args, **options):
+        start, end = options["start"], options["end"] or timezone.localdate()
+        if start is None:
+            bounds = Appointment.objects.aggregate(first=Min("created"), last=Max("created"))
+            if bounds["first"] is None:
+                self.stdout.write("No appointments to roll up.")
+                return
+            start = timezone.localdate(bounds["first"])
+            end = max(end, timezone.localdate(bounds["last"]))
+        if start > end:
+            raise CommandError("--start is after --end.")
+
+        wrong = 0
+        step = datetime.timedelta(days=options["chunk_days"])
+        chunk_start = start
+        while chunk_start <= end:
+            chunk_end = min(chunk_start + step - datetime.timedelta(days=1), end)
+            drift = rollups.reconcile(chunk_start, chunk_end, fix=not options["check"])
+            if drift:
+                self.stdout.write(f"{chunk_start}..{chunk_end}: {drift} rows {'off' if options['check'] else 'rewritten'}")
+            wrong += drift
+            chunk_start = chunk_end + datetime.timedelta(days=1)
+
+        if options["check"] and wrong:
+            raise CommandError(f"{wrong} rollup rows disagree with the appointments between {start} and {end}.")
+        self.stdout.write(self.style.SUCCESS(
+            f"Rollups of {start}..{end} {'checked' if options['check'] else 'reconciled'}: {wrong} rows were off."
+        ))
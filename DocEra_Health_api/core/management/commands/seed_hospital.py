@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core.seed import PRESETS, SEED_PASSWORD, HospitalSeeder
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate a synthetic hospital (doctors with designations, specializations and times, patients, "
+        "appointments and reviews) in bulk-inserted batches, for load tests with `bench_api`."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--preset", choices=PRESETS, help="Sizes for ~10k, 100k or 1M appointments; explicit counts override it.")
+        parser.add_argument("--doctors", type=int)
+        parser.add_argument("--patients", type=int)
+        parser.add_argument("--appointments", type=int)
+        parser.add_argument("--reviews", type=int)
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument("--seed", type=int, help="Random seed, for a reproducible dataset (on an empty database).")
+
+    def handle(self, *args, **options):
+        defaults = PRESETS[options["preset"] or "10k"]
+        counts = [
+            default if options[name] is None else options[name]
+            for name, default in zip(("doctors", "patients", "appointments", "reviews"), defaults)
+        ]
+        if min(counts) < 0:
+            raise CommandError("Counts can't be negative.")
+
+        seeder = HospitalSeeder(*counts, batch_size=options["batch_size"], seed=options["seed"],
+                                progress=self.stdout.write)
+        seconds = seeder.run()
+        doctors, patients, appointments, reviews = counts
+        self.stdout.write(self.style.SUCCESS(
+            f"Seeded {doctors} doctors, {patients} patients, {appointments} appointments and {reviews} reviews "
+            f"in {seconds:.1f}s. Accounts are {seeder.run_id}-tagged with the password {SEED_PASSWORD!r}."
+        ))
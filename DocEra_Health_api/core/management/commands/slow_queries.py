@@ -0,0 +1,53 @@
+from django.core.management.base import BaseCommand
+from django.db.models import ExpressionWrapper, F, FloatField
+
+from core.benchmark import format_table
+from core.models import SlowQuery
+
+ORDERINGS = {
+    "total": "-total_ms",
+    "mean": "-mean",
+    "max": "-max_ms",
+    "count": "-count",
+    "recent": "-last_seen",
+}
+
+
+class Command(BaseCommand):
+    help = "Report the top offenders of the slow-query log (core.slow_queries), with their plans."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--limit", type=int, default=10)
+        parser.add_argument("--order", choices=ORDERINGS, default="total")
+        parser.add_argument("--view", help="Only queries from views whose label contains this, e.g. AppointmentViewset.")
+        parser.add_argument("--no-plan", action="store_true", help="Leave out the captured plans.")
+        parser.add_argument("--reset", action="store_true", help="Empty the log (after reporting).")
+
+    def handle(self, *args, **options):
+        queries = SlowQuery.objects.annotate(
+            mean=ExpressionWrapper(F("total_ms") / F("count"), output_field=FloatField()),
+        ).order_by(ORDERINGS[options["order"]])
+        if options["view"]:
+            queries = queries.filter(view__icontains=options["view"])
+        queries = list(queries[:options["limit"]])
+
+        if not queries:
+            self.stdout.write("No slow queries logged.")
+        else:
+            rows = [
+                {
+                    "#": number, "view": query.view or "-", "count": query.count,
+                    "total_ms": round(query.total_ms, 1), "mean_ms": round(query.mean, 1),
+                    "max_ms": round(query.max_ms, 1), "last_seen": f"{query.last_seen:%Y-%m-%d %H:%M}",
+                }
+                for number, query in enumerate(queries, 1)
+            ]
+            self.stdout.write(format_table(rows, ["#", "view", "count", "total_ms", "mean_ms", "max_ms", "last_seen"]))
+            for number, query in enumerate(queries, 1):
+                self.stdout.write(f"\n#{number} {query.statement}")
+                if query.plan and not options["no_plan"]:
+                    self.stdout.write(self.style.NOTICE("\n".join("    " + line for line in query.plan.splitlines())))
+
+        if options["reset"]:
+            deleted, _ = SlowQuery.objects.all().delete()
+            self.stdout.write(self.style.SUCCESS(f"Slow-query log emptied ({deleted} entries)."))
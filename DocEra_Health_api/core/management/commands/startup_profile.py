@@ -0,0 +1,51 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core import startup
+from core.benchmark import format_table
+
+
+class Command(BaseCommand):
+    help = (
+        "Profile a cold start of the WSGI application (see core.startup): wall time over fresh "
+        "interpreters, and -X importtime per app / package and per module."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--path", default="/doctor/list/", help="URL resolved after startup.")
+        mode = parser.add_mutually_exclusive_group()
+        mode.add_argument("--slim", action="store_const", const=True, dest="slim", help="Force DJANGO_SLIM_RUNTIME on.")
+        mode.add_argument("--full", action="store_const", const=False, dest="slim", help="Force DJANGO_SLIM_RUNTIME off.")
+        parser.add_argument("--repeat", type=int, default=5, help="Interpreters timed for the median.")
+        parser.add_argument("--limit", type=int, default=20, help="Rows per table.")
+        parser.add_argument("--budget-ms", type=float, help=f"Fail above this median (STARTUP_BUDGET_MS is {settings.STARTUP_BUDGET_MS}).")
+
+    def handle(self, *args, **options):
+        try:
+            seconds, loaded = startup.measure(options["repeat"], path=options["path"], slim=options["slim"])
+            report, modules, groups = startup.profile(options["path"], options["slim"])
+        except RuntimeError as exc:
+            raise CommandError(exc)
+
+        limit = options["limit"]
+        total_us = sum(groups.values())
+        if limit:
+            rows = [
+                {"app / package": group, "self_ms": round(us / 1000, 1), "share": f"{us / total_us:.0%}"}
+                for group, us in sorted(groups.items(), key=lambda item: -item[1])[:limit]
+            ]
+            self.stdout.write(format_table(rows, ["app / package", "self_ms", "share"]) + "\n")
+            rows = [
+                {"module": name, "cumulative_ms": round(cumulative / 1000, 1), "self_ms": round(own / 1000, 1)}
+                for name, own, cumulative in sorted(modules, key=lambda module: -module[2])[:limit]
+            ]
+            self.stdout.write(format_table(rows, ["module", "cumulative_ms", "self_ms"]) + "\n")
+
+        self.stdout.write(f"{len(modules)} modules, {total_us / 1000:.0f} ms of imports under -X importtime.")
+        if loaded:
+            self.stdout.write(self.style.WARNING(f"Loaded at startup, though the slim runtime defers them: {', '.join(loaded)}"))
+        budget = options["budget_ms"]
+        summary = f"Cold start to {options['path']}: {seconds * 1000:.0f} ms (median of {options['repeat']})"
+        if budget is not None and seconds * 1000 > budget:
+            raise CommandError(f"{summary}, over the {budget:.0f} ms budget.")
+        self.stdout.write(self.style.SUCCESS(summary + (f", within the {budget:.0f} ms budget." if budget is not None else ".")))
@@ -0,0 +1,145 @@
+"""
+Serving of user uploads (MEDIA_ROOT) outside DEBUG.
+
+Full files go out as a FileResponse, which WSGI servers hand to sendfile() through wsgi.file_wrapper
+(under ASGI, both full files and ranges are read a chunk at a time, see core.streaming).
+Responses carry ETag / Last-Modified and answer conditional requests with 304; single byte ranges
+are answered with 206. Content-hashed names (the variants from core.images) are cached as immutable.
+
+With MEDIA_ACCEL_REDIRECT set to an internal nginx location, the worker only checks the path and
+the conditional headers and lets nginx send the bytes (X-Accel-Redirect).
+"""
+import mimetypes
+import os
+import posixpath
+import re
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseNotAllowed, StreamingHttpResponse
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_http_date_safe, quote_etag
+
+from . import streaming
+from .images import is_hashed_name
+
+CHUNK_SIZE = 64 * 1024
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+IMMUTABLE = 'public, max-age=31536000, immutable'
+
+
+def file_etag(stat):
+    return quote_etag(f"{stat.st_mtime_ns:x}-{stat.st_size:x}")
+
+
+def byte_range(header, size):
+    """
+    (start, end) inclusive for a single "bytes=" range, None to ignore the header (absent,
+    malformed or multi-range: the whole file is sent), or False if it can't be satisfied.
+    """
+    match = RANGE_RE.match(header.strip()) if header else None
+    if not match or match.groups() == ('', ''):
+        return None
+    first, last = match.groups()
+    if first == '':
+        # suffix range: the last N bytes
+        length = int(last)
+        # an empty file has no last bytes to send ("bytes 0--1/0")
+        if length == 0 or size == 0:
+            return False
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        return False
+    return start, end
+
+
+def if_range_matches(request, etag, last_modified):
+    value = request.headers.get('If-Range')
+    if value is None:
+        return True
+    if value.startswith(('"', 'W/')):
+        return value == etag
+    # a date only validates if it is exactly the file's modification time
+    return parse_http_date_safe(value) == int(last_modified)
+
+
+def read_range(path, start, end):
+    with open(path, 'rb') as handle:
+        handle.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            chunk = handle.read(min(CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+def set_headers(response, name, stat, etag, content_type=None):
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(stat.st_mtime)
+    response['Accept-Ranges'] = 'bytes'
+    response['Cache-Control'] = IMMUTABLE if is_hashed_name(name) else f'public, max-age={settings.MEDIA_CACHE_MAX_AGE}'
+    if content_type:
+        response['Content-Type'] = content_type
+    return response
+
+
+def serve(request, path):
+    if request.method not in ('GET', 'HEAD'):
+        return HttpResponseNotAllowed(['GET', 'HEAD'])
+
+    name = posixpath.normpath(path).lstrip('/')
+    try:
+        full_path = safe_join(settings.MEDIA_ROOT, name)
+    except SuspiciousFileOperation:
+        raise Http404("Media file not found.")
+    try:
+        stat = os.stat(full_path)
+    except (FileNotFoundError, NotADirectoryError):
+        raise Http404("Media file not found.")
+    if not os.path.isfile(full_path):
+        raise Http404("Media file not found.")
+
+    etag = file_etag(stat)
+    content_type, encoding = mimetypes.guess_type(full_path)
+    # stored compressed files (e.g. .gz) are sent as they are, not as a Content-Encoding
+    content_type = content_type if content_type and not encoding else 'application/octet-stream'
+
+    # 304 / 412 for If-None-Match, If-Modified-Since, If-Match, If-Unmodified-Since
+    conditional = get_conditional_response(request, etag=etag, last_modified=int(stat.st_mtime))
+    if conditional is not None:
+        return set_headers(conditional, name, stat, etag)
+
+    if settings.MEDIA_ACCEL_REDIRECT:
+        response = HttpResponse(content_type=content_type)
+        response['X-Accel-Redirect'] = settings.MEDIA_ACCEL_REDIRECT.rstrip('/') + '/' + name
+        return set_headers(response, name, stat, etag)
+
+    size = stat.st_size
+    requested = byte_range(request.headers.get('Range'), size)
+    if requested is not None and not if_range_matches(request, etag, stat.st_mtime):
+        requested = None
+
+    if requested is False:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{size}'
+        return set_headers(response, name, stat, etag)
+
+    if request.method == 'HEAD':
+        response = HttpResponse()
+        response['Content-Length'] = size
+        return set_headers(response, name, stat, etag, content_type)
+
+    if requested is None:
+        response = FileResponse(open(full_path, 'rb'))
+        return streaming.for_request(request, set_headers(response, name, stat, etag, content_type))
+
+    start, end = requested
+    response = StreamingHttpResponse(read_range(full_path, start, end), status=206)
+    response['Content-Range'] = f'bytes {start}-{end}/{size}'
+    response['Content-Length'] = end - start + 1
+    return streaming.for_request(request, set_headers(response, name, stat, etag, content_type))
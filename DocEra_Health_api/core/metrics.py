@@ -0,0 +1,222 @@
+"""
+Per-request performance instrumentation.
+
+core.middleware.PerformanceMiddleware opens a RequestTimer for a sampled share of requests
+(PERF_SAMPLE_RATE). While it is current, every query on any connection (see
+install_query_timer) adds to its query count and DB time, and the `.data` of serializers handed
+out by views with core.mixins.SerializerTimingMixin to its serialization time. At the end of the
+request the figures go into the in-process histograms below, labelled with the view action (e.g.
+DoctorViewset.list), which /core/metrics/ exposes in the Prometheus text format, and for staff
+(or everyone, with PERF_SERVER_TIMING) into the `Server-Timing` header.
+
+The histograms live in each worker process: with several workers, every scrape sees one of them.
+"""
+import bisect
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 250)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+current = contextvars.ContextVar('request_timer', default=None)
+# the request being handled, sampled or not (see core.slow_queries)
+current_request = contextvars.ContextVar('current_request', default=None)
+
+
+class RequestTimer:
+    __slots__ = ('request', 'started', 'queries', 'db_seconds', 'serialize_seconds', 'serialize_queries', 'serializing')
+
+    def __init__(self, request):
+        self.request = request
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.serialize_seconds = 0.0
+        # queries issued while serializing: lazy related lookups, i.e. N+1s
+        self.serialize_queries = 0
+        self.serializing = False
+
+    @property
+    def view(self):
+        return request_view(self.request)
+
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+    def server_timing(self, total):
+        return ', '.join([
+            f'db;dur={self.db_seconds * 1000:.1f};desc="{self.queries} queries"',
+            f'serialize;dur={self.serialize_seconds * 1000:.1f};desc="{self.serialize_queries} queries"',
+            f'total;dur={total * 1000:.1f}',
+        ])
+
+
+class Histogram:
+    """Prometheus-style cumulative histogram, one series per label set."""
+
+    def __init__(self, name, documentation, buckets, labels):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = buckets
+        self.labels = labels
+        self.series = {}
+        self.lock = threading.Lock()
+
+    def observe(self, value, *label_values):
+        index = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            series = self.series.get(label_values)
+            if series is None:
+                # per-bucket counts (not cumulative) + the +Inf bucket, sum
+                series = self.series[label_values] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def expose(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self.lock:
+            series = [(labels, list(counts), total) for labels, (counts, total) in self.series.items()]
+        for label_values, counts, total in sorted(series):
+            labels = ','.join(f'{name}="{escape(value)}"' for name, value in zip(self.labels, label_values))
+            prefix = labels + ',' if labels else ''
+            cumulative = 0
+            for bound, count in zip(self.buckets + ('+Inf',), counts):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{{{prefix}le="{bound}"}} {cumulative}')
+            lines.append(f'{self.name}_sum{{{labels}}} {total}')
+            lines.append(f'{self.name}_count{{{labels}}} {cumulative}')
+        return lines
+
+    def reset(self):
+        with self.lock:
+            self.series.clear()
+
+
+def escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+REQUEST_SECONDS = Histogram(
+    'docera_request_duration_seconds', 'Time spent in Django per request.',
+    DURATION_BUCKETS, ('view', 'method', 'status'),
+)
+DB_SECONDS = Histogram('docera_request_db_seconds', 'Time spent in database queries per request.', DURATION_BUCKETS, ('view',))
+QUERIES = Histogram('docera_request_queries', 'Database queries per request.', QUERY_BUCKETS, ('view',))
+SERIALIZE_SECONDS = Histogram(
+    'docera_request_serialize_seconds', 'Time spent in serializer .data per request.', DURATION_BUCKETS, ('view',),
+)
+SERIALIZE_QUERIES = Histogram(
+    'docera_request_serialize_queries', 'Database queries issued while serializing, per request.', QUERY_BUCKETS, ('view',),
+)
+RESPONSE_BYTES = Histogram('docera_response_size_bytes', 'Response body size.', SIZE_BUCKETS, ('view',))
+HISTOGRAMS = (REQUEST_SECONDS, DB_SECONDS, QUERIES, SERIALIZE_SECONDS, SERIALIZE_QUERIES, RESPONSE_BYTES)
+
+
+def request_view(request):
+    match = request.resolver_match
+    return view_label(match.func, request.method) if match else 'unresolved'
+
+
+def view_label(view_func, method):
+    """The viewset action (DoctorViewset.list) for DRF views, else the view's dotted name."""
+    cls = getattr(view_func, 'cls', None)
+    if cls is None:
+        return f"{view_func.__module__}.{view_func.__name__}"
+    actions = getattr(view_func, 'actions', None)
+    if not actions:
+        return cls.__name__
+    # viewsets answer HEAD with their GET action
+    action = actions.get(method.lower()) or actions.get('get')
+    return f"{cls.__name__}.{action}" if action else cls.__name__
+
+
+def record(timer, status, size):
+    total = timer.elapsed()
+    view = timer.view
+    REQUEST_SECONDS.observe(total, view, timer.request.method, str(status))
+    DB_SECONDS.observe(timer.db_seconds, view)
+    QUERIES.observe(timer.queries, view)
+    SERIALIZE_SECONDS.observe(timer.serialize_seconds, view)
+    SERIALIZE_QUERIES.observe(timer.serialize_queries, view)
+    if size is not None:
+        RESPONSE_BYTES.observe(size, view)
+    return total
+
+
+def exposition():
+    lines = []
+    for histogram in HISTOGRAMS:
+        lines.extend(histogram.expose())
+    return '\n'.join(lines) + '\n'
+
+
+def time_query(execute, sql, params, many, context):
+    timer = current.get()
+    if timer is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timer.queries += 1
+        timer.serialize_queries += timer.serializing
+        timer.db_seconds += time.perf_counter() - started
+
+
+def add_query_timer(sender, connection, **kwargs):
+    # connection_created fires again each time a closed connection object reconnects
+    if time_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(time_query)
+
+
+def install_query_timer():
+    connection_created.connect(add_query_timer, weak=False, dispatch_uid='core.metrics.add_query_timer')
+    for connection in connections.all(initialized_only=True):
+        add_query_timer(None, connection)
+
+
+@contextmanager
+def serializing():
+    """Attribute the enclosed block to the current request's serialization time (outermost only)."""
+    timer = current.get()
+    if timer is None or timer.serializing:
+        yield
+        return
+    timer.serializing = True
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timer.serialize_seconds += time.perf_counter() - started
+        timer.serializing = False
+
+
+# serializer class -> its subclass with a timed .data, see timed_serializer_class
+timed_classes = {}
+
+
+def timed_serializer_class(serializer_class):
+    """
+    serializer_class with .data counted as the current request's serialization time: where DRF
+    serializers (Serializer and ListSerializer alike) turn instances into primitives, including
+    the lazy related lookups an N+1 hides in.
+    """
+    timed = timed_classes.get(serializer_class)
+    if timed is None:
+        data = serializer_class.data
+
+        def timed_data(self):
+            with serializing():
+                return data.fget(self)
+
+        timed = timed_classes[serializer_class] = type(
+            serializer_class.__name__, (serializer_class,),
+            {'data': property(timed_data), '__module__': serializer_class.__module__},
+        )
+    return timed
@@ -0,0 +1,104 @@
+import random
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from whitenoise.middleware import WhiteNoiseMiddleware
+
+from . import metrics
+
+
+class StaticFilesMiddleware(WhiteNoiseMiddleware):
+    """
+    WhiteNoise that can sit in an async middleware chain.
+
+    WhiteNoiseMiddleware is sync-only, which makes Django run the whole stack below it in the single
+    sync thread under ASGI. Here only actual static file responses go through a thread; every other
+    request is passed on to the async handler directly.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response=None, *args, **kwargs):
+        super().__init__(get_response, *args, **kwargs)
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        if self.autorefresh:
+            static_file = await sync_to_async(self.find_file)(request.path_info)
+        else:
+            static_file = self.files.get(request.path_info)
+        if static_file is not None:
+            return await sync_to_async(self.serve)(static_file, request)
+        return await self.get_response(request)
+
+
+class PerformanceMiddleware:
+    """
+    Makes the request being handled available to query hooks (core.metrics.current_request) and
+    measures a sampled share of requests (PERF_SAMPLE_RATE) with a core.metrics.RequestTimer:
+    queries, DB time, serialization time and response size go into the in-process histograms
+    behind /core/metrics/ and into a Server-Timing response header for staff users, or for
+    everyone with PERF_SERVER_TIMING.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.sample_rate = settings.PERF_SAMPLE_RATE
+        self.server_timing = settings.PERF_SERVER_TIMING
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+        metrics.install_query_timer()
+
+    def sampled(self):
+        return self.sample_rate >= 1 or random.random() < self.sample_rate
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        timer, tokens = self.start(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            self.stop(tokens)
+        return self.finish(timer, response)
+
+    async def __acall__(self, request):
+        timer, tokens = self.start(request)
+        try:
+            response = await self.get_response(request)
+        finally:
+            self.stop(tokens)
+        return self.finish(timer, response)
+
+    def start(self, request):
+        timer = metrics.RequestTimer(request) if self.sampled() else None
+        return timer, (metrics.current_request.set(request), metrics.current.set(timer))
+
+    def stop(self, tokens):
+        request_token, timer_token = tokens
+        metrics.current.reset(timer_token)
+        metrics.current_request.reset(request_token)
+
+    def finish(self, timer, response):
+        if timer is None:
+            return response
+        size = None if response.streaming else len(response.content)
+        total = metrics.record(timer, response.status_code, size)
+        if self.server_timing or self.is_staff(timer.request):
+            response.headers['Server-Timing'] = timer.server_timing(total)
+        return response
+
+    def is_staff(self, request):
+        # DRF sets the authenticated user on the underlying request too
+        user = getattr(request, 'user', None)
+        return user is not None and user.is_staff
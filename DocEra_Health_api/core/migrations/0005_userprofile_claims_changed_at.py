@@ -0,0 +1,18 @@
+# Generated by Django 5.2.1 on 2026-10-18 14:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_outbox_lease_attachments'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userprofile',
+            name='claims_changed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,40 @@
+from . import metrics
+
+
+class EagerLoadingMixin:
+    """
+    Applies the related-object needs declared by the serializer to the viewset queryset.
+
+    Serializers list them on their Meta:
+        select_related_fields = ('user',)                 # FK / OneToOne, joined in the same query
+        prefetch_related_fields = ('designation',)        # M2M / reverse FK, one extra query each
+    so a page of objects is rendered in a fixed number of queries whatever its size.
+    """
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        return eager_load(queryset, self.get_serializer_class())
+
+
+def eager_load(queryset, serializer_class):
+    meta = getattr(serializer_class, 'Meta', None)
+    select_related_fields = getattr(meta, 'select_related_fields', ())
+    prefetch_related_fields = getattr(meta, 'prefetch_related_fields', ())
+
+    if select_related_fields:
+        queryset = queryset.select_related(*select_related_fields)
+    if prefetch_related_fields:
+        queryset = queryset.prefetch_related(*prefetch_related_fields)
+    return queryset
+
+
+class SerializerTimingMixin:
+    # no docstring: drf-spectacular would publish it as every operation's description
+
+    def get_serializer(self, *args, **kwargs):
+        # counts .data towards the sampled request's serialization time (core.metrics);
+        # unsampled requests get the serializer unchanged
+        serializer = super().get_serializer(*args, **kwargs)
+        if metrics.current.get() is not None:
+            serializer.__class__ = metrics.timed_serializer_class(type(serializer))
+        return serializer
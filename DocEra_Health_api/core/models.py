@@ -1,5 +1,7 @@
 from django.db import models
+from django.db.models import Q
 from django.contrib.auth.models import User
+from django.utils import timezone
 
 class UserProfile(models.Model):
     ROLE_CHOICES = (
@@ -9,6 +11,83 @@ class UserProfile(models.Model):
     )
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='profile')
     role = models.CharField(max_length=10, choices=ROLE_CHOICES, default='patient', db_index=True)
+    # when the role / profiles / flags in the user's tokens last went stale (core.authentication)
+    claims_changed_at = models.DateTimeField(null=True, blank=True)
 
     def __str__(self):
-        return f"{self.user.username} - {self.role}"
\ No newline at end of file
+        return f"{self.user.username} - {self.role}"
+
+
+class OutboxEmail(models.Model):
+    """
+    An email queued by core.mail.OutboxBackend in the caller's transaction and delivered later
+    by the `send_outbox` management command.
+    """
+    STATUS_CHOICES = (
+        ('pending', 'Pending'),
+        ('sending', 'Sending'),
+        ('sent', 'Sent'),
+        ('failed', 'Failed'),
+    )
+    subject = models.TextField()
+    body = models.TextField(blank=True)
+    from_email = models.CharField(max_length=254)
+    to = models.JSONField(default=list)
+    cc = models.JSONField(default=list, blank=True)
+    bcc = models.JSONField(default=list, blank=True)
+    reply_to = models.JSONField(default=list, blank=True)
+    headers = models.JSONField(default=dict, blank=True)
+    # [[content, mimetype], ...], e.g. the text/html part
+    alternatives = models.JSONField(default=list, blank=True)
+    # [[filename, base64 content, mimetype], ...]
+    attachments = models.JSONField(default=list, blank=True)
+    # identical messages waiting to be (or being) sent are collapsed into one
+    dedupe_key = models.CharField(max_length=64)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveSmallIntegerField(default=0)
+    # while 'sending', when the worker's lease runs out and the row is due again
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['dedupe_key'], condition=Q(status__in=['pending', 'sending']), name='core_outbox_pending_dedupe'),
+        ]
+        indexes = [
+            models.Index(fields=['next_attempt_at'], condition=Q(status__in=['pending', 'sending']), name='core_outbox_due_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} -> {', '.join(self.to)} ({self.status})"
+
+
+class SlowQuery(models.Model):
+    """
+    Queries slower than SLOW_QUERY_MS, aggregated by normalized statement (see core.slow_queries),
+    with the plan captured on the first occurrence.
+    """
+    fingerprint = models.CharField(max_length=40, unique=True)
+    database = models.CharField(max_length=100)
+    statement = models.TextField()
+    # the latest occurrence, with its literal values
+    example = models.TextField()
+    # viewset action (or view) of the latest occurrence, empty outside requests
+    view = models.CharField(max_length=200, blank=True)
+    count = models.PositiveIntegerField(default=0)
+    total_ms = models.FloatField(default=0, db_index=True)
+    max_ms = models.FloatField(default=0)
+    plan = models.TextField(blank=True)
+    first_seen = models.DateTimeField(default=timezone.now)
+    last_seen = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ['-total_ms']
+
+    def __str__(self):
+        return f"{self.statement[:80]} ({self.count}x, {self.total_ms:.0f} ms)"
+
+    @property
+    def mean_ms(self):
+        return self.total_ms / self.count if self.count else 0
@@ -0,0 +1,7 @@
+"""drf-spectacular extensions, registered on import (CoreConfig.ready, or core.schema / the docs urls in the slim runtime)."""
+from drf_spectacular.contrib.rest_framework_simplejwt import SimpleJWTScheme
+
+
+class ClaimsJWTScheme(SimpleJWTScheme):
+    """Documents core.authentication.ClaimsJWTAuthentication as the simplejwt bearer scheme."""
+    target_class = 'core.authentication.ClaimsJWTAuthentication'
@@ -0,0 +1,170 @@
+import datetime
+import json
+
+from django.core.exceptions import ValidationError
+from django.core.paginator import InvalidPage
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import Cursor, CursorPagination, PageNumberPagination, _reverse_ordering
+
+
+class AsyncPageNumberPagination(PageNumberPagination):
+    """PageNumberPagination with an async entry point for the ASGI read path (core.async_views)."""
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+
+        paginator = self.django_paginator_class(queryset, page_size)
+        # count is a cached_property: filled here so paginator.page() doesn't query synchronously
+        paginator.count = await queryset.acount()
+        page_number = self.get_page_number(request, paginator)
+        try:
+            self.page = paginator.page(page_number)
+        except InvalidPage as exc:
+            msg = self.invalid_page_message.format(page_number=page_number, message=str(exc))
+            raise NotFound(msg)
+        self.page.object_list = [obj async for obj in self.page.object_list]
+
+        if paginator.num_pages > 1 and self.template is not None:
+            self.display_page_controls = True
+        return list(self.page)
+
+
+class PageNumberCompatPagination(AsyncPageNumberPagination):
+    page_size = 20
+    page_size_query_param = "page_size"
+    max_page_size = 100
+
+
+class KeysetPagination(CursorPagination):
+    """
+    Cursor pagination on an indexed, stable key, so fetching a page costs the same at any depth.
+
+    Views pick the key with `cursor_ordering`, e.g. ('-created', '-id'); it must end in a unique
+    field. Every list is paginated, at most max_page_size rows a page: the first page when the
+    request names none, and ?page=N still gets the old page-number payload (with "count") on the
+    same key for clients that page by number.
+    """
+
+    page_size = 20
+    page_size_query_param = "page_size"
+    max_page_size = 100
+    ordering = "-id"
+
+    def get_ordering(self, request, queryset, view):
+        ordering = getattr(view, "cursor_ordering", None)
+        if ordering:
+            return (ordering,) if isinstance(ordering, str) else tuple(ordering)
+        return super().get_ordering(request, queryset, view)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.compat = None
+        if PageNumberCompatPagination.page_query_param in request.query_params:
+            self.compat = PageNumberCompatPagination()
+            ordering = self.get_ordering(request, queryset, view)
+            return self.compat.paginate_queryset(queryset.order_by(*ordering), request, view)
+        window = self.window(queryset, request, view)
+        return None if window is None else self.take(list(window))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        self.compat = None
+        if PageNumberCompatPagination.page_query_param in request.query_params:
+            self.compat = PageNumberCompatPagination()
+            ordering = self.get_ordering(request, queryset, view)
+            return await self.compat.apaginate_queryset(queryset.order_by(*ordering), request, view)
+        window = self.window(queryset, request, view)
+        return None if window is None else self.take([obj async for obj in window])
+
+    # DRF's CursorPagination positions on the first ordering field only and pages through equal
+    # values with an offset, which skips or repeats rows when many share it (e.g. bulk-imported
+    # reviews with one `created`). The cursor here holds the whole key instead, and the next page
+    # is the rows strictly after it: a true keyset seek on the (-created, -id) style index.
+
+    def window(self, queryset, request, view):
+        """The requested page plus one row (to tell whether there is more), unevaluated."""
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.model = queryset.model
+        self.cursor = self.decode_cursor(request)
+        self.reverse = bool(self.cursor and self.cursor.reverse)
+        self.position = self.cursor.position if self.cursor else None
+
+        queryset = queryset.order_by(*(_reverse_ordering(self.ordering) if self.reverse else self.ordering))
+        if self.position is not None:
+            queryset = queryset.filter(self.after(self.position))
+        return queryset[:self.page_size + 1]
+
+    def after(self, position):
+        """Rows past `position` in the walk's direction: (a, b) after (x, y) is a > x OR (a = x AND b > y)."""
+        try:
+            values = json.loads(position)
+        except ValueError:
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(values, list) or len(values) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+
+        condition, equal = Q(), Q()
+        for field, value in zip(self.ordering, values):
+            name = field.lstrip('-')
+            value = self.decode_value(name, value)
+            descending = field.startswith('-') != self.reverse
+            condition |= equal & Q(**{f"{name}__{'lt' if descending else 'gt'}": value})
+            equal &= Q(**{name: value})
+        return condition
+
+    def decode_value(self, name, value):
+        """A cursor position value as its ordering field's Python value; the cursor comes from the client."""
+        field = self.model._meta.get_field(name)
+        if (value is None and not field.null) or isinstance(value, (dict, list)):
+            raise NotFound(self.invalid_cursor_message)
+        try:
+            return field.to_python(value)
+        except (TypeError, ValueError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def take(self, rows):
+        page = rows[:self.page_size]
+        more = len(rows) > self.page_size
+        if self.reverse:
+            # walked backwards from the cursor: the rows before it, nearest first
+            page.reverse()
+            self.has_previous, self.has_next = more, True
+        else:
+            self.has_previous, self.has_next = self.position is not None, more
+        self.previous_position = self._get_position_from_instance(page[0], self.ordering) if page else self.position
+        self.next_position = self._get_position_from_instance(page[-1], self.ordering) if page else self.position
+        self.page = page
+
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+        return self.page
+
+    def _get_position_from_instance(self, instance, ordering):
+        values = []
+        for field in ordering:
+            value = getattr(instance, field.lstrip('-'))
+            # full precision: DjangoJSONEncoder would cut datetimes to milliseconds
+            values.append(value.isoformat() if isinstance(value, (datetime.date, datetime.time)) else value)
+        return json.dumps(values, default=str)
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        return self.encode_cursor(Cursor(offset=0, reverse=False, position=self.next_position))
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        return self.encode_cursor(Cursor(offset=0, reverse=True, position=self.previous_position))
+
+    def get_paginated_response(self, data):
+        if self.compat is not None:
+            return self.compat.get_paginated_response(data)
+        return super().get_paginated_response(data)
@@ -1,5 +1,7 @@
 from rest_framework import permissions
 
+from .authentication import user_claims
+
 
 class IsAdminOrReadOnly(permissions.BasePermission):
     """
@@ -26,5 +28,5 @@ class IsPatientOrAdminForReviews(permissions.BasePermission):
         if request.method in permissions.SAFE_METHODS:
             return True
         if request.method == 'POST':
-            return request.user.is_authenticated and request.user.profile.role == 'patient'
+            return request.user.is_authenticated and user_claims(request.user)['role'] == 'patient'
         return request.user.is_authenticated and request.user.is_staff
\ No newline at end of file
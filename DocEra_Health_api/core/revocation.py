@@ -0,0 +1,168 @@
+"""
+In-process revocation check for blacklisted refresh tokens.
+
+With a shared cache (redis / memcached), every process keeps a Bloom filter of blacklisted jtis,
+loaded once and then topped up with the rows blacklisted since (an `id > last seen` range read, no
+join over the whole table). The newest blacklisted id and a prune generation are published in the
+cache, so processes only read the table when something was actually blacklisted or pruned. A jti
+the filter has never seen is not revoked; filter hits - rotated tokens being reused, or the rare
+false positive - are confirmed against BlacklistedToken.
+
+A miss is only trusted while the filter is known to be complete: it has caught up with the
+published head, and no blacklisting is in flight (IN_FLIGHT_KEY is set when the row is written,
+before its commit is published). Otherwise, and always with a per-process cache (locmem), which
+can't tell one worker about another's blacklistings, the check reads the table as simplejwt does.
+
+Refreshing never blocks a check: one thread refreshes while the others check against the table.
+"""
+import hashlib
+import math
+import threading
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+from rest_framework_simplejwt.tokens import RefreshToken as BaseRefreshToken
+
+from .cache import local_cache
+
+HEAD_KEY = "auth:blacklist:head"
+GENERATION_KEY = "auth:blacklist:generation"
+IN_FLIGHT_KEY = "auth:blacklist:in-flight"
+# how long a blacklisting counts as in flight: from the row's write until well after its commit
+IN_FLIGHT_SECONDS = 10
+# ids are allocated before commit, so a slightly older row can become visible after a newer one;
+# each top-up re-reads this many ids below the last one seen
+RESCAN_IDS = 100
+
+
+class BloomFilter:
+    def __init__(self, capacity, error_rate=0.001):
+        self.capacity = capacity
+        self.bits = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.bits / capacity * math.log(2)))
+        self.array = bytearray((self.bits + 7) // 8)
+        self.count = 0
+
+    def positions(self, key):
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'little')
+        second = int.from_bytes(digest[8:], 'little') | 1
+        # double hashing: k positions from two 64-bit hashes
+        return [(first + i * second) % self.bits for i in range(self.hashes)]
+
+    def add(self, key):
+        for position in self.positions(key):
+            self.array[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, key):
+        return all(self.array[position >> 3] & (1 << (position & 7)) for position in self.positions(key))
+
+
+def shared_cache():
+    return not local_cache()
+
+
+def publish_blacklisted(token_id):
+    """
+    Let other processes know a token was blacklisted: in flight from now, so that no filter miss is
+    trusted between the commit and its publication, and the new head once the row is committed.
+    """
+    if not shared_cache():
+        return
+    cache.set(IN_FLIGHT_KEY, True, timeout=IN_FLIGHT_SECONDS)
+    transaction.on_commit(lambda: cache.set(HEAD_KEY, token_id, timeout=None))
+
+
+def publish_pruned():
+    """Blacklisted rows were deleted: every process rebuilds its filter (dropping the expired jtis)."""
+    try:
+        cache.incr(GENERATION_KEY)
+    except ValueError:
+        cache.set(GENERATION_KEY, 1, timeout=None)
+
+
+class RevocationSet:
+    def __init__(self):
+        # held only by the thread refreshing the filter; checks never wait for it
+        self.lock = threading.Lock()
+        self.filter = None
+        self.last_id = 0
+        self.head = None
+        self.generation = None
+
+    def reset(self):
+        with self.lock:
+            self.filter = None
+
+    def rebuild(self, generation):
+        count = BlacklistedToken.objects.count()
+        bloom = BloomFilter(max(settings.TOKEN_REVOCATION_CAPACITY, count * 2))
+        last_id = 0
+        rows = BlacklistedToken.objects.order_by('id').values_list('id', 'token__jti')
+        for token_id, jti in rows.iterator(chunk_size=10000):
+            bloom.add(jti)
+            last_id = token_id
+        # swapped in whole, so concurrent checks see the old filter or the new one
+        self.filter, self.last_id, self.generation = bloom, last_id, generation
+
+    def top_up(self):
+        rows = BlacklistedToken.objects.filter(id__gt=self.last_id - RESCAN_IDS).order_by('id').values_list('id', 'token__jti')
+        for token_id, jti in rows:
+            if jti not in self.filter:
+                # setting bits in place is safe for concurrent readers: a jti is only ever added
+                self.filter.add(jti)
+            self.last_id = max(self.last_id, token_id)
+
+    def sync(self, head, generation):
+        if self.filter is None or generation != self.generation or self.filter.count > self.filter.capacity:
+            self.rebuild(generation)
+            if head is None:
+                head = self.last_id
+                cache.add(HEAD_KEY, head, timeout=None)
+        elif head is None or head != self.head:
+            # a late commit can publish an id below the last one seen, hence != and the rescan
+            self.top_up()
+        self.head = head
+
+    def current(self, head, generation):
+        """
+        The filter brought up to `head` / `generation`, or None while it isn't: not built yet, or
+        another thread is refreshing it.
+        """
+        if self.filter is None or head != self.head or generation != self.generation:
+            if not self.lock.acquire(blocking=False):
+                return None
+            try:
+                self.sync(head, generation)
+            finally:
+                self.lock.release()
+        return self.filter if head is None or head == self.head else None
+
+    def is_revoked(self, jti):
+        markers = cache.get_many([HEAD_KEY, GENERATION_KEY, IN_FLIGHT_KEY])
+        if not markers.get(IN_FLIGHT_KEY):
+            bloom = self.current(markers.get(HEAD_KEY), markers.get(GENERATION_KEY, 0))
+            if bloom is not None and jti not in bloom:
+                return False
+        return BlacklistedToken.objects.filter(token__jti=jti).exists()
+
+
+revocations = RevocationSet()
+
+
+def is_revoked(jti):
+    if not settings.TOKEN_REVOCATION_FILTER or not shared_cache():
+        return BlacklistedToken.objects.filter(token__jti=jti).exists()
+    return revocations.is_revoked(jti)
+
+
+class RefreshToken(BaseRefreshToken):
+    def check_blacklist(self):
+        if is_revoked(self.payload[api_settings.JTI_CLAIM]):
+            raise TokenError(_("Token is blacklisted"))
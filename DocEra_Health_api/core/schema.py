@@ -0,0 +1,111 @@
+"""
+Precompiled OpenAPI schema.
+
+drf-spectacular's SpectacularAPIView introspects every view and serializer on each request, which
+on a cold serverless start takes seconds. `manage.py build_schema` generates the schema once into
+the committed artifacts below (`--check` fails when they have drifted from the code), and with
+PRECOMPILED_SCHEMA /api/schema/ serves those bytes instead: YAML, or JSON for ?format=json /
+Accept: application/json, with a content hash ETag and gzip / brotli variants compressed once per
+process.
+"""
+import gzip
+import hashlib
+import logging
+
+from django.conf import settings
+
+try:
+    import brotli
+except ImportError:  # served gzipped only
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+FORMATS = ('yaml', 'json')
+CONTENT_TYPES = {
+    'yaml': 'application/vnd.oai.openapi; charset=utf-8',
+    'json': 'application/vnd.oai.openapi+json; charset=utf-8',
+}
+
+
+def artifact_path(fmt):
+    return settings.BASE_DIR / f"schema.{'yml' if fmt == 'yaml' else fmt}"
+
+
+def generate():
+    """
+    {format: bytes} of the public schema, rendered as SpectacularAPIView would, and whether it was
+    generated without warnings or errors (drf-spectacular writes those to stderr).
+    """
+    # drf-spectacular's generator and renderers are only needed here, not to serve the artifacts
+    from drf_spectacular.drainage import GENERATOR_STATS
+    from drf_spectacular.renderers import OpenApiJsonRenderer, OpenApiYamlRenderer
+    from drf_spectacular.settings import spectacular_settings
+    from . import openapi  # noqa: F401
+
+    renderers = {'yaml': OpenApiYamlRenderer, 'json': OpenApiJsonRenderer}
+    GENERATOR_STATS.reset()
+    GENERATOR_STATS.enable_trace_lineno()
+    generator = spectacular_settings.DEFAULT_GENERATOR_CLASS()
+    schema = generator.get_schema(request=None, public=True)
+    rendered = {fmt: renderers[fmt]().render(schema, renderer_context={}) for fmt in FORMATS}
+    return rendered, not GENERATOR_STATS
+
+
+class Artifact:
+    """One precompiled schema file with its ETag and compressed variants, loaded on first use."""
+
+    def __init__(self, fmt):
+        self.fmt = fmt
+        self.path = artifact_path(fmt)
+        self.content = self.path.read_bytes()
+        self.digest = hashlib.sha256(self.content).hexdigest()[:32]
+        self.encoded = {'identity': self.content}
+
+    def etag(self, encoding):
+        # a strong validator per representation, so a cached gzip body never answers a br request
+        return f'"{self.digest}"' if encoding == 'identity' else f'"{self.digest}-{encoding}"'
+
+    def body(self, encoding):
+        if encoding not in self.encoded:
+            if encoding == 'br':
+                self.encoded[encoding] = brotli.compress(self.content, mode=brotli.MODE_TEXT)
+            else:
+                self.encoded[encoding] = gzip.compress(self.content, compresslevel=9, mtime=0)
+        return self.encoded[encoding]
+
+
+artifacts = {}
+
+
+def artifact(fmt):
+    """The loaded artifact, or None when it hasn't been built."""
+    if fmt not in artifacts:
+        try:
+            artifacts[fmt] = Artifact(fmt)
+        except FileNotFoundError:
+            logger.error("%s is missing; run `manage.py build_schema`.", artifact_path(fmt))
+            return None
+    return artifacts[fmt]
+
+
+def negotiate_format(request):
+    fmt = request.GET.get('format')
+    if fmt in ('json', 'openapi-json'):
+        return 'json'
+    if fmt in ('yaml', 'openapi'):
+        return 'yaml'
+    accept = request.headers.get('Accept', '')
+    return 'json' if 'json' in accept and 'yaml' not in accept else 'yaml'
+
+
+def negotiate_encoding(request):
+    accepted = {
+        part.split(';')[0].strip().lower()
+        for part in request.headers.get('Accept-Encoding', '').split(',')
+    }
+    if brotli is not None and 'br' in accepted:
+        return 'br'
+    if 'gzip' in accepted:
+        return 'gzip'
+    return 'identity'
@@ -0,0 +1,224 @@
+"""
+Synthetic hospital data for load tests: catalogs, doctors, patients, appointments and reviews,
+written with bulk_create in chunks.
+
+As with the roster importer, bulk_create skips the post_save handlers, so their work (profiles,
+denormalized names, rating aggregates, appointment rollups, cache invalidation) is done here
+directly. Every seeded account has the password SEED_PASSWORD; usernames are
+seed_dr_<run>_<n> / seed_pt_<run>_<n>.
+"""
+import datetime
+import random
+import secrets
+import time
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.utils import timezone
+
+from . import cache
+from .models import UserProfile
+from appointment import rollups
+from appointment.models import Appointment
+from doctor.models import AvailableTime, Designation, Doctor, DoctorRating, Review, Specialization, STAR_CHOICES
+from patient.models import Patient
+
+SEED_PASSWORD = 'docera-seed-pass'
+DOCTOR_PREFIX = 'seed_dr_'
+PATIENT_PREFIX = 'seed_pt_'
+
+# doctors, patients, appointments, reviews
+PRESETS = {
+    '10k': (200, 2_000, 10_000, 5_000),
+    '100k': (1_000, 20_000, 100_000, 50_000),
+    '1m': (5_000, 100_000, 1_000_000, 300_000),
+}
+
+DESIGNATIONS = [
+    'Professor', 'Associate Professor', 'Assistant Professor', 'Senior Consultant',
+    'Consultant', 'Medical Officer', 'Resident Physician', 'Specialist',
+]
+SPECIALIZATIONS = [
+    'Cardiology', 'Dermatology', 'Endocrinology', 'Gastroenterology', 'General Medicine',
+    'Gynecology', 'Nephrology', 'Neurology', 'Oncology', 'Ophthalmology', 'Orthopedics',
+    'Otolaryngology', 'Pediatrics', 'Psychiatry', 'Pulmonology', 'Urology',
+]
+TIMES = [
+    'Saturday 9:00 AM - 12:00 PM', 'Saturday 5:00 PM - 9:00 PM', 'Sunday 9:00 AM - 12:00 PM',
+    'Sunday 5:00 PM - 9:00 PM', 'Monday 10:00 AM - 1:00 PM', 'Tuesday 4:00 PM - 8:00 PM',
+    'Wednesday 10:00 AM - 1:00 PM', 'Thursday 4:00 PM - 8:00 PM',
+]
+FIRST_NAMES = [
+    'Aisha', 'Arif', 'Farhana', 'Imran', 'Jamal', 'Karim', 'Laila', 'Mahmud', 'Nadia', 'Omar',
+    'Priya', 'Rafiq', 'Sadia', 'Tanvir', 'Zara', 'Hasan', 'Mina', 'Rahim', 'Sumaiya', 'Yusuf',
+]
+LAST_NAMES = [
+    'Ahmed', 'Akter', 'Begum', 'Chowdhury', 'Das', 'Hossain', 'Islam', 'Kabir', 'Khan', 'Miah',
+    'Rahman', 'Roy', 'Sarkar', 'Siddique', 'Talukder', 'Uddin',
+]
+SYMPTOMS = [
+    'Persistent headache for a week', 'Chest pain when climbing stairs', 'Skin rash on both arms',
+    'High fever and body ache', 'Shortness of breath at night', 'Lower back pain',
+    'Blurred vision while reading', 'Frequent stomach pain after meals', 'Follow-up on blood test results',
+    'Dry cough for two weeks', 'Joint swelling in the knee', 'Trouble sleeping and anxiety',
+]
+REVIEW_BODIES = [
+    'Listened carefully and explained everything.', 'Long wait but a thorough check-up.',
+    'Very kind and professional.', 'The treatment helped within days.', 'Felt rushed during the visit.',
+    'Clear instructions and good follow-up.', 'Would recommend to my family.',
+]
+# weights of 1..5 stars, skewed towards good reviews like real ratings
+STAR_WEIGHTS = [4, 6, 15, 35, 40]
+STATUS_WEIGHTS = {'Completed': 60, 'Pending': 30, 'Running': 10}
+# seeded bookings are spread over the past year, for the analytics rollups
+BOOKING_DAYS = 365
+
+
+def slugify_name(name):
+    return name.lower().replace(' ', '-')
+
+
+class HospitalSeeder:
+    def __init__(self, doctors, patients, appointments, reviews, batch_size=5000, seed=None, progress=None):
+        self.counts = {'doctors': doctors, 'patients': patients, 'appointments': appointments, 'reviews': reviews}
+        self.batch_size = batch_size
+        self.random = random.Random(seed)
+        self.progress = progress or (lambda message: None)
+        self.run_id = secrets.token_hex(3) if seed is None else f"{seed:x}"
+        self.password = make_password(SEED_PASSWORD)
+
+    def run(self):
+        started = time.monotonic()
+        self.seed_catalogs()
+        doctors = self.seed_doctors(self.counts['doctors'])
+        patients = self.seed_patients(self.counts['patients'])
+        # with --doctors 0 / --patients 0, appointments and reviews go to the existing rows
+        doctors = doctors or self.existing_names(Doctor)
+        patients = patients or self.existing_names(Patient)
+        if doctors and patients:
+            self.seed_appointments(self.counts['appointments'], doctors, patients)
+            self.seed_reviews(self.counts['reviews'], list(doctors), list(patients))
+            if self.counts['appointments']:
+                today = timezone.localdate()
+                rollups.reconcile(today - datetime.timedelta(days=BOOKING_DAYS), today)
+        DoctorRating.rebuild()
+        cache.invalidate(Doctor, DoctorRating, User, Designation, Specialization, AvailableTime)
+        return time.monotonic() - started
+
+    def existing_names(self, model):
+        rows = model.objects.values_list('id', 'user__first_name', 'user__last_name')
+        return {pk: f"{first} {last}" for pk, first, last in rows.iterator()}
+
+    def chunks(self, total):
+        for start in range(0, total, self.batch_size):
+            yield start, min(self.batch_size, total - start)
+
+    def name(self):
+        return self.random.choice(FIRST_NAMES), self.random.choice(LAST_NAMES)
+
+    def seed_catalogs(self):
+        for name in DESIGNATIONS:
+            Designation.objects.get_or_create(slug=slugify_name(name), defaults={'name': name})
+        for name in SPECIALIZATIONS:
+            Specialization.objects.get_or_create(slug=slugify_name(name), defaults={'name': name})
+        for slot in TIMES:
+            AvailableTime.objects.get_or_create(time=slot)
+        self.designations = list(Designation.objects.values_list('id', flat=True))
+        self.specializations = list(Specialization.objects.values_list('id', flat=True))
+        self.times = list(AvailableTime.objects.values_list('id', flat=True))
+
+    def create_users(self, prefix, start, size, role):
+        names = [self.name() for _ in range(size)]
+        users = User.objects.bulk_create([
+            User(
+                username=f"{prefix}{self.run_id}_{start + offset}",
+                first_name=first,
+                last_name=last,
+                email=f"{prefix}{self.run_id}_{start + offset}@example.com",
+                password=self.password,
+            )
+            for offset, (first, last) in enumerate(names)
+        ])
+        UserProfile.objects.bulk_create([UserProfile(user=user, role=role) for user in users])
+        return users
+
+    def seed_doctors(self, total):
+        """Returns {doctor_id: display name}."""
+        names = {}
+        for start, size in self.chunks(total):
+            with transaction.atomic():
+                users = self.create_users(DOCTOR_PREFIX, start, size, 'doctor')
+                doctors = Doctor.objects.bulk_create([
+                    Doctor(
+                        user=user,
+                        fee=self.random.randrange(300, 2001, 50),
+                        meet_link=f"https://meet.example.com/{user.username}",
+                    )
+                    for user in users
+                ])
+                for through, field, choices, most in (
+                    (Doctor.designation.through, 'designation_id', self.designations, 2),
+                    (Doctor.specialization.through, 'specialization_id', self.specializations, 3),
+                    (Doctor.available_time.through, 'availabletime_id', self.times, 4),
+                ):
+                    through.objects.bulk_create([
+                        through(doctor_id=doctor.pk, **{field: choice})
+                        for doctor in doctors
+                        for choice in self.random.sample(choices, self.random.randint(1, min(most, len(choices))))
+                    ])
+            names.update((doctor.pk, f"{user.first_name} {user.last_name}") for doctor, user in zip(doctors, users))
+            self.progress(f"doctors: {start + size}/{total}")
+        return names
+
+    def seed_patients(self, total):
+        names = {}
+        for start, size in self.chunks(total):
+            with transaction.atomic():
+                users = self.create_users(PATIENT_PREFIX, start, size, 'patient')
+                patients = Patient.objects.bulk_create([
+                    Patient(user=user, mobile_no=f"+8801{self.random.randrange(10 ** 9):09d}")
+                    for user in users
+                ])
+            names.update((patient.pk, f"{user.first_name} {user.last_name}") for patient, user in zip(patients, users))
+            self.progress(f"patients: {start + size}/{total}")
+        return names
+
+    def seed_appointments(self, total, doctors, patients):
+        doctor_ids, patient_ids = list(doctors), list(patients)
+        statuses, weights = zip(*STATUS_WEIGHTS.items())
+        now = timezone.now()
+        for start, size in self.chunks(total):
+            appointments = []
+            for _ in range(size):
+                doctor_id = self.random.choice(doctor_ids)
+                patient_id = self.random.choice(patient_ids)
+                appointments.append(Appointment(
+                    patient_id=patient_id,
+                    doctor_id=doctor_id,
+                    time_id=self.random.choice(self.times),
+                    appointment_type=self.random.choice(('Online', 'Offline')),
+                    appointment_status=self.random.choices(statuses, weights)[0],
+                    symptom=self.random.choice(SYMPTOMS),
+                    cancel=self.random.random() < 0.05,
+                    patient_name=patients[patient_id],
+                    doctor_name=doctors[doctor_id],
+                    created=now - datetime.timedelta(seconds=self.random.randrange(BOOKING_DAYS * 86400)),
+                ))
+            Appointment.objects.bulk_create(appointments)
+            self.progress(f"appointments: {start + size}/{total}")
+
+    def seed_reviews(self, total, doctor_ids, patient_ids):
+        for start, size in self.chunks(total):
+            reviews = []
+            for _ in range(size):
+                stars = self.random.choices(range(1, 6), STAR_WEIGHTS)[0]
+                reviews.append(Review(
+                    reviewer_id=self.random.choice(patient_ids),
+                    doctor_id=self.random.choice(doctor_ids),
+                    body=self.random.choice(REVIEW_BODIES),
+                    rating=STAR_CHOICES[stars - 1][0],
+                    stars=stars,
+                ))
+            Review.objects.bulk_create(reviews)
+            self.progress(f"reviews: {start + size}/{total}")
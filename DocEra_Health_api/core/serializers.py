@@ -1,6 +1,15 @@
 from djoser.serializers import UserCreateSerializer as BaseUserCreateSerializer
 from djoser.serializers import UserSerializer as BaseUserSerializer
 from django.contrib.auth import get_user_model
+from rest_framework import serializers
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer as BaseTokenObtainPairSerializer
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer as BaseTokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import UntypedToken
+
+from .authentication import claims_queryset, stamp_claims
+from .revocation import RefreshToken, is_revoked
 
 class UserCreateSerializer(BaseUserCreateSerializer):
     class Meta(BaseUserCreateSerializer.Meta):
@@ -10,4 +19,56 @@ class UserCreateSerializer(BaseUserCreateSerializer):
 class UserSerializer(BaseUserSerializer):
     class Meta(BaseUserSerializer.Meta):
         model = get_user_model()
-        fields = ('id', 'username', 'email', 'first_name', 'last_name')
\ No newline at end of file
+        fields = ('id', 'username', 'email', 'first_name', 'last_name')
+
+
+class TokenObtainPairSerializer(BaseTokenObtainPairSerializer):
+    """Adds role, patient_id and doctor_id claims (see core.authentication) to issued tokens."""
+    token_class = RefreshToken
+
+    @classmethod
+    def get_token(cls, user):
+        return stamp_claims(super().get_token(user), user)
+
+
+class TokenRefreshSerializer(BaseTokenRefreshSerializer):
+    """
+    simplejwt's refresh, except the claims are re-read on every refresh so a role change reaches
+    new access tokens (and rotated refresh tokens) instead of being copied from the old refresh token.
+    The blacklist check goes through core.revocation.
+    """
+    token_class = RefreshToken
+
+    def validate(self, attrs):
+        refresh = self.token_class(attrs["refresh"])
+
+        user_id = refresh.payload.get(api_settings.USER_ID_CLAIM, None)
+        user = claims_queryset().get(**{api_settings.USER_ID_FIELD: user_id})
+        if not api_settings.USER_AUTHENTICATION_RULE(user):
+            raise AuthenticationFailed(self.error_messages["no_active_account"], "no_active_account")
+
+        if api_settings.ROTATE_REFRESH_TOKENS and api_settings.BLACKLIST_AFTER_ROTATION:
+            refresh.blacklist()
+
+        refresh.set_iat()
+        stamp_claims(refresh, user, loaded=True)
+        data = {"access": str(refresh.access_token)}
+
+        if api_settings.ROTATE_REFRESH_TOKENS:
+            refresh.set_jti()
+            refresh.set_exp()
+            refresh.outstand()
+            data["refresh"] = str(refresh)
+
+        return data
+
+
+class TokenVerifySerializer(serializers.Serializer):
+    """simplejwt's verify with the blacklist check done by core.revocation."""
+    token = serializers.CharField(write_only=True)
+
+    def validate(self, attrs):
+        token = UntypedToken(attrs["token"])
+        if api_settings.BLACKLIST_AFTER_ROTATION and is_revoked(token.get(api_settings.JTI_CLAIM)):
+            raise serializers.ValidationError("Token is blacklisted")
+        return {}
@@ -1,9 +1,17 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_init, post_save, pre_save, post_delete, m2m_changed
+from django.db import transaction
 from django.dispatch import receiver
 from django.contrib.auth.models import User
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
 from .models import UserProfile
 from patient.models import Patient
-from doctor.models import Doctor
+from doctor.models import Doctor, DoctorRating, Review, Designation, Specialization, AvailableTime
+from appointment.models import Appointment
+from appointment import rollups
+from service.models import Service
+from . import cache
+from .authentication import invalidate_claims
+from .revocation import publish_blacklisted
 
 
 @receiver(post_save, sender=User)
@@ -45,3 +53,158 @@ def update_user_role_to_doctor(sender, instance, created, **kwargs):
         except UserProfile.DoesNotExist:
             # Handle case where UserProfile doesn't exist
             UserProfile.objects.create(user=instance.user, role="doctor")
+
+
+@receiver(post_init, sender=User)
+def remember_user_name(sender, instance, **kwargs):
+    # the name as loaded (like Appointment.from_db keeps its parties); a deferred one isn't
+    # fetched, it is simply unknown
+    instance._loaded_name = (instance.__dict__.get("first_name"), instance.__dict__.get("last_name"))
+
+
+@receiver(post_save, sender=User)
+def sync_appointment_names(sender, instance, created, update_fields=None, **kwargs):
+    """
+    Keep Appointment.patient_name / doctor_name in step with a renamed User.
+    Saves that don't change the name (e.g. last_login updates, admin and profile edits) are skipped.
+    """
+    if created:
+        return
+    if update_fields is not None and not {"first_name", "last_name"} & set(update_fields):
+        return
+    name = (instance.first_name, instance.last_name)
+    loaded, instance._loaded_name = getattr(instance, "_loaded_name", None), name
+    if name == loaded:
+        return
+
+    full_name = f"{instance.first_name} {instance.last_name}"
+    Appointment.objects.filter(patient__user=instance).exclude(patient_name=full_name).update(patient_name=full_name)
+    Appointment.objects.filter(doctor__user=instance).exclude(doctor_name=full_name).update(doctor_name=full_name)
+
+
+@receiver(post_save, sender=Doctor)
+def create_doctor_rating(sender, instance, created, **kwargs):
+    if created:
+        DoctorRating.objects.get_or_create(doctor=instance)
+
+
+@receiver(pre_save, sender=Review)
+def remember_review_rating(sender, instance, **kwargs):
+    # an edited review has to take its old stars out of the aggregate first
+    instance._previous_rating = None
+    if instance.pk:
+        instance._previous_rating = Review.objects.filter(pk=instance.pk).values_list("doctor_id", "stars").first()
+
+
+@receiver(post_save, sender=Review)
+def update_doctor_rating(sender, instance, created, **kwargs):
+    """
+    Maintain the doctor's DoctorRating aggregate in the same transaction as the review write.
+    """
+    previous = getattr(instance, "_previous_rating", None)
+    if previous is None:
+        DoctorRating.record(instance.doctor_id, added=instance.stars)
+        return
+
+    previous_doctor_id, previous_stars = previous
+    if previous_doctor_id == instance.doctor_id:
+        if previous_stars != instance.stars:
+            DoctorRating.record(instance.doctor_id, added=instance.stars, removed=previous_stars)
+    else:
+        DoctorRating.record(previous_doctor_id, removed=previous_stars)
+        DoctorRating.record(instance.doctor_id, added=instance.stars)
+
+
+@receiver(post_delete, sender=Review)
+def remove_doctor_rating(sender, instance, **kwargs):
+    DoctorRating.record(instance.doctor_id, removed=instance.stars)
+
+
+@receiver(pre_save, sender=Appointment)
+def remember_appointment_rollup(sender, instance, **kwargs):
+    # a status change or cancellation moves the appointment between rollup rows; inside a
+    # transaction (AppointmentSerializer.update) the row is locked until the delta is applied
+    instance._previous_rollup = None
+    if instance.pk:
+        lock = transaction.get_connection().in_atomic_block
+        instance._previous_rollup = rollups.stored_states([instance.pk], lock=lock).get(instance.pk)
+
+
+@receiver(post_save, sender=Appointment)
+def update_appointment_rollup(sender, instance, **kwargs):
+    """Maintain AppointmentDailyRollup in the same transaction as the appointment write."""
+    previous = getattr(instance, "_previous_rollup", None)
+    current = rollups.state(instance)
+    if previous != current:
+        rollups.record(added=[current], removed=[previous] if previous else [])
+
+
+@receiver(post_delete, sender=Appointment)
+def remove_appointment_rollup(sender, instance, **kwargs):
+    rollups.record(removed=[rollups.state(instance)])
+
+
+@receiver(post_save, sender=Doctor)
+@receiver(post_delete, sender=Doctor)
+@receiver(post_save, sender=DoctorRating)
+@receiver(post_delete, sender=DoctorRating)
+@receiver(post_save, sender=Designation)
+@receiver(post_delete, sender=Designation)
+@receiver(post_save, sender=Specialization)
+@receiver(post_delete, sender=Specialization)
+@receiver(post_save, sender=AvailableTime)
+@receiver(post_delete, sender=AvailableTime)
+@receiver(post_save, sender=Service)
+@receiver(post_delete, sender=Service)
+def invalidate_catalog_cache(sender, **kwargs):
+    cache.invalidate(sender)
+
+
+@receiver(m2m_changed, sender=Doctor.designation.through)
+@receiver(m2m_changed, sender=Doctor.specialization.through)
+@receiver(m2m_changed, sender=Doctor.available_time.through)
+def invalidate_doctor_cache(sender, action, **kwargs):
+    if action in ("post_add", "post_remove", "post_clear"):
+        cache.invalidate(Doctor)
+
+
+# the User fields doctor payloads render (user and name)
+DOCTOR_USER_FIELDS = {'username', 'first_name', 'last_name'}
+
+
+@receiver(post_save, sender=User)
+def invalidate_doctor_user_cache(sender, instance, created=False, update_fields=None, **kwargs):
+    # doctor payloads show the user; registrations, last_login/password saves and patient users
+    # don't affect them. Deleting a doctor's user cascades to the Doctor row, which invalidates.
+    if created or (update_fields is not None and not DOCTOR_USER_FIELDS & set(update_fields)):
+        return
+    if Doctor.objects.filter(user_id=instance.pk).exists():
+        cache.invalidate(User)
+
+
+@receiver(post_save, sender=UserProfile)
+@receiver(post_delete, sender=UserProfile)
+@receiver(post_save, sender=Patient)
+@receiver(post_delete, sender=Patient)
+@receiver(post_save, sender=Doctor)
+@receiver(post_delete, sender=Doctor)
+def invalidate_role_claims(sender, instance, **kwargs):
+    """A role or profile change makes the role claims in the user's outstanding tokens stale."""
+    if sender in (Patient, Doctor) and kwargs.get('created') is False:
+        return
+    invalidate_claims(instance.user_id)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_user_claims(sender, instance, created=False, update_fields=None, **kwargs):
+    # is_staff / is_active / username are carried in the token too; last_login-only saves don't matter
+    if created or (update_fields and set(update_fields) <= {'last_login'}):
+        return
+    invalidate_claims(instance.pk)
+
+
+@receiver(post_save, sender=BlacklistedToken)
+def announce_blacklisted_token(sender, instance, created, **kwargs):
+    if created:
+        publish_blacklisted(instance.pk)
@@ -0,0 +1,19 @@
+"""
+The slim runtime (settings.SLIM_RUNTIME) for serverless cold starts.
+
+URL confs that API requests rarely need (the admin, the schema / docs views, djoser's user
+endpoints) are included with `include_urls`, which in the slim runtime leaves the module to be
+imported when a URL under its prefix is first resolved, or when reverse() first needs the whole
+URL tree. The admin is installed as SimpleAdminConfig there, so the apps' admin modules are only
+autodiscovered by DocEra_Health_api.admin_urls.
+"""
+from django.conf import settings
+from django.urls import URLResolver, include, path
+from django.urls.resolvers import RoutePattern
+
+
+def include_urls(route, urlconf):
+    """path(route, include(urlconf)), imported on first use in the slim runtime."""
+    if not settings.SLIM_RUNTIME:
+        return path(route, include(urlconf))
+    return URLResolver(RoutePattern(route, is_endpoint=False), urlconf)
@@ -0,0 +1,153 @@
+"""
+Slow-query log.
+
+An execute wrapper on every connection (installed by CoreConfig.ready when SLOW_QUERY_MS is set)
+times each query; those slower than SLOW_QUERY_MS are logged to the `core.slow_queries` logger
+and aggregated in core.models.SlowQuery by fingerprint, i.e. the statement with its literals,
+placeholders and IN lists normalized away. The first occurrence of a fingerprint also stores the
+planner's view of it (EXPLAIN, or EXPLAIN QUERY PLAN on SQLite); EXPLAIN without ANALYZE doesn't
+run the statement.
+
+Occurrences are written in the caller's transaction, so those of a rolled back transaction are lost.
+Report with `manage.py slow_queries` or on the SlowQuery admin page.
+"""
+import contextvars
+import hashlib
+import logging
+import re
+import time
+
+from django.conf import settings
+from django.db import DatabaseError, connections, transaction
+from django.db.backends.signals import connection_created
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+# set while a slow query is being recorded, so the recording queries aren't timed themselves
+recording = contextvars.ContextVar('recording_slow_query', default=False)
+
+EXPLAINABLE = ('select', 'with', 'insert', 'update', 'delete')
+MAX_STATEMENT_LENGTH = 10_000
+
+STRING_RE = re.compile(r"'(?:[^']|'')*'")
+NUMBER_RE = re.compile(r"\b\d+(?:\.\d+)?\b")
+PLACEHOLDER_RE = re.compile(r"%s|\?")
+IN_LIST_RE = re.compile(r"\bIN\s*\(\s*\?(?:\s*,\s*\?)*\s*\)", re.IGNORECASE)
+SPACE_RE = re.compile(r"\s+")
+
+
+def normalize(sql):
+    """The query shape: literals and placeholders as ?, IN lists of any length as IN (...)."""
+    shape = STRING_RE.sub('?', sql)
+    shape = NUMBER_RE.sub('?', shape)
+    shape = PLACEHOLDER_RE.sub('?', shape)
+    shape = IN_LIST_RE.sub('IN (...)', shape)
+    return SPACE_RE.sub(' ', shape).strip()
+
+
+def fingerprint(statement, alias):
+    return hashlib.sha1(f"{alias}:{statement}".encode()).hexdigest()
+
+
+def current_view():
+    request = metrics.current_request.get()
+    return metrics.request_view(request) if request is not None else ''
+
+
+def log_slow_query(execute, sql, params, many, context):
+    if recording.get():
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    result = execute(sql, params, many, context)
+    duration_ms = (time.perf_counter() - started) * 1000
+    if duration_ms >= settings.SLOW_QUERY_MS:
+        token = recording.set(True)
+        connection = context['connection']
+        try:
+            # in a savepoint, so a failure doesn't break the caller's transaction (PostgreSQL)
+            with transaction.atomic(using=connection.alias):
+                record(connection, sql, params, many, duration_ms)
+        except DatabaseError:
+            # e.g. the log table isn't migrated yet; never fail the query being logged
+            logger.exception("Could not record a slow query")
+        finally:
+            recording.reset(token)
+    return result
+
+
+def record(connection, sql, params, many, duration_ms):
+    from .models import SlowQuery
+
+    view = current_view()
+    statement = normalize(sql)
+    key = fingerprint(statement, connection.alias)
+    logger.warning("Slow query (%.1f ms) in %s: %s", duration_ms, view or '-', sql[:500])
+
+    now = timezone.now()
+    updated = SlowQuery.objects.using(connection.alias).filter(fingerprint=key).update(
+        count=F('count') + 1,
+        total_ms=F('total_ms') + duration_ms,
+        max_ms=Greatest('max_ms', duration_ms),
+        last_seen=now,
+        view=view,
+        example=sql[:MAX_STATEMENT_LENGTH],
+    )
+    if updated:
+        return
+    SlowQuery.objects.using(connection.alias).get_or_create(
+        fingerprint=key,
+        defaults={
+            'database': connection.alias,
+            'statement': statement[:MAX_STATEMENT_LENGTH],
+            'example': sql[:MAX_STATEMENT_LENGTH],
+            'view': view,
+            'count': 1,
+            'total_ms': duration_ms,
+            'max_ms': duration_ms,
+            'first_seen': now,
+            'last_seen': now,
+            'plan': explain(connection, sql, params[0] if many and params else params),
+        },
+    )
+
+
+def explain(connection, sql, params):
+    if not sql.lstrip().lower().startswith(EXPLAINABLE):
+        return ''
+    prefix = connection.ops.explain_query_prefix()
+    try:
+        with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+            cursor.execute(f"{prefix} {sql}", params)
+            rows = cursor.fetchall()
+    except DatabaseError as exc:
+        return f"EXPLAIN failed: {exc}"
+    if connection.vendor == 'sqlite':
+        return format_sqlite_plan(rows)
+    return '\n'.join(' | '.join(str(column) for column in row) for row in rows)
+
+
+def format_sqlite_plan(rows):
+    """EXPLAIN QUERY PLAN rows (id, parent, notused, detail) as an indented tree."""
+    depth = {0: -1}
+    lines = []
+    for node, parent, _, detail in rows:
+        depth[node] = depth.get(parent, -1) + 1
+        lines.append('  ' * depth[node] + detail)
+    return '\n'.join(lines)
+
+
+def add_slow_query_log(sender, connection, **kwargs):
+    # connection_created fires again each time a closed connection object reconnects
+    if log_slow_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(log_slow_query)
+
+
+def install():
+    connection_created.connect(add_slow_query_log, weak=False, dispatch_uid='core.slow_queries.add_slow_query_log')
+    for connection in connections.all(initialized_only=True):
+        add_slow_query_log(None, connection)
@@ -0,0 +1,92 @@
+"""
+Cold-start measurements for the serverless deployment (vercel.json runs DocEra_Health_api/wsgi.py).
+
+Each measurement starts a fresh interpreter that imports the WSGI application (settings, .env,
+INSTALLED_APPS, middleware) and resolves one URL (the root urlconf and the views it imports), i.e.
+what a cold lambda does before it can serve its first request. `profile` runs it under
+`python -X importtime` to attribute the time to modules, apps and packages; `manage.py
+startup_profile` reports both and, with --budget-ms, holds the slim runtime (SLIM_RUNTIME) to
+STARTUP_BUDGET_MS; core.tests checks that it leaves the lazy modules unloaded, and the budget too
+with STARTUP_BUDGET_CHECK (CI).
+"""
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+from django.apps import apps
+from django.conf import settings
+
+# imported on first use in the slim runtime (see core.slim); a cold start must not load them
+LAZY_MODULES = (
+    'django.contrib.auth.admin',
+    'appointment.admin',
+    'core.admin',
+    'drf_spectacular.generators',
+    'drf_spectacular.views',
+    'djoser.views',
+    'djoser.serializers',
+)
+
+SCRIPT = """
+import json, os, sys, time
+started = time.perf_counter()
+from DocEra_Health_api.wsgi import application
+from django.urls import resolve
+resolve(sys.argv[1])
+seconds = time.perf_counter() - started
+print(json.dumps({{
+    'seconds': seconds,
+    'loaded': [name for name in {lazy!r} if name in sys.modules],
+}}))
+"""
+
+
+def run(path='/doctor/list/', slim=None, importtime=False):
+    """Cold-start one interpreter; returns (its report, the -X importtime lines)."""
+    environment = dict(os.environ, DJANGO_SETTINGS_MODULE=settings.SETTINGS_MODULE)
+    if slim is not None:
+        environment['DJANGO_SLIM_RUNTIME'] = 'true' if slim else 'false'
+    command = [sys.executable, *(['-X', 'importtime'] if importtime else []), '-c', SCRIPT.format(lazy=LAZY_MODULES), path]
+    result = subprocess.run(command, cwd=settings.BASE_DIR, env=environment, capture_output=True, text=True)
+    if result.returncode:
+        raise RuntimeError(f"Cold start failed:\n{result.stderr[-2000:]}")
+    return json.loads(result.stdout.splitlines()[-1]), result.stderr.splitlines()
+
+
+def measure(repeat=5, **options):
+    """Median cold-start seconds over `repeat` interpreters, and the lazy modules they loaded."""
+    reports = [run(**options)[0] for _ in range(repeat)]
+    return statistics.median(report['seconds'] for report in reports), reports[-1]['loaded']
+
+
+def parse_importtime(lines):
+    """[(module, self_us, cumulative_us)] from `-X importtime` output."""
+    modules = []
+    for line in lines:
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        modules.append((name.strip(), int(self_us), int(cumulative_us)))
+    return modules
+
+
+def owner(module, app_modules):
+    """The installed app (longest matching package) a module belongs to, else its top-level package."""
+    for app_module in app_modules:
+        if module == app_module or module.startswith(app_module + '.'):
+            return app_module
+    return module.split('.')[0]
+
+
+def profile(path='/doctor/list/', slim=None):
+    """One cold start under -X importtime: its report, the modules, and self time per app / package."""
+    report, lines = run(path, slim, importtime=True)
+    modules = parse_importtime(lines)
+    app_modules = sorted((config.name for config in apps.get_app_configs()), key=len, reverse=True)
+    groups = {}
+    for name, self_us, _ in modules:
+        group = owner(name, app_modules)
+        groups[group] = groups.get(group, 0) + self_us
+    return report, modules, groups
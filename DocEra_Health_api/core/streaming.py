@@ -0,0 +1,33 @@
+"""
+Streaming response bodies that stay streamed under ASGI (asgi.py).
+
+Django's ASGI handler reads a StreamingHttpResponse with a sync iterator by running `list()` on it
+in a thread, so an export or a media file would be built in memory before its first byte went
+out. `for_request` gives such responses an async iterator instead, which pulls one chunk at a
+time through sync_to_async, in the thread the view ran in (the same database connection for a
+server-side cursor). Under WSGI the response is left as it is.
+"""
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+
+
+async def async_chunks(chunks):
+    """`chunks` (a sync iterator of bytes) as an async iterator, one chunk per thread hop."""
+    chunks = iter(chunks)
+    pull = sync_to_async(next)
+    try:
+        while (chunk := await pull(chunks, None)) is not None:
+            yield chunk
+    finally:
+        close = getattr(chunks, 'close', None)
+        if close is not None:
+            await sync_to_async(close)()
+
+
+def for_request(request, response):
+    """`response`, with its sync streaming content pulled chunk by chunk when served over ASGI."""
+    # DRF wraps the HttpRequest
+    request = getattr(request, '_request', request)
+    if isinstance(request, ASGIRequest) and response.streaming and not response.is_async:
+        response.streaming_content = async_chunks(response.streaming_content)
+    return response
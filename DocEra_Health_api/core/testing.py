@@ -0,0 +1,26 @@
+from django.db import connection
+
+
+class QueryPlanMixin:
+    """
+    assertUsesIndex for TestCase: checks the planner's EXPLAIN of a queryset names the index.
+    On PostgreSQL sequential scans are disabled for the test, as the planner would rightly
+    prefer them on the few rows of a test database.
+    """
+
+    def setUp(self):
+        super().setUp()
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                # SET LOCAL ends with the test's transaction
+                cursor.execute('SET LOCAL enable_seqscan = off')
+
+    def assertUsesIndex(self, queryset, index_name):
+        plan = queryset.explain()
+        self.assertIn(index_name, plan, f"{index_name} not used by:\n{queryset.query}\nPlan:\n{plan}")
+        return plan
+
+    def assertNoSort(self, plan):
+        """The rows come in index order: no sort step in the plan."""
+        marker = 'Sort' if connection.vendor == 'postgresql' else 'TEMP B-TREE FOR ORDER BY'
+        self.assertNotIn(marker, plan)
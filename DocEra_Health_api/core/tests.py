@@ -1,3 +1,516 @@
-from django.test import TestCase
+import base64
+import csv
+import gzip
+import io
+import json
+import tempfile
+from datetime import timedelta
+from unittest import skipUnless
+from urllib.parse import urlencode
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import User
+from django.conf import settings
+from django.core import mail
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.core.mail import EmailMessage
+from django.core.mail.backends import locmem
+from django.db import connection
+from django.test import AsyncRequestFactory, RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from PIL import Image
+from rest_framework.serializers import BaseSerializer, ListSerializer
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.tokens import AccessToken
+
+from appointment.models import Appointment
+from contact_us.models import ContactUs
+from doctor.models import Doctor, Review
+from patient.models import Patient
+from . import exports, images, media, metrics, schema, startup, views
+from .authentication import ClaimsJWTAuthentication
+from .mail import OutboxBackend, claim_batch, deliver_batch
+from .models import OutboxEmail, UserProfile
+from .revocation import IN_FLIGHT_KEY, BloomFilter, is_revoked, revocations
+from .testing import QueryPlanMixin
+from .serializers import TokenObtainPairSerializer
+
+
+class ExportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        patient = User.objects.create(username='patient', first_name='Pat', last_name='Lee').patient
+        doctor = Doctor.objects.create(user=User.objects.create(username='doctor', first_name='Doc'))
+        for status, cancel in [('Pending', False), ('Pending', True), ('Completed', False)]:
+            Appointment.objects.create(
+                patient=patient, doctor=doctor, appointment_type='Online',
+                appointment_status=status, symptom='Cough, dry', cancel=cancel,
+            )
+        ContactUs.objects.create(name='Rahim', phone='0170', problem='Line one\nline two')
+
+    def export(self, kind, fmt='csv', compress=False, **filters):
+        export = exports.EXPORTS[kind]
+        return b''.join(exports.stream(export, export.rows(chunk_size=2, **filters), fmt, compress))
+
+    def test_csv_in_one_query(self):
+        with self.assertNumQueries(1):
+            rows = list(csv.DictReader(io.StringIO(self.export('appointments').decode())))
+        self.assertEqual(len(rows), 3)
+        self.assertEqual((rows[0]['patient_name'], rows[0]['symptom'], rows[0]['slot_date']), ('Pat Lee', 'Cough, dry', ''))
+
+        rows = list(csv.DictReader(io.StringIO(self.export('contacts').decode())))
+        self.assertEqual(rows[0]['problem'], 'Line one\nline two')
+
+    def test_gzipped_ndjson_with_filters(self):
+        body = gzip.decompress(self.export('appointments', 'ndjson', compress=True, status='Pending', cancel='false'))
+        records = [json.loads(line) for line in body.splitlines()]
+        self.assertEqual([(record['status'], record['cancel']) for record in records], [('Pending', False)])
+
+    async def test_asgi_exports_are_pulled_chunk_by_chunk(self):
+        admin = await User.objects.acreate(username='admin', is_staff=True)
+        token = AccessToken.for_user(admin)
+        response = await self.async_client.get('/core/export/appointments/', headers={'Authorization': f'Bearer {token}'})
+        self.assertEqual(response.status_code, 200)
+        # an async iterator: the ASGI handler would list() a sync one before sending anything
+        self.assertTrue(response.is_async)
+        chunks = [chunk async for chunk in response.streaming_content]
+        self.assertEqual(chunks[0], b'id,created,patient_id,patient_name,doctor_id,doctor_name,type,status,cancel,symptom,time,slot_date,slot_start\r\n')
+        self.assertEqual(len(list(csv.reader(io.StringIO(b''.join(chunks).decode())))), 4)
+
+    def test_rejects_unsupported_filters(self):
+        with self.assertRaises(ValueError):
+            exports.EXPORTS['contacts'].rows(status='Pending')
+        with self.assertRaises(ValueError):
+            exports.EXPORTS['appointments'].rows(status='Lost')
+        with self.assertRaises(ValueError):
+            exports.EXPORTS['patients'].rows(since='2026-13-01')
+
+
+class SchemaArtifactTests(TestCase):
+    def test_committed_schema_matches_code(self):
+        rendered, clean = schema.generate()
+        self.assertTrue(clean, "drf-spectacular reported warnings or errors")
+        for fmt, content in rendered.items():
+            self.assertEqual(
+                schema.artifact_path(fmt).read_bytes(), content,
+                f"{schema.artifact_path(fmt).name} is stale; run `manage.py build_schema`.",
+            )
+
+    def test_serves_compressed_artifact_with_etag(self):
+        factory = RequestFactory()
+        response = views.schema_view(factory.get('/api/schema/?format=json', HTTP_ACCEPT_ENCODING='gzip'))
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(json.loads(gzip.decompress(response.content))['openapi'], '3.0.3')
+
+        cached = views.schema_view(factory.get(
+            '/api/schema/?format=json', HTTP_ACCEPT_ENCODING='gzip', HTTP_IF_NONE_MATCH=response['ETag'],
+        ))
+        self.assertEqual(cached.status_code, 304)
+
+
+class StartupBudgetTests(SimpleTestCase):
+    def test_slim_cold_start_defers_rarely_used_modules(self):
+        # the time depends on the machine: see test_slim_cold_start_within_budget
+        report, _ = startup.run(slim=True)
+        self.assertEqual(report['loaded'], [], "Profile the regression with `manage.py startup_profile --slim`.")
+
+    @skipUnless(settings.STARTUP_BUDGET_CHECK, "wall-clock budget: set STARTUP_BUDGET_CHECK on a quiet machine")
+    def test_slim_cold_start_within_budget(self):
+        seconds, _ = startup.measure(repeat=5, slim=True)
+        self.assertLess(
+            seconds * 1000, settings.STARTUP_BUDGET_MS,
+            "Profile the regression with `manage.py startup_profile --slim`.",
+        )
+
+
+@skipUnless(connection.vendor == 'sqlite' and settings.SQLITE_TUNING, "SQLite tuning is off")
+class SQLiteTuningTests(TestCase):
+    def test_connections_are_tuned_on_connect(self):
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA synchronous')
+            self.assertEqual(cursor.fetchone()[0], 1)  # NORMAL
+            cursor.execute('PRAGMA busy_timeout')
+            self.assertEqual(cursor.fetchone()[0], settings.SQLITE_BUSY_TIMEOUT * 1000)
+        self.assertEqual(connection.transaction_mode, 'IMMEDIATE' if settings.SQLITE_IMMEDIATE_TRANSACTIONS else None)
+
+
+class KeysetPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        patient = User.objects.create(username='patient').patient
+        doctor = Doctor.objects.create(user=User.objects.create(username='doctor'))
+        for _ in range(7):
+            Review.objects.create(reviewer=patient, doctor=doctor, body='Good', rating='⭐⭐⭐')
+        # every review shares the first sort key
+        Review.objects.update(created=Review.objects.first().created)
+        cls.ids = sorted(Review.objects.values_list('id', flat=True), reverse=True)
+
+    def test_cursor_walk_is_stable_with_duplicate_sort_keys(self):
+        client = APIClient()
+        seen = []
+        url = '/doctor/reviews/?page_size=2'
+        while url:
+            page = client.get(url).json()
+            seen.extend(review['id'] for review in page['results'])
+            url = page['next']
+        self.assertEqual(seen, self.ids)
+
+        # and back again from the last page
+        last = client.get('/doctor/reviews/?page_size=2').json()
+        while last['next']:
+            last = client.get(last['next']).json()
+        self.assertEqual([review['id'] for review in client.get(last['previous']).json()['results']], self.ids[4:6])
+
+    def test_lists_are_paginated_by_default(self):
+        client = APIClient()
+        page = client.get('/doctor/reviews/').json()
+        self.assertEqual([review['id'] for review in page['results']], self.ids)
+        self.assertIsNone(page['next'])
+        page = client.get('/doctor/reviews/?page_size=1000').json()
+        self.assertEqual(len(page['results']), 7)
+        page = client.get('/doctor/reviews/?page=2&page_size=5').json()
+        self.assertEqual((page['count'], [review['id'] for review in page['results']]), (7, self.ids[5:]))
+
+    def test_cursors_with_bad_position_values_are_rejected(self):
+        client = APIClient()
+        for position in (['abc', 'x'], [{'a': 1}, 1], [None, None], ['2026-01-01T00:00:00+00:00', 'x'], [1]):
+            # well-formed cursors, as the next/previous links encode them, around tampered values
+            cursor = base64.b64encode(urlencode({'p': json.dumps(position)}).encode()).decode()
+            with self.subTest(position=position):
+                self.assertEqual(client.get('/doctor/reviews/', {'cursor': cursor}).status_code, 404)
+
+
+class StatusRecordingBackend(locmem.EmailBackend):
+    """Delivery backend noting the outbox statuses each send sees."""
+    seen = []
+
+    def send_messages(self, messages):
+        self.seen.append(sorted(OutboxEmail.objects.values_list('status', flat=True)))
+        return super().send_messages(messages)
+
+
+class FailingBackend(locmem.EmailBackend):
+    def send_messages(self, messages):
+        raise ConnectionError('mail server went away')
+
+
+@override_settings(OUTBOX_DELIVERY_BACKEND='core.tests.StatusRecordingBackend')
+class OutboxTests(TestCase):
+    def queue(self, subject='Appointment', **kwargs):
+        OutboxBackend().send_messages([EmailMessage(subject, 'Body', 'clinic@example.com', ['patient@example.com'], **kwargs)])
+
+    def setUp(self):
+        StatusRecordingBackend.seen = []
+
+    def test_claimed_rows_are_sent_outside_the_claim_and_recorded(self):
+        self.queue('First')
+        self.queue('Second')
+        self.assertEqual(deliver_batch(10), (2, 0))
+        # both rows were already claimed when the first message went out
+        self.assertEqual(StatusRecordingBackend.seen[0], ['sending', 'sending'])
+        self.assertEqual(sorted(message.subject for message in mail.outbox), ['First', 'Second'])
+        self.assertEqual(set(OutboxEmail.objects.values_list('status', 'attempts')), {('sent', 1)})
+
+    def test_claimed_rows_are_skipped_until_the_lease_runs_out(self):
+        self.queue()
+        self.assertEqual(len(claim_batch(10)), 1)
+        self.assertEqual(claim_batch(10), [])
+        OutboxEmail.objects.update(next_attempt_at=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(len(claim_batch(10)), 1)
+
+    @override_settings(OUTBOX_DELIVERY_BACKEND='core.tests.FailingBackend')
+    def test_failed_sends_go_back_to_pending_for_a_retry(self):
+        self.queue()
+        self.assertEqual(deliver_batch(10), (0, 1))
+        email = OutboxEmail.objects.get()
+        self.assertEqual((email.status, email.attempts), ('pending', 1))
+        self.assertGreater(email.next_attempt_at, timezone.now())
+        self.assertIn('mail server went away', email.last_error)
+
+    def test_attachments_are_queued_and_delivered(self):
+        self.queue(attachments=[('receipt.pdf', b'%PDF-1.4 receipt', 'application/pdf')])
+        deliver_batch(10)
+        self.assertEqual(mail.outbox[0].attachments, [('receipt.pdf', b'%PDF-1.4 receipt', 'application/pdf')])
+
+
+class RosterImportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create(username='admin', is_staff=True)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def upload(self, content, query=''):
+        upload = SimpleUploadedFile('roster.csv', content, content_type='text/csv')
+        return self.client.post(f'/core/import/patients/{query}', {'file': upload})
+
+    def test_chunk_size_is_bounded(self):
+        for chunk_size in ('0', '5001', 'ten', '-1'):
+            response = self.upload(b'username\nada\n', f'?chunk_size={chunk_size}')
+            self.assertEqual(response.status_code, 400)
+            self.assertIn('chunk_size', response.json())
+
+    def test_rows_are_checked_like_the_patient_api(self):
+        report = self.upload(
+            b'username,email,mobile_no\n'
+            b'ada,ada@example.com,+8801712345678\n'
+            b'bob,not-an-email,+8801712345679\n'
+            b'cy,cy@example.com,01712345678\n'
+        ).json()
+        self.assertEqual((report['created'], report['failed']), (1, 2))
+        self.assertEqual([error['errors'] for error in report['errors']], [
+            {'email': "Enter a valid email address."},
+            {'mobile_no': "Invalid mobile number format."},
+        ])
+        self.assertEqual(Patient.objects.get(user__username='ada').mobile_no, '+8801712345678')
+
+    def test_invalid_utf8_is_reported_after_importing_the_rows_before_it(self):
+        rows = b''.join(b'user%d,+8801%09d\n' % (number, number) for number in range(2000))
+        response = self.upload(b'username,mobile_no\n' + rows + b'bad\xff,+8801712345678\n', '?chunk_size=500')
+        self.assertEqual(response.status_code, 200)
+        report = response.json()
+        self.assertGreater(report['created'], 0)
+        self.assertEqual(report['failed'], 1)
+        self.assertIn('not valid UTF-8', report['errors'][0]['errors']['non_field_errors'])
+        self.assertEqual(report['errors'][0]['row'], report['processed'] + 1)
+
+
+@override_settings(JWT_TRUST_CLAIMS=True)
+class ClaimsAuthenticationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username='patient', is_active=True)
+
+    def setUp(self):
+        # the sign-up itself marked the claims as changed; issue tokens after it
+        UserProfile.objects.filter(user=self.user).update(claims_changed_at=timezone.now() - timedelta(minutes=1))
+        cache.clear()
+
+    def authenticate(self, token=None):
+        token = token or TokenObtainPairSerializer.get_token(self.user).access_token
+        request = RequestFactory().get('/', HTTP_AUTHORIZATION=f'Bearer {token}')
+        return ClaimsJWTAuthentication().authenticate(request)[0]
+
+    def test_current_claims_authenticate_without_loading_the_user(self):
+        token = TokenObtainPairSerializer.get_token(self.user).access_token
+        # the marker is read from the profile once, then from the cache
+        with self.assertNumQueries(1):
+            self.authenticate(token)
+        with self.assertNumQueries(0):
+            user = self.authenticate(token)
+        self.assertEqual(user.token_claims, {'role': 'patient', 'patient_id': self.user.patient.pk, 'doctor_id': None})
+
+    def test_becoming_a_doctor_falls_back_to_the_database(self):
+        token = TokenObtainPairSerializer.get_token(self.user).access_token
+        Doctor.objects.create(user=self.user)
+        # an evicted marker is reloaded from the profile rather than forgotten
+        cache.clear()
+        user = self.authenticate(token)
+        self.assertFalse(hasattr(user, 'token_claims'))
+        self.assertEqual(user.profile.role, 'doctor')
+
+    def test_deleted_users_are_not_rebuilt_from_their_tokens(self):
+        token = TokenObtainPairSerializer.get_token(self.user).access_token
+        User.objects.filter(pk=self.user.pk).delete()
+        cache.clear()
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate(token)
+
+    @override_settings(JWT_TRUST_CLAIMS=False)
+    def test_trust_can_be_switched_off(self):
+        token = TokenObtainPairSerializer.get_token(self.user).access_token
+        with self.assertNumQueries(1):
+            user = self.authenticate(token)
+        self.assertFalse(hasattr(user, 'token_claims'))
+
+
+class RevocationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username='patient')
+
+    def setUp(self):
+        # the filter is only used with a cache other processes share; a file cache is one
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.enterContext(override_settings(CACHES={
+            'default': {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': directory.name},
+        }))
+        revocations.reset()
+
+    def token(self, jti, expires_in=timedelta(days=1), blacklisted=False):
+        token = OutstandingToken.objects.create(
+            user=self.user, jti=jti, token=jti, created_at=timezone.now(), expires_at=timezone.now() + expires_in,
+        )
+        if blacklisted:
+            BlacklistedToken.objects.create(token=token)
+        return token
+
+    def test_bloom_filter_membership(self):
+        bloom = BloomFilter(1000)
+        for number in range(1000):
+            bloom.add(f'jti-{number}')
+        self.assertTrue(all(f'jti-{number}' in bloom for number in range(1000)))
+        false_positives = sum(f'other-{number}' in bloom for number in range(10000))
+        self.assertLess(false_positives, 50)
+
+    def test_filter_misses_are_answered_without_the_database(self):
+        self.token('revoked', blacklisted=True)
+        # long committed: nothing in flight any more
+        cache.delete(IN_FLIGHT_KEY)
+        self.assertTrue(is_revoked('revoked'))
+        with self.assertNumQueries(0):
+            self.assertFalse(is_revoked('live'))
+
+    def test_misses_are_not_trusted_while_a_blacklisting_is_in_flight(self):
+        self.assertFalse(is_revoked('rotated'))
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.token('rotated', blacklisted=True)
+        # committed, not yet published: the table answers
+        self.assertTrue(is_revoked('rotated'))
+        for callback in callbacks:
+            callback()
+        cache.delete(IN_FLIGHT_KEY)
+        self.assertTrue(is_revoked('rotated'))
+        with self.assertNumQueries(0):
+            self.assertFalse(is_revoked('live'))
+
+    def test_without_a_shared_cache_every_check_reads_the_table(self):
+        with override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}):
+            self.assertFalse(is_revoked('elsewhere'))
+            # blacklisted by another process, which can't tell this one
+            self.token('elsewhere', blacklisted=True)
+            with self.assertNumQueries(1):
+                self.assertTrue(is_revoked('elsewhere'))
+
+    def test_prune_deletes_expired_tokens_in_batches(self):
+        for number in range(5):
+            self.token(f'expired-{number}', expires_in=-timedelta(days=1), blacklisted=number < 2)
+        self.token('live', blacklisted=True)
+        out = io.StringIO()
+        call_command('prune_tokens', batch_size=2, stdout=out)
+        self.assertEqual(out.getvalue().count('Batch:'), 3)
+        self.assertIn('Pruned 5 outstanding and 2 blacklisted tokens.', out.getvalue())
+        self.assertEqual(list(OutstandingToken.objects.values_list('jti', flat=True)), ['live'])
+        self.assertTrue(is_revoked('live'))
+
+
+class ImageVariantQueueTests(QueryPlanMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        self.enterContext(override_settings(MEDIA_ROOT=media.name, IMAGE_VARIANT_SIZES={'thumb': 8}))
+        self.patient = User.objects.create(username='patient').patient
+
+    def upload(self, name):
+        buffer = io.BytesIO()
+        Image.new('RGB', (32, 24), 'teal').save(buffer, 'JPEG')
+        self.patient.image = SimpleUploadedFile(name, buffer.getvalue(), content_type='image/jpeg')
+        self.patient.save()
+
+    def test_queue_is_read_through_the_partial_index(self):
+        self.upload('a.jpg')
+        self.assertEqual(list(images.pending(Patient)), [self.patient])
+        self.assertUsesIndex(images.pending(Patient).order_by('pk'), 'patient_patient_pending')
+
+    def test_processing_dequeues_and_a_new_image_requeues(self):
+        self.upload('a.jpg')
+        self.assertEqual(images.process_pending(10), (1, 0))
+        self.patient.refresh_from_db()
+        self.assertFalse(self.patient.variants_pending)
+        self.assertEqual(self.patient.image_variants['variants']['thumb']['width'], 8)
+        self.assertFalse(images.pending(Patient).exists())
+
+        self.upload('b.jpg')
+        self.assertEqual(list(images.pending(Patient)), [self.patient])
+
+
+class MediaServingTests(SimpleTestCase):
+    def setUp(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        self.enterContext(override_settings(MEDIA_ROOT=media.name, MEDIA_ACCEL_REDIRECT=''))
+        with open(f'{media.name}/notes.txt', 'wb') as handle:
+            handle.write(b'0123456789')
+        open(f'{media.name}/empty.txt', 'wb').close()
+
+    def get(self, name, **headers):
+        return self.client.get(f'/media/{name}', headers=headers)
+
+    def test_single_ranges(self):
+        for header, content_range, body in [
+            ('bytes=2-5', 'bytes 2-5/10', b'2345'),
+            ('bytes=7-', 'bytes 7-9/10', b'789'),
+            ('bytes=-3', 'bytes 7-9/10', b'789'),
+            ('bytes=-50', 'bytes 0-9/10', b'0123456789'),
+            ('bytes=8-100', 'bytes 8-9/10', b'89'),
+        ]:
+            response = self.get('notes.txt', Range=header)
+            self.assertEqual(response.status_code, 206, header)
+            self.assertEqual(response['Content-Range'], content_range)
+            self.assertEqual(b''.join(response.streaming_content), body)
+
+    async def test_asgi_responses_are_read_chunk_by_chunk(self):
+        for headers, body in [({}, b'0123456789'), ({'Range': 'bytes=2-5'}, b'2345')]:
+            response = await sync_to_async(media.serve)(AsyncRequestFactory().get('/media/notes.txt', headers=headers), 'notes.txt')
+            self.assertTrue(response.is_async, headers)
+            self.assertEqual(b''.join([chunk async for chunk in response.streaming_content]), body)
+            await sync_to_async(response.close)()
+
+    def test_unsatisfiable_ranges(self):
+        for name, header, size in [('notes.txt', 'bytes=10-', 10), ('notes.txt', 'bytes=-0', 10), ('empty.txt', 'bytes=-5', 0), ('empty.txt', 'bytes=0-', 0)]:
+            response = self.get(name, Range=header)
+            self.assertEqual(response.status_code, 416, (name, header))
+            self.assertEqual(response['Content-Range'], f'bytes */{size}')
+
+    def test_ignored_ranges_send_the_whole_file(self):
+        etag = self.get('notes.txt')['ETag']
+        for headers in [{'Range': 'bytes=0-1,4-5'}, {'Range': 'lines=1-2'}, {'Range': 'bytes=0-1', 'If-Range': '"stale"'}]:
+            response = self.get('notes.txt', **headers)
+            self.assertEqual(response.status_code, 200, headers)
+            self.assertEqual(b''.join(response.streaming_content), b'0123456789')
+        self.assertEqual(self.get('notes.txt', Range='bytes=0-1', **{'If-Range': etag}).status_code, 206)
+
+    def test_conditional_requests(self):
+        response = self.get('notes.txt')
+        etag, last_modified = response['ETag'], response['Last-Modified']
+        self.assertEqual(self.get('notes.txt', **{'If-None-Match': etag}).status_code, 304)
+        self.assertEqual(self.get('notes.txt', **{'If-Modified-Since': last_modified}).status_code, 304)
+        self.assertEqual(self.get('notes.txt', **{'If-Match': '"other"'}).status_code, 412)
+        self.assertEqual(self.get('notes.txt', **{'If-None-Match': '"other"'}).status_code, 200)
+
+
+@override_settings(PERF_SAMPLE_RATE=1, PERF_SERVER_TIMING=False)
+class PerformanceTimingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.patient = User.objects.create(username='patient').patient
+        cls.staff = User.objects.create(username='staff', is_staff=True)
+        doctor = Doctor.objects.create(user=User.objects.create(username='doctor'))
+        Review.objects.create(reviewer=cls.patient, doctor=doctor, body='Good', rating='⭐⭐⭐')
+
+    def setUp(self):
+        for histogram in metrics.HISTOGRAMS:
+            histogram.reset()
+        self.client = APIClient()
+
+    def test_server_timing_is_sent_to_staff_only(self):
+        self.client.force_authenticate(self.patient.user)
+        self.assertNotIn('Server-Timing', self.client.get('/doctor/reviews/?page_size=20'))
+        self.client.force_authenticate(self.staff)
+        timing = self.client.get('/doctor/reviews/?page_size=20')['Server-Timing']
+        self.assertRegex(timing, r'^db;dur=[\d.]+;desc="\d+ queries", serialize;dur=[\d.]+;desc="0 queries", total;dur=')
+
+    def test_serialization_is_timed_by_the_views_not_by_patching_drf(self):
+        self.client.get('/doctor/reviews/?page_size=20')
+        self.assertEqual(metrics.SERIALIZE_SECONDS.series[('ReviewViewset.list',)][0][-1], 0)
+        self.assertEqual(sum(metrics.SERIALIZE_SECONDS.series[('ReviewViewset.list',)][0]), 1)
+        self.assertEqual(BaseSerializer.data.fget.__module__, 'rest_framework.serializers')
+        self.assertIn(ListSerializer, metrics.timed_classes)
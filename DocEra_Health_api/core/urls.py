@@ -0,0 +1,9 @@
+from django.urls import path
+from . import views
+
+urlpatterns = [
+    path('cache-stats/', views.CacheStatsView.as_view(), name='cache-stats'),
+    path('import/<str:kind>/', views.RosterImportView.as_view(), name='roster-import'),
+    path('export/<str:kind>/', views.ExportView.as_view(), name='export'),
+    path('metrics/', views.metrics_view, name='metrics'),
+]
@@ -1,3 +1,159 @@
+import io
+
+from django.conf import settings
+from django.http import Http404, HttpResponse, HttpResponseNotModified, StreamingHttpResponse
 from django.shortcuts import render
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.crypto import constant_time_compare
+from django.views.decorators.http import require_safe
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import OpenApiParameter, OpenApiResponse, extend_schema, inline_serializer
+from rest_framework import serializers, status
+from rest_framework.parsers import MultiPartParser
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from . import cache, exports, metrics, schema, streaming
+from .importer import FORMATS, KINDS, MAX_CHUNK_SIZE, RosterImporter, format_for, read_rows
 
 # Create your views here.
+class CacheStatsView(APIView):
+    """Hit/miss counters of the catalog response cache, per viewset."""
+    permission_classes = [IsAdminUser]
+
+    @extend_schema(responses=OpenApiResponse(OpenApiTypes.OBJECT, description="{viewset: {hits, misses}}"))
+    def get(self, request):
+        return Response(cache.stats())
+
+
+class RosterImportView(APIView):
+    """
+    Upload a CSV / NDJSON roster as multipart field "file" to /core/import/<patients|doctors>/.
+    ?format= overrides the format guessed from the file name.
+    """
+    permission_classes = [IsAdminUser]
+    parser_classes = [MultiPartParser]
+
+    @extend_schema(
+        request={'multipart/form-data': inline_serializer('RosterUpload', {'file': serializers.FileField()})},
+        parameters=[
+            OpenApiParameter('format', enum=FORMATS), OpenApiParameter('chunk_size', int),
+        ],
+        responses=inline_serializer('RosterImportReport', {
+            'kind': serializers.ChoiceField(KINDS),
+            'processed': serializers.IntegerField(),
+            'created': serializers.IntegerField(),
+            'failed': serializers.IntegerField(),
+            'seconds': serializers.FloatField(),
+            'rows_per_second': serializers.FloatField(),
+            'errors': serializers.ListField(child=serializers.DictField()),
+            'errors_truncated': serializers.BooleanField(),
+        }),
+    )
+    def post(self, request, kind):
+        upload = request.FILES.get('file')
+        if upload is None:
+            return Response({'file': ['No file was submitted.']}, status=status.HTTP_400_BAD_REQUEST)
+        if kind not in KINDS:
+            return Response({'kind': [f'Expected one of {KINDS}.']}, status=status.HTTP_404_NOT_FOUND)
+        fmt = request.query_params.get('format') or format_for(upload.name)
+        if fmt not in FORMATS:
+            return Response({'format': [f'Expected one of {FORMATS}.']}, status=status.HTTP_400_BAD_REQUEST)
+
+        chunk_size = request.query_params.get('chunk_size', '1000')
+        if not chunk_size.isdigit() or not 1 <= int(chunk_size) <= MAX_CHUNK_SIZE:
+            return Response({'chunk_size': [f'Expected an integer between 1 and {MAX_CHUNK_SIZE}.']}, status=status.HTTP_400_BAD_REQUEST)
+        stream = io.TextIOWrapper(upload.file, encoding='utf-8', newline='')
+        report = RosterImporter(kind, chunk_size=int(chunk_size)).run(read_rows(stream, fmt))
+        return Response(report)
+
+
+class ExportView(APIView):
+    """
+    Stream /core/export/<appointments|patients|contacts>/ as CSV, or NDJSON with ?format=ndjson,
+    gzipped on the fly with ?gzip=true. ?since= / ?until= (YYYY-MM-DD, inclusive) select booking,
+    sign-up or submission days; appointments also filter on ?status=Pending,Running and
+    ?cancel=true|false, patients on ?active=true|false.
+    """
+    permission_classes = [IsAdminUser]
+    FILTERS = ('since', 'until', 'status', 'cancel', 'active')
+
+    def perform_content_negotiation(self, request, force=False):
+        # ?format= names the export format, not a renderer; errors are still rendered as JSON
+        return super().perform_content_negotiation(request, force=True)
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter('format', enum=exports.FORMATS), OpenApiParameter('gzip', bool),
+            OpenApiParameter('since', OpenApiTypes.DATE), OpenApiParameter('until', OpenApiTypes.DATE),
+            OpenApiParameter('status', description="Appointments, e.g. Pending,Running"),
+            OpenApiParameter('cancel', bool, description="Appointments"),
+            OpenApiParameter('active', bool, description="Patients"),
+        ],
+        responses={
+            (200, content_type.split(';')[0]): OpenApiResponse(OpenApiTypes.BINARY)
+            for content_type in [*exports.CONTENT_TYPES.values(), 'application/gzip']
+        },
+    )
+    def get(self, request, kind):
+        export = exports.EXPORTS.get(kind)
+        if export is None:
+            return Response({'kind': [f'Expected one of {exports.KINDS}.']}, status=status.HTTP_404_NOT_FOUND)
+        fmt = request.query_params.get('format', 'csv')
+        if fmt not in exports.FORMATS:
+            return Response({'format': [f'Expected one of {exports.FORMATS}.']}, status=status.HTTP_400_BAD_REQUEST)
+        compress = request.query_params.get('gzip') in ('1', 'true')
+        filters = {name: request.query_params[name] for name in self.FILTERS if request.query_params.get(name)}
+        try:
+            rows = export.rows(**filters)
+        except ValueError as exc:
+            return Response({'filters': [str(exc)]}, status=status.HTTP_400_BAD_REQUEST)
+
+        response = StreamingHttpResponse(
+            exports.stream(export, rows, fmt, compress),
+            content_type='application/gzip' if compress else exports.CONTENT_TYPES[fmt],
+        )
+        response['Content-Disposition'] = f'attachment; filename="{exports.filename(kind, fmt, compress)}"'
+        # don't let a proxy (nginx) buffer the whole export before passing it on
+        response['X-Accel-Buffering'] = 'no'
+        return streaming.for_request(request, response)
+
+
+def metrics_view(request):
+    """
+    The core.metrics histograms in the Prometheus text format. Scrapers send
+    `Authorization: Bearer <METRICS_TOKEN>`; without a token configured it is only served in DEBUG.
+    """
+    token = settings.METRICS_TOKEN
+    if token:
+        if not constant_time_compare(request.headers.get('Authorization', ''), f'Bearer {token}'):
+            raise Http404
+    elif not settings.DEBUG:
+        raise Http404
+    return HttpResponse(metrics.exposition(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+@require_safe
+def schema_view(request):
+    """
+    The precompiled OpenAPI schema (core.schema), YAML or ?format=json, gzip / br encoded, with
+    an ETag for conditional requests. Falls back to live generation when it hasn't been built.
+    """
+    artifact = schema.artifact(schema.negotiate_format(request))
+    if artifact is None:
+        from drf_spectacular.views import SpectacularAPIView
+        return SpectacularAPIView.as_view()(request)
+    encoding = schema.negotiate_encoding(request)
+    etag = artifact.etag(encoding)
+    if etag in request.headers.get('If-None-Match', ''):
+        response = HttpResponseNotModified()
+    else:
+        response = HttpResponse(artifact.body(encoding), content_type=schema.CONTENT_TYPES[artifact.fmt])
+        if encoding != 'identity':
+            response['Content-Encoding'] = encoding
+    response['ETag'] = etag
+    patch_vary_headers(response, ['Accept', 'Accept-Encoding'])
+    # revalidated after a deploy at most this late
+    patch_cache_control(response, public=True, max_age=300)
+    return response
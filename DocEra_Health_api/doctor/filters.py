@@ -0,0 +1,32 @@
+import django_filters
+from rest_framework import filters
+
+from . import models
+from .search import search_by_name
+
+
+class DoctorSearchFilter(django_filters.FilterSet):
+    q = django_filters.CharFilter(method='filter_name')
+    specialization = django_filters.CharFilter(field_name='specialization__slug')
+    designation = django_filters.CharFilter(field_name='designation__slug')
+    available_time = django_filters.NumberFilter(field_name='available_time__id')
+    fee_min = django_filters.NumberFilter(field_name='fee', lookup_expr='gte')
+    fee_max = django_filters.NumberFilter(field_name='fee', lookup_expr='lte')
+    min_rating = django_filters.NumberFilter(field_name='rating__average', lookup_expr='gte')
+
+    class Meta:
+        model = models.Doctor
+        fields = []
+
+    def filter_name(self, queryset, name, value):
+        return search_by_name(queryset, value)
+
+
+class StableOrderingFilter(filters.OrderingFilter):
+    """OrderingFilter that breaks ties on -id, so doctors with equal ratings or fees keep their page."""
+
+    def get_ordering(self, request, queryset, view):
+        ordering = super().get_ordering(request, queryset, view)
+        if ordering and not any(field.lstrip('-') in ('id', 'pk') for field in ordering):
+            ordering = [*ordering, '-id']
+        return ordering
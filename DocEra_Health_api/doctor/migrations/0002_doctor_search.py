@@ -0,0 +1,94 @@
+# Generated by Django 5.2.1 on 2026-10-18 13:20
+
+from django.db import migrations, models
+
+
+SQLITE_FTS = [
+    "CREATE VIRTUAL TABLE doctor_doctor_fts USING fts5(name, tokenize='unicode61 remove_diacritics 2')",
+    """INSERT INTO doctor_doctor_fts(rowid, name)
+       SELECT d.id, u.first_name || ' ' || u.last_name FROM doctor_doctor d JOIN auth_user u ON u.id = d.user_id""",
+    # triggers keep the index in step with doctor rows and user renames, including bulk inserts
+    """CREATE TRIGGER doctor_doctor_fts_ai AFTER INSERT ON doctor_doctor BEGIN
+         INSERT INTO doctor_doctor_fts(rowid, name)
+         SELECT new.id, u.first_name || ' ' || u.last_name FROM auth_user u WHERE u.id = new.user_id;
+       END""",
+    """CREATE TRIGGER doctor_doctor_fts_au AFTER UPDATE OF user_id ON doctor_doctor BEGIN
+         DELETE FROM doctor_doctor_fts WHERE rowid = old.id;
+         INSERT INTO doctor_doctor_fts(rowid, name)
+         SELECT new.id, u.first_name || ' ' || u.last_name FROM auth_user u WHERE u.id = new.user_id;
+       END""",
+    """CREATE TRIGGER doctor_doctor_fts_ad AFTER DELETE ON doctor_doctor BEGIN
+         DELETE FROM doctor_doctor_fts WHERE rowid = old.id;
+       END""",
+    """CREATE TRIGGER doctor_doctor_fts_user_au AFTER UPDATE OF first_name, last_name ON auth_user BEGIN
+         DELETE FROM doctor_doctor_fts WHERE rowid IN (SELECT id FROM doctor_doctor WHERE user_id = new.id);
+         INSERT INTO doctor_doctor_fts(rowid, name)
+         SELECT d.id, new.first_name || ' ' || new.last_name FROM doctor_doctor d WHERE d.user_id = new.id;
+       END""",
+]
+
+SQLITE_FTS_REVERSE = [
+    "DROP TRIGGER IF EXISTS doctor_doctor_fts_user_au",
+    "DROP TRIGGER IF EXISTS doctor_doctor_fts_ad",
+    "DROP TRIGGER IF EXISTS doctor_doctor_fts_au",
+    "DROP TRIGGER IF EXISTS doctor_doctor_fts_ai",
+    "DROP TABLE IF EXISTS doctor_doctor_fts",
+]
+
+POSTGRES_TRGM = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX IF NOT EXISTS doctor_user_first_name_trgm ON auth_user USING gin (first_name gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS doctor_user_last_name_trgm ON auth_user USING gin (last_name gin_trgm_ops)",
+]
+
+POSTGRES_TRGM_REVERSE = [
+    "DROP INDEX IF EXISTS doctor_user_last_name_trgm",
+    "DROP INDEX IF EXISTS doctor_user_first_name_trgm",
+]
+
+
+def sqlite_has_fts5(connection):
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT sqlite_compileoption_used('ENABLE_FTS5')")
+        return bool(cursor.fetchone()[0])
+
+
+def create_name_search(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor == 'postgresql':
+        statements = POSTGRES_TRGM
+    elif connection.vendor == 'sqlite' and sqlite_has_fts5(connection):
+        statements = SQLITE_FTS
+    else:
+        return
+    for statement in statements:
+        schema_editor.execute(statement)
+
+
+def drop_name_search(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor == 'postgresql':
+        statements = POSTGRES_TRGM_REVERSE
+    elif connection.vendor == 'sqlite':
+        statements = SQLITE_FTS_REVERSE
+    else:
+        return
+    for statement in statements:
+        schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('doctor', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='doctor',
+            name='fee',
+            field=models.PositiveIntegerField(blank=True, db_index=True, null=True),
+        ),
+        migrations.RunPython(create_name_search, drop_name_search),
+    ]
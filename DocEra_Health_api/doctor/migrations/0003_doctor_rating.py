@@ -0,0 +1,67 @@
+# Generated by Django 5.2.1 on 2026-10-18 13:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import Length
+
+
+def backfill_ratings(apps, schema_editor):
+    Doctor = apps.get_model('doctor', 'Doctor')
+    DoctorRating = apps.get_model('doctor', 'DoctorRating')
+    Review = apps.get_model('doctor', 'Review')
+
+    Review.objects.update(stars=Length('rating'))
+
+    histograms = {
+        f'star_{stars}': Count('id', filter=Q(stars=stars)) for stars in range(1, 6)
+    }
+    aggregates = {
+        row['doctor']: row
+        for row in Review.objects.values('doctor').annotate(count=Count('id'), total=Sum('stars'), **histograms)
+    }
+
+    ratings = []
+    for doctor_id in Doctor.objects.values_list('id', flat=True).iterator():
+        row = aggregates.get(doctor_id)
+        if row is None:
+            ratings.append(DoctorRating(doctor_id=doctor_id))
+            continue
+        ratings.append(DoctorRating(
+            doctor_id=doctor_id,
+            count=row['count'],
+            total=row['total'],
+            average=row['total'] / row['count'],
+            **{name: row[name] for name in histograms},
+        ))
+    DoctorRating.objects.bulk_create(ratings, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('doctor', '0002_doctor_search'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DoctorRating',
+            fields=[
+                ('doctor', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='rating', serialize=False, to='doctor.doctor')),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('total', models.PositiveIntegerField(default=0)),
+                ('average', models.FloatField(db_index=True, default=0)),
+                ('star_1', models.PositiveIntegerField(default=0)),
+                ('star_2', models.PositiveIntegerField(default=0)),
+                ('star_3', models.PositiveIntegerField(default=0)),
+                ('star_4', models.PositiveIntegerField(default=0)),
+                ('star_5', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='review',
+            name='stars',
+            field=models.PositiveSmallIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_ratings, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.1 on 2026-10-18 13:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('doctor', '0003_doctor_rating'),
+        ('patient', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(fields=['-created', '-id'], name='doctor_review_created_idx'),
+        ),
+    ]
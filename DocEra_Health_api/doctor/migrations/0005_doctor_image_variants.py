@@ -0,0 +1,46 @@
+# Generated by Django 5.2.1 on 2026-10-18 13:18
+
+from importlib import import_module
+
+from django.db import migrations, models
+
+search = import_module('doctor.migrations.0002_doctor_search')
+# SQLite adds this column by rebuilding doctor_doctor, which the name-search triggers refer to;
+# they are dropped around the rebuild and created again (the FTS table itself is untouched)
+TRIGGERS = search.SQLITE_FTS[2:]
+DROP_TRIGGERS = search.SQLITE_FTS_REVERSE[:-1]
+
+
+def has_fts_table(connection):
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'doctor_doctor_fts'")
+        return cursor.fetchone() is not None
+
+
+def drop_triggers(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        for statement in DROP_TRIGGERS:
+            schema_editor.execute(statement)
+
+
+def create_triggers(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite' and has_fts_table(schema_editor.connection):
+        for statement in TRIGGERS:
+            schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('doctor', '0004_review_created_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_triggers, create_triggers),
+        migrations.AddField(
+            model_name='doctor',
+            name='image_variants',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+        migrations.RunPython(create_triggers, drop_triggers),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.1 on 2026-10-18 13:38
+
+from django.db import migrations, models
+
+import core.operations
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY on PostgreSQL can't run in a transaction
+    atomic = False
+
+    dependencies = [
+        ('doctor', '0005_doctor_image_variants'),
+        ('patient', '0002_patient_image_variants'),
+    ]
+
+    operations = [
+        core.operations.AddIndexConcurrently(
+            model_name='review',
+            index=models.Index(fields=['doctor', '-created', '-id'], name='doctor_review_doctor_idx'),
+        ),
+    ]
@@ -0,0 +1,62 @@
+# Generated by Django 5.2.1 on 2026-10-18 15:10
+
+from django.db import migrations
+
+# the name lives on auth_user, which a generated column can't reference: the stored tsvector is
+# kept in step by triggers instead, like the SQLite FTS5 table of 0002_doctor_search
+POSTGRES_NAME_SEARCH = [
+    "ALTER TABLE doctor_doctor ADD COLUMN IF NOT EXISTS name_search tsvector",
+    """UPDATE doctor_doctor d SET name_search = to_tsvector('simple', u.first_name || ' ' || u.last_name)
+       FROM auth_user u WHERE u.id = d.user_id""",
+    "CREATE INDEX IF NOT EXISTS doctor_doctor_name_search ON doctor_doctor USING gin (name_search)",
+    """CREATE OR REPLACE FUNCTION doctor_doctor_name_search_refresh() RETURNS trigger AS $$
+       BEGIN
+         SELECT to_tsvector('simple', u.first_name || ' ' || u.last_name) INTO NEW.name_search
+         FROM auth_user u WHERE u.id = NEW.user_id;
+         RETURN NEW;
+       END $$ LANGUAGE plpgsql""",
+    """CREATE TRIGGER doctor_doctor_name_search_biu BEFORE INSERT OR UPDATE OF user_id ON doctor_doctor
+       FOR EACH ROW EXECUTE FUNCTION doctor_doctor_name_search_refresh()""",
+    """CREATE OR REPLACE FUNCTION doctor_user_name_search_refresh() RETURNS trigger AS $$
+       BEGIN
+         UPDATE doctor_doctor SET name_search = to_tsvector('simple', NEW.first_name || ' ' || NEW.last_name)
+         WHERE user_id = NEW.id;
+         RETURN NEW;
+       END $$ LANGUAGE plpgsql""",
+    """CREATE TRIGGER doctor_user_name_search_au AFTER UPDATE OF first_name, last_name ON auth_user
+       FOR EACH ROW EXECUTE FUNCTION doctor_user_name_search_refresh()""",
+]
+
+POSTGRES_NAME_SEARCH_REVERSE = [
+    "DROP TRIGGER IF EXISTS doctor_user_name_search_au ON auth_user",
+    "DROP FUNCTION IF EXISTS doctor_user_name_search_refresh()",
+    "DROP TRIGGER IF EXISTS doctor_doctor_name_search_biu ON doctor_doctor",
+    "DROP FUNCTION IF EXISTS doctor_doctor_name_search_refresh()",
+    "DROP INDEX IF EXISTS doctor_doctor_name_search",
+    "ALTER TABLE doctor_doctor DROP COLUMN IF EXISTS name_search",
+]
+
+
+def create_name_search_vector(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for statement in POSTGRES_NAME_SEARCH:
+        schema_editor.execute(statement)
+
+
+def drop_name_search_vector(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for statement in POSTGRES_NAME_SEARCH_REVERSE:
+        schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('doctor', '0006_review_doctor_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_name_search_vector, drop_name_search_vector),
+    ]
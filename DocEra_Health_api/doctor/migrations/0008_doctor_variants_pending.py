@@ -0,0 +1,42 @@
+# Generated by Django 5.2.1 on 2026-10-18 14:22
+
+from importlib import import_module
+
+from django.db import migrations, models
+
+# SQLite rebuilds doctor_doctor to add the column; the name-search triggers are dropped around it
+# as in 0005_doctor_image_variants
+image_variants = import_module('doctor.migrations.0005_doctor_image_variants')
+
+
+def queue_unprocessed_images(apps, schema_editor):
+    # rows whose variants were never generated, as the old image_variants={} check found them
+    Doctor = apps.get_model('doctor', 'Doctor')
+    pending = [
+        pk for pk, image, variants in Doctor.objects.values_list('pk', 'image', 'image_variants').iterator()
+        if image and not variants
+    ]
+    for start in range(0, len(pending), 1000):
+        Doctor.objects.filter(pk__in=pending[start:start + 1000]).update(variants_pending=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('doctor', '0007_doctor_name_search_vector'),
+    ]
+
+    operations = [
+        migrations.RunPython(image_variants.drop_triggers, image_variants.create_triggers),
+        migrations.AddField(
+            model_name='doctor',
+            name='variants_pending',
+            field=models.BooleanField(default=False, editable=False),
+        ),
+        migrations.RunPython(image_variants.create_triggers, image_variants.drop_triggers),
+        migrations.RunPython(queue_unprocessed_images, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='doctor',
+            index=models.Index(condition=models.Q(('variants_pending', True)), fields=['id'], name='doctor_doctor_pending'),
+        ),
+    ]
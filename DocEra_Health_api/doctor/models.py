@@ -1,7 +1,9 @@
-from django.db import models
+from django.db import IntegrityError, models, transaction
+from django.db.models import Count, Q, Sum
 from django.contrib.auth.models import User
 from patient.models import Patient
 from django.core.validators import URLValidator
+from core.images import ImageVariantsModel
 
 # Create your models here.
 STAR_CHOICES = [
@@ -33,13 +35,13 @@ class AvailableTime(models.Model):
     def __str__(self):
         return self.time
     
-class Doctor(models.Model):
+class Doctor(ImageVariantsModel):
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='doctor')
     image = models.ImageField(upload_to= "doctors/images/", null=True, blank=True)
     designation = models.ManyToManyField(Designation)
     specialization = models.ManyToManyField(Specialization)
     available_time = models.ManyToManyField(AvailableTime)
-    fee = models.PositiveIntegerField(null=True, blank=True)
+    fee = models.PositiveIntegerField(null=True, blank=True, db_index=True)
     meet_link = models.URLField(max_length= 300, validators=[URLValidator()], null=True, blank=True)
 
     def __str__(self):
@@ -52,7 +54,106 @@ class Review(models.Model):
     body = models.TextField()
     created = models.DateTimeField(auto_now_add=True)
     rating = models.CharField(choices= STAR_CHOICES, max_length=5)
+    # numeric form of rating (1-5), derived on save
+    stars = models.PositiveSmallIntegerField(default=0, editable=False)
+
+    class Meta:
+        indexes = [
+            # key of the review listing's cursor pagination
+            models.Index(fields=['-created', '-id'], name='doctor_review_created_idx'),
+            # one doctor's reviews in the same order (?doctor_id=)
+            models.Index(fields=['doctor', '-created', '-id'], name='doctor_review_doctor_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        self.stars = len(self.rating)
+        return super().save(*args, **kwargs)
 
     def __str__(self):
         return f"Patient: {self.reviewer.user.first_name} ; Doctor: {self.doctor.user.first_name}"
 
+
+class DoctorRating(models.Model):
+    """
+    Running review aggregate for a doctor, updated on every Review create/update/delete
+    (see core.signals) so reading or sorting by rating never touches the reviews table.
+    """
+    doctor = models.OneToOneField(Doctor, on_delete= models.CASCADE, related_name= 'rating', primary_key=True)
+    count = models.PositiveIntegerField(default=0)
+    total = models.PositiveIntegerField(default=0)
+    average = models.FloatField(default=0, db_index=True)
+    star_1 = models.PositiveIntegerField(default=0)
+    star_2 = models.PositiveIntegerField(default=0)
+    star_3 = models.PositiveIntegerField(default=0)
+    star_4 = models.PositiveIntegerField(default=0)
+    star_5 = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.doctor_id}: {self.average:.2f} ({self.count})"
+
+    @property
+    def histogram(self):
+        return {str(stars): getattr(self, f"star_{stars}") for stars in range(1, 6)}
+
+    @classmethod
+    def record(cls, doctor_id, added=None, removed=None):
+        """Apply one review's stars being added and/or removed to the doctor's aggregate."""
+        with transaction.atomic():
+            aggregate = cls.objects.select_for_update().filter(doctor_id=doctor_id).first()
+            if aggregate is None:
+                if not added:
+                    # the doctor (and its aggregate) is being deleted along with its reviews
+                    return
+                # a missing row can't be locked: create it, or lose the race to a concurrent first review
+                try:
+                    with transaction.atomic():
+                        cls.objects.create(doctor_id=doctor_id)
+                except IntegrityError:
+                    pass
+                aggregate = cls.objects.select_for_update().get(doctor_id=doctor_id)
+            if removed:
+                aggregate.count -= 1
+                aggregate.total -= removed
+                setattr(aggregate, f"star_{removed}", getattr(aggregate, f"star_{removed}") - 1)
+            if added:
+                aggregate.count += 1
+                aggregate.total += added
+                setattr(aggregate, f"star_{added}", getattr(aggregate, f"star_{added}") + 1)
+            aggregate.average = aggregate.total / aggregate.count if aggregate.count else 0
+            aggregate.save()
+
+    @classmethod
+    def rebuild(cls, doctor_ids=None, batch_size=1000):
+        """
+        Recompute the aggregates from the reviews table, for reviews written without the
+        signals (bulk_create). All doctors when `doctor_ids` is None.
+        """
+        histograms = {f"star_{stars}": Count('id', filter=Q(stars=stars)) for stars in range(1, 6)}
+        reviews = Review.objects.all()
+        doctors = Doctor.objects.all()
+        if doctor_ids is not None:
+            reviews = reviews.filter(doctor_id__in=doctor_ids)
+            doctors = doctors.filter(id__in=doctor_ids)
+        aggregates = {
+            row['doctor']: row
+            for row in reviews.values('doctor').annotate(count=Count('id'), total=Sum('stars'), **histograms)
+        }
+
+        ratings = []
+        for doctor_id in doctors.values_list('id', flat=True).iterator():
+            row = aggregates.get(doctor_id, {'count': 0, 'total': 0, **dict.fromkeys(histograms, 0)})
+            ratings.append(cls(
+                doctor_id=doctor_id,
+                count=row['count'],
+                total=row['total'],
+                average=row['total'] / row['count'] if row['count'] else 0,
+                **{name: row[name] for name in histograms},
+            ))
+        cls.objects.bulk_create(
+            ratings,
+            batch_size=batch_size,
+            update_conflicts=True,
+            unique_fields=['doctor'],
+            update_fields=['count', 'total', 'average', *histograms],
+        )
+        return len(ratings)
@@ -0,0 +1,117 @@
+from django.db import connection
+from django.db.models import Case, CharField, Count, F, IntegerField, Q, Value, When
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Cast, Floor
+
+# name of the SQLite FTS5 table created by doctor/migrations/0002_doctor_search.py
+FTS_TABLE = 'doctor_doctor_fts'
+# PostgreSQL: doctor ids whose stored name tsvector (GIN, doctor/migrations/0007) matches, plus
+# those whose user's first / last name is trigram-similar (GIN, 0002). Each branch of the UNION
+# is answered from its own index, which an OR across the doctor / user join would not be.
+POSTGRES_NAME_MATCH = """
+    SELECT id FROM doctor_doctor WHERE name_search @@ websearch_to_tsquery('simple', %s)
+    UNION
+    SELECT d.id FROM doctor_doctor d JOIN auth_user u ON u.id = d.user_id
+    WHERE u.first_name %% %s OR u.last_name %% %s
+"""
+
+FEE_BUCKETS = [
+    ('0-499', 0, 500),
+    ('500-999', 500, 1000),
+    ('1000-1999', 1000, 2000),
+    ('2000+', 2000, None),
+]
+
+
+def search_by_name(queryset, term):
+    """
+    Full-text search over the doctor's first/last name, using whatever the database engine offers:
+    Postgres full-text + trigram similarity, SQLite FTS5, or a plain icontains scan as a last resort.
+    The first two read indexes maintained by triggers, never the names of every doctor.
+    """
+    term = term.strip()
+    if not term:
+        return queryset
+
+    if connection.vendor == 'postgresql':
+        return queryset.filter(id__in=RawSQL(POSTGRES_NAME_MATCH, [term, term, term]))
+
+    if connection.vendor == 'sqlite' and has_fts_table():
+        # every token becomes a quoted prefix query: "tas"* "chow"*
+        tokens = [token.replace('"', '') for token in term.split()]
+        match = ' '.join(f'"{token}"*' for token in tokens if token)
+        if not match:
+            return queryset
+        return queryset.filter(
+            id__in=RawSQL(f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s', [match])
+        )
+
+    query = Q()
+    for token in term.split():
+        query &= Q(user__first_name__icontains=token) | Q(user__last_name__icontains=token)
+    return queryset.filter(query)
+
+
+_fts_tables = {}
+
+
+def has_fts_table():
+    # the FTS5 table is only created when the SQLite build ships the extension; look it up once per database
+    name = str(connection.settings_dict['NAME'])
+    if name not in _fts_tables:
+        _fts_tables[name] = FTS_TABLE in connection.introspection.table_names()
+    return _fts_tables[name]
+
+
+def facet_counts(filterset_class, data, queryset, request=None):
+    """
+    Count doctors per value of every filter dimension, in a single UNION ALL query.
+
+    Each dimension is counted with all the *other* filters applied, so the counts tell the
+    client how many results it would get by switching that one filter.
+    """
+    dimensions = {
+        'specialization': (['specialization'], F('specialization__slug'), F('specialization__name')),
+        'designation': (['designation'], F('designation__slug'), F('designation__name')),
+        'available_time': (['available_time'], Cast('available_time__id', CharField()), F('available_time__time')),
+        'fee': (['fee_min', 'fee_max'], fee_bucket(), fee_bucket()),
+        'rating': (['min_rating'], rating_bucket(), rating_bucket()),
+    }
+
+    facet_querysets = []
+    for facet, (params, value, label) in dimensions.items():
+        facet_data = data.copy()
+        for param in params:
+            facet_data.pop(param, None)
+        filtered = filterset_class(data=facet_data, queryset=queryset, request=request).qs
+
+        facet_querysets.append(
+            filtered.order_by()
+            .annotate(facet=Value(facet, output_field=CharField()), value=value, label=label)
+            .filter(value__isnull=False)
+            .values('facet', 'value', 'label')
+            .annotate(count=Count('id'))
+        )
+
+    first, *rest = facet_querysets
+    facets = {facet: [] for facet in dimensions}
+    for row in first.union(*rest, all=True):
+        facets[row['facet']].append({'value': row['value'], 'label': row['label'], 'count': row['count']})
+    return facets
+
+
+def fee_bucket():
+    whens = []
+    for name, low, high in FEE_BUCKETS:
+        condition = Q(fee__gte=low) if high is None else Q(fee__gte=low, fee__lt=high)
+        whens.append(When(condition, then=Value(name)))
+    return Case(*whens, default=None, output_field=CharField())
+
+
+def rating_bucket():
+    # whole-star bucket of the doctor's average; unrated doctors fall outside every bucket
+    return Case(
+        When(rating__count__gt=0, then=Cast(Cast(Floor('rating__average'), IntegerField()), CharField())),
+        default=None,
+        output_field=CharField(),
+    )
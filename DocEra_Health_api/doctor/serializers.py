@@ -1,5 +1,6 @@
 from rest_framework import serializers
 from . import models
+from core.images import ImageVariantsField
 
 
 class DesignationSerializer(serializers.ModelSerializer):
@@ -22,6 +23,14 @@ class AvailableTimeSerializer(serializers.ModelSerializer):
         fields = "__all__"
 
 
+class DoctorRatingSerializer(serializers.ModelSerializer):
+    histogram = serializers.DictField(child=serializers.IntegerField(), read_only=True)
+
+    class Meta:
+        model = models.DoctorRating
+        fields = ('count', 'average', 'histogram')
+
+
 class DoctorSerializer(serializers.ModelSerializer):
     user = serializers.StringRelatedField(many=False)
     designation = serializers.StringRelatedField(many=True)
@@ -29,10 +38,14 @@ class DoctorSerializer(serializers.ModelSerializer):
     # designation = serializers.HyperlinkedRelatedField(many=True, read_only=True, view_name='designation-detail')
     specialization = serializers.StringRelatedField(many=True)
     available_time = serializers.StringRelatedField(many=True)
+    rating = DoctorRatingSerializer(read_only=True)
+    image_variants = ImageVariantsField()
 
     class Meta:
         model = models.Doctor
-        fields = ('id', 'user', 'image', 'designation', 'specialization', 'available_time', 'fee', 'meet_link')
+        fields = ('id', 'user', 'image', 'image_variants', 'designation', 'specialization', 'available_time', 'fee', 'meet_link', 'rating')
+        select_related_fields = ('user', 'rating')
+        prefetch_related_fields = ('designation', 'specialization', 'available_time')
 
     def validate_fee(self, value):
         if value <= 0:
@@ -46,4 +59,6 @@ class ReviewSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = models.Review
-        fields = ('id', 'reviewer', 'doctor', 'body', 'created', 'rating')
+        fields = ('id', 'reviewer', 'doctor', 'body', 'created', 'rating', 'stars')
+        # reviewer and doctor both render through user.first_name / last_name
+        select_related_fields = ('reviewer__user', 'doctor__user')
@@ -1,3 +1,219 @@
-from django.test import TestCase
+import asyncio
+from types import ModuleType
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import include, path, resolve
+from rest_framework.test import APIClient
+
+from core.async_views import AsyncReadRouter
+from core.cache import model_versions
+from core.testing import QueryPlanMixin
+from . import views
+from .models import AvailableTime, Designation, Doctor, DoctorRating, Review, Specialization
+from .search import search_by_name
+
+
+class ReviewIndexTests(QueryPlanMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        # the post_save signal gives every new user a Patient profile
+        patient = User.objects.create(username='patient').patient
+        cls.doctor = Doctor.objects.create(user=User.objects.create(username='doctor'))
+        other = Doctor.objects.create(user=User.objects.create(username='other'))
+        for doctor in (cls.doctor, other):
+            for rating in ('⭐', '⭐⭐⭐⭐'):
+                Review.objects.create(reviewer=patient, doctor=doctor, body='Good', rating=rating)
+
+    def test_reviews_by_doctor_newest_first_use_doctor_index(self):
+        reviews = Review.objects.filter(doctor=self.doctor).order_by('-created', '-id')[:20]
+        plan = self.assertUsesIndex(reviews, 'doctor_review_doctor_idx')
+        self.assertNoSort(plan)
+        self.assertEqual(len(reviews), 2)
+
+
+class EagerLoadingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        patient = User.objects.create(username='patient').patient
+        designation = Designation.objects.create(name='Consultant', slug='consultant')
+        specialization = Specialization.objects.create(name='Cardiology', slug='cardiology')
+        time = AvailableTime.objects.create(time='Monday 9-12')
+        for number in range(4):
+            doctor = Doctor.objects.create(user=User.objects.create(username=f'doctor{number}'), fee=500)
+            doctor.designation.add(designation)
+            doctor.specialization.add(specialization)
+            doctor.available_time.add(time)
+            Review.objects.create(reviewer=patient, doctor=doctor, body='Good', rating='⭐⭐⭐')
+
+    def setUp(self):
+        # the doctor pages are cached; measure the miss
+        cache.clear()
+
+    def test_doctor_page_queries_do_not_grow_with_the_page(self):
+        # count, the page with user and rating joined, one prefetch per many-to-many
+        with self.assertNumQueries(5):
+            response = APIClient().get('/doctor/list/?page=1')
+        self.assertEqual(len(response.json()['results']), 4)
+
+    def test_review_page_is_one_joined_query(self):
+        with self.assertNumQueries(1):
+            response = APIClient().get('/doctor/reviews/?page_size=20')
+        self.assertEqual(len(response.json()['results']), 4)
+
+
+class DoctorSearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cardiology = Specialization.objects.create(name='Cardiology', slug='cardiology')
+        neurology = Specialization.objects.create(name='Neurology', slug='neurology')
+        cls.doctors = {}
+        for username, first_name, last_name, specialization, fee in [
+            ('tasnim', 'Tasnim', 'Chowdhury', cardiology, 400),
+            ('tanvir', 'Tanvir', 'Hossain', cardiology, 1500),
+            ('rafiq', 'Rafiq', 'Chowdhury', neurology, 800),
+        ]:
+            user = User.objects.create(username=username, first_name=first_name, last_name=last_name)
+            doctor = Doctor.objects.create(user=user, fee=fee)
+            doctor.specialization.add(specialization)
+            cls.doctors[username] = doctor
+
+    def setUp(self):
+        cache.clear()
+
+    def names(self, queryset):
+        return sorted(doctor.user.username for doctor in queryset.select_related('user'))
+
+    def test_name_search_matches_tokens_and_prefixes(self):
+        self.assertEqual(self.names(search_by_name(Doctor.objects.all(), 'chowdhury')), ['rafiq', 'tasnim'])
+        self.assertEqual(self.names(search_by_name(Doctor.objects.all(), 'tas chow')), ['tasnim'])
+        self.assertEqual(self.names(search_by_name(Doctor.objects.all(), 'ta')), ['tanvir', 'tasnim'])
+        self.assertEqual(self.names(search_by_name(Doctor.objects.all(), '  ')), ['rafiq', 'tanvir', 'tasnim'])
+
+    def test_name_search_follows_renames(self):
+        user = self.doctors['rafiq'].user
+        user.last_name = 'Ahmed'
+        user.save()
+        self.assertEqual(self.names(search_by_name(Doctor.objects.all(), 'chowdhury')), ['tasnim'])
+        self.assertEqual(self.names(search_by_name(Doctor.objects.all(), 'ahmed')), ['rafiq'])
+
+    def test_facets_count_each_dimension_without_its_own_filter(self):
+        response = APIClient().get('/doctor/search/?q=chowdhury&specialization=cardiology')
+        body = response.json()
+        self.assertEqual([doctor['user'] for doctor in body['results']], ['tasnim'])
+        self.assertEqual(
+            {facet['value']: facet['count'] for facet in body['facets']['specialization']},
+            {'cardiology': 1, 'neurology': 1},
+        )
+        self.assertEqual({facet['value']: facet['count'] for facet in body['facets']['fee']}, {'0-499': 1})
+
+
+class DoctorRatingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.patient = User.objects.create(username='patient').patient
+        cls.doctors = [Doctor.objects.create(user=User.objects.create(username=f'doctor{number}')) for number in range(3)]
+
+    def rating(self, doctor):
+        return DoctorRating.objects.get(doctor=doctor)
+
+    def test_review_writes_keep_the_aggregate_in_step(self):
+        doctor = self.doctors[0]
+        review = Review.objects.create(reviewer=self.patient, doctor=doctor, body='Good', rating='⭐⭐⭐⭐')
+        Review.objects.create(reviewer=self.patient, doctor=doctor, body='Fine', rating='⭐⭐')
+        review.rating = '⭐⭐⭐⭐⭐'
+        review.save()
+        rating = self.rating(doctor)
+        self.assertEqual((rating.count, rating.total, rating.average), (2, 7, 3.5))
+        self.assertEqual(rating.histogram, {'1': 0, '2': 1, '3': 0, '4': 0, '5': 1})
+
+        review.delete()
+        rating = self.rating(doctor)
+        self.assertEqual((rating.count, rating.average, rating.star_5), (1, 2.0, 0))
+
+    def test_first_review_creates_a_missing_aggregate(self):
+        doctor = self.doctors[1]
+        DoctorRating.objects.filter(doctor=doctor).delete()
+        Review.objects.create(reviewer=self.patient, doctor=doctor, body='Good', rating='⭐⭐⭐')
+        self.assertEqual((self.rating(doctor).count, self.rating(doctor).average), (1, 3.0))
+
+    def test_rating_order_breaks_ties_on_id(self):
+        cache.clear()
+        for doctor in self.doctors[:2]:
+            Review.objects.create(reviewer=self.patient, doctor=doctor, body='Good', rating='⭐⭐⭐⭐')
+        response = APIClient().get('/doctor/list/?ordering=-rating__average')
+        first, second, unrated = self.doctors
+        self.assertEqual([doctor['id'] for doctor in response.json()['results']], [second.pk, first.pk, unrated.pk])
+
+
+class CatalogCacheInvalidationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.doctor = Doctor.objects.create(user=User.objects.create(username='doctor'))
+
+    def setUp(self):
+        cache.clear()
+
+    def test_versions_are_bumped_when_the_write_commits(self):
+        before = model_versions([Doctor, User])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.doctor.fee = 500
+            self.doctor.save()
+            self.doctor.user.first_name = 'Ada'
+            self.doctor.user.save()
+            # a read inside the transaction still sees (and caches under) the old versions
+            self.assertEqual(model_versions([Doctor, User]), before)
+        after = model_versions([Doctor, User])
+        self.assertNotEqual(after[0], before[0])
+        self.assertNotEqual(after[1], before[1])
+
+    def test_unrelated_user_saves_skip_the_doctor_lookup(self):
+        before = model_versions([User])
+        with self.captureOnCommitCallbacks(execute=True), self.assertNumQueries(1):
+            self.doctor.user.save(update_fields=['last_login'])
+        self.assertEqual(model_versions([User]), before)
+
+
+def async_read_urls():
+    # the project urls are built at import time; route the doctor viewsets again with the async path on
+    router = AsyncReadRouter()
+    router.register('list', views.DoctorViewset)
+    router.register('reviews', views.ReviewViewset)
+    urls = ModuleType('async_read_urls')
+    urls.urlpatterns = [path('doctor/', include(router.urls))]
+    return urls
+
+
+class AsyncReadPathTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        patient = User.objects.create(username='patient').patient
+        specialization = Specialization.objects.create(name='Cardiology', slug='cardiology')
+        for number in range(3):
+            doctor = Doctor.objects.create(user=User.objects.create(username=f'doctor{number}'), fee=500)
+            doctor.specialization.add(specialization)
+            Review.objects.create(reviewer=patient, doctor=doctor, body='Good', rating='⭐⭐⭐')
+        cls.doctor = doctor
+
+    def setUp(self):
+        cache.clear()
+
+    def sync_payloads(self, urls):
+        client = APIClient()
+        payloads = {url: client.get(url).json() for url in urls}
+        cache.clear()
+        return payloads
+
+    async def test_async_views_serve_the_sync_payloads(self):
+        urls = ['/doctor/list/', '/doctor/list/?page=1', f'/doctor/list/{self.doctor.pk}/', '/doctor/reviews/?page_size=2']
+        expected = await sync_to_async(self.sync_payloads)(urls)
+        with override_settings(ASYNC_READ_PATH=True):
+            with override_settings(ROOT_URLCONF=async_read_urls()):
+                self.assertTrue(asyncio.iscoroutinefunction(resolve('/doctor/list/').func))
+                for url in urls:
+                    response = await self.async_client.get(url)
+                    self.assertEqual(response.status_code, 200, url)
+                    self.assertEqual(response.json(), expected[url], url)
+                self.assertEqual((await self.async_client.get('/doctor/list/0/')).status_code, 404)
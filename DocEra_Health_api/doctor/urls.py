@@ -1,10 +1,11 @@
 from django.urls import path, include
-from rest_framework.routers import DefaultRouter
+from core.async_views import AsyncReadRouter
 from . import views
 
-router = DefaultRouter()
+router = AsyncReadRouter()
 
 router.register('list', views.DoctorViewset)
+router.register('search', views.DoctorSearchViewset, basename='doctor-search')
 router.register('designations', views.DesignationViewset)
 router.register('specializations', views.SpecializationViewset)
 router.register('available-times', views.AvailableTimeViewset)
@@ -1,15 +1,22 @@
 from django.shortcuts import render
-from rest_framework import viewsets, filters
-from rest_framework.pagination import PageNumberPagination
+from rest_framework import viewsets, filters, mixins
+from django_filters.rest_framework import DjangoFilterBackend
 from . import models
 from . import serializers
+from .filters import DoctorSearchFilter, StableOrderingFilter
+from .search import facet_counts
 from rest_framework.permissions import IsAuthenticatedOrReadOnly
 from core.permissions import IsAdminOrReadOnly
+from core.mixins import EagerLoadingMixin, SerializerTimingMixin
+from core.pagination import AsyncPageNumberPagination, KeysetPagination
+from core.async_views import AsyncReadMixin
+from core.cache import CachedResponseMixin
+from django.contrib.auth.models import User
 
 # Create your views here.
 
 
-class DoctorPagination(PageNumberPagination):
+class DoctorPagination(AsyncPageNumberPagination):
     page_size = 10  # items per page
     page_size_query_param = "page_size"
     max_page_size = 50
@@ -25,14 +32,46 @@ class FilterByDoctorId(filters.BaseFilterBackend):
         return queryset
 
 
-class DoctorViewset(viewsets.ModelViewSet):
+# everything the doctor payload is built from; a change to any of them invalidates cached doctor pages
+DOCTOR_CACHE_MODELS = (
+    models.Doctor, models.DoctorRating, models.Designation, models.Specialization, models.AvailableTime, User,
+)
+
+
+class DoctorViewset(CachedResponseMixin, EagerLoadingMixin, AsyncReadMixin, SerializerTimingMixin, viewsets.ModelViewSet):
+    permission_classes = [IsAdminOrReadOnly]
+    queryset = models.Doctor.objects.order_by('id')
+    serializer_class = serializers.DoctorSerializer
+    pagination_class = DoctorPagination
+    # ?ordering=-rating__average sorts on the maintained aggregate, not on the reviews
+    filter_backends = [StableOrderingFilter]
+    ordering_fields = ['rating__average', 'rating__count', 'fee']
+    cache_models = DOCTOR_CACHE_MODELS
+
+
+class DoctorSearchViewset(CachedResponseMixin, EagerLoadingMixin, SerializerTimingMixin, mixins.ListModelMixin, viewsets.GenericViewSet):
+    """
+    Doctor discovery: ?q=<name>&specialization=<slug>&designation=<slug>&available_time=<id>
+    &fee_min=&fee_max=&min_rating=. The page carries a "facets" block with counts for every filter.
+    """
     permission_classes = [IsAdminOrReadOnly]
-    queryset = models.Doctor.objects.all()
+    queryset = models.Doctor.objects.order_by('id')
     serializer_class = serializers.DoctorSerializer
     pagination_class = DoctorPagination
+    filter_backends = [DjangoFilterBackend, StableOrderingFilter]
+    filterset_class = DoctorSearchFilter
+    ordering_fields = ['rating__average', 'rating__count', 'fee']
+    cache_models = DOCTOR_CACHE_MODELS
+
+    def get_paginated_response(self, data):
+        response = super().get_paginated_response(data)
+        response.data['facets'] = facet_counts(
+            self.filterset_class, self.request.query_params, models.Doctor.objects.all(), self.request
+        )
+        return response
 
 
-class DesignationViewset(viewsets.ModelViewSet):
+class DesignationViewset(CachedResponseMixin, AsyncReadMixin, SerializerTimingMixin, viewsets.ModelViewSet):
     permission_classes = [IsAdminOrReadOnly]
     queryset = models.Designation.objects.all()
     serializer_class = serializers.DesignationSerializer
@@ -40,7 +79,7 @@ class DesignationViewset(viewsets.ModelViewSet):
     search_fields = ['name', 'slug']
 
 
-class SpecializationViewset(viewsets.ModelViewSet):
+class SpecializationViewset(CachedResponseMixin, AsyncReadMixin, SerializerTimingMixin, viewsets.ModelViewSet):
     permission_classes = [IsAdminOrReadOnly]
     queryset = models.Specialization.objects.all()
     serializer_class = serializers.SpecializationSerializer
@@ -48,15 +87,17 @@ class SpecializationViewset(viewsets.ModelViewSet):
     search_fields = ['name', 'slug']
 
 
-class AvailableTimeViewset(viewsets.ModelViewSet):
+class AvailableTimeViewset(CachedResponseMixin, AsyncReadMixin, SerializerTimingMixin, viewsets.ModelViewSet):
     permission_classes = [IsAdminOrReadOnly]
     queryset = models.AvailableTime.objects.all()
     serializer_class = serializers.AvailableTimeSerializer
     filter_backends = [FilterByDoctorId]
 
 
-class ReviewViewset(viewsets.ModelViewSet):
+class ReviewViewset(EagerLoadingMixin, AsyncReadMixin, SerializerTimingMixin, viewsets.ModelViewSet):
     permission_classes = [IsAuthenticatedOrReadOnly]
     queryset = models.Review.objects.all()
     serializer_class = serializers.ReviewSerializer
+    pagination_class = KeysetPagination
+    cursor_ordering = ('-created', '-id')
     filter_backends = [FilterByDoctorId]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.1 on 2026-10-18 14:22
+
+from django.db import migrations, models
+
+
+def queue_unprocessed_images(apps, schema_editor):
+    # rows whose variants were never generated, as the old image_variants={} check found them
+    Patient = apps.get_model('patient', 'Patient')
+    pending = [
+        pk for pk, image, variants in Patient.objects.values_list('pk', 'image', 'image_variants').iterator()
+        if image and not variants
+    ]
+    for start in range(0, len(pending), 1000):
+        Patient.objects.filter(pk__in=pending[start:start + 1000]).update(variants_pending=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('patient', '0002_patient_image_variants'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='patient',
+            name='variants_pending',
+            field=models.BooleanField(default=False, editable=False),
+        ),
+        migrations.RunPython(queue_unprocessed_images, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='patient',
+            index=models.Index(condition=models.Q(('variants_pending', True)), fields=['id'], name='patient_patient_pending'),
+        ),
+    ]
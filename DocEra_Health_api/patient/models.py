@@ -1,8 +1,9 @@
 from django.db import models
 from django.contrib.auth.models import User
+from core.images import ImageVariantsModel
 
 # Create your models here.
-class Patient(models.Model):
+class Patient(ImageVariantsModel):
     user = models.OneToOneField(User, on_delete= models.CASCADE, related_name='patient')
     image = models.ImageField(upload_to= 'patients/images/', null=True, blank=True)
     mobile_no = models.CharField(max_length= 14)
@@ -1,17 +1,23 @@
 from rest_framework import serializers
 from . import models
+from core.images import ImageVariantsField
 import re
 
+# international format, e.g. +8801712345678; also checked by the roster importer
+MOBILE_NO_PATTERN = re.compile(r"^\+\d{10,14}$")
+
 
 class PatientSerializer(serializers.ModelSerializer):
     user = serializers.StringRelatedField(many=False)
+    image_variants = ImageVariantsField()
 
     class Meta:
         model = models.Patient
-        fields = ("id", "user", "image", "mobile_no")
+        fields = ("id", "user", "image", "image_variants", "mobile_no")
+        select_related_fields = ("user",)
 
     def validate_mobile_no(self, value):
-        if not re.match(r"^\+\d{10,14}$", value):
+        if not MOBILE_NO_PATTERN.match(value):
             raise serializers.ValidationError("Invalid mobile number format.")
         return value
 
@@ -1,3 +1,14 @@
+from django.contrib.auth.models import User
 from django.test import TestCase
+from rest_framework.test import APIClient
 
-# Create your tests here.
+
+class PatientListTests(TestCase):
+    def test_staff_listing_joins_the_users(self):
+        for number in range(3):
+            User.objects.create(username=f'patient{number}')
+        client = APIClient()
+        client.force_authenticate(User.objects.create(username='admin', is_staff=True))
+        with self.assertNumQueries(1):
+            response = client.get('/patient/list/?page_size=20')
+        self.assertEqual([patient['user'] for patient in response.json()['results']], ['admin', 'patient2', 'patient1', 'patient0'])
@@ -6,6 +6,8 @@ from rest_framework.response import Response
 from . import models
 from . import serializers
 from core.permissions import IsPatientOrAdmin
+from core.mixins import EagerLoadingMixin, SerializerTimingMixin
+from core.pagination import KeysetPagination
 from drf_spectacular.utils import extend_schema
 
 
@@ -14,13 +16,23 @@ from drf_spectacular.utils import extend_schema
     summary="List or manage patient profiles",
     description="Allows authenticated users to view or manage patient profiles. Non-admin users can only access their own profile.",
 )
-class PatientViewset(viewsets.ModelViewSet):
+class PatientViewset(EagerLoadingMixin, SerializerTimingMixin, viewsets.ModelViewSet):
     queryset = models.Patient.objects.all()
     serializer_class = serializers.PatientSerializer
     permission_classes = [IsAuthenticated, IsPatientOrAdmin]
+    pagination_class = KeysetPagination
+    cursor_ordering = '-id'
+
+    # a patient only ever sees their own profile, so only the staff listing is paginated
+    @property
+    def paginator(self):
+        if not self.request.user.is_staff:
+            return None
+        return super().paginator
 
     # only admin users can access all patient objects. others can only access their own object
     def get_queryset(self):
+        queryset = super().get_queryset()
         if self.request.user.is_staff:
-            return models.Patient.objects.all()
-        return models.Patient.objects.filter(user=self.request.user)
+            return queryset
+        return queryset.filter(user=self.request.user)
@@ -0,0 +1,15 @@
+from django.contrib import admin
+from .models import AvailabilityRule, Slot
+
+# Register your models here.
+class AvailabilityRuleAdmin(admin.ModelAdmin):
+    list_display = ['doctor', 'weekday', 'start_time', 'end_time', 'slot_minutes', 'capacity', 'is_active']
+    list_filter = ['weekday', 'is_active']
+
+
+class SlotAdmin(admin.ModelAdmin):
+    list_display = ['doctor', 'date', 'start_time', 'end_time', 'capacity', 'booked']
+    list_filter = ['date']
+
+admin.site.register(AvailabilityRule, AvailabilityRuleAdmin)
+admin.site.register(Slot, SlotAdmin)
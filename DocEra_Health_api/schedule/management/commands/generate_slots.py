@@ -0,0 +1,25 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from schedule.models import AvailabilityRule, expand_rules
+
+
+class Command(BaseCommand):
+    help = "Expand active availability rules into dated slots for the coming days (safe to re-run, e.g. nightly)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=settings.SCHEDULE_HORIZON_DAYS)
+        parser.add_argument("--doctor", type=int, help="Only expand the rules of this doctor id.")
+
+    def handle(self, *args, **options):
+        rules = AvailabilityRule.objects.filter(is_active=True)
+        if options["doctor"]:
+            rules = rules.filter(doctor_id=options["doctor"])
+
+        start = timezone.localdate()
+        end = start + timedelta(days=options["days"])
+        count = expand_rules(start, end, rules)
+        self.stdout.write(self.style.SUCCESS(f"Expanded {rules.count()} rules up to {end}: {count} slots, existing ones kept."))
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.1 on 2026-10-18 14:12
+
+from django.db import migrations, models
+
+
+def fix_zero_length_slots(apps, schema_editor):
+    # rules saved with 0 minutes (never expandable) get the default length before the check applies
+    AvailabilityRule = apps.get_model('schedule', 'AvailabilityRule')
+    AvailabilityRule.objects.filter(slot_minutes=0).update(slot_minutes=30)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('schedule', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(fix_zero_length_slots, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='availabilityrule',
+            constraint=models.CheckConstraint(condition=models.Q(('slot_minutes__gte', 1)), name='schedule_rule_slot_minutes_positive'),
+        ),
+    ]
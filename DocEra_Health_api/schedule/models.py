@@ -0,0 +1,156 @@
+from datetime import datetime, timedelta
+
+from django.db import models
+from django.db.models import F, Max, Q
+from django.db.models.functions import Greatest
+from django.utils import timezone
+from doctor.models import Doctor
+
+# Create your models here.
+WEEKDAYS = [
+    (0, 'Monday'),
+    (1, 'Tuesday'),
+    (2, 'Wednesday'),
+    (3, 'Thursday'),
+    (4, 'Friday'),
+    (5, 'Saturday'),
+    (6, 'Sunday'),
+]
+
+
+class AvailabilityRule(models.Model):
+    """
+    A doctor's recurring weekly availability, e.g. every Monday 09:00-13:00 in 30 minute slots
+    taking 2 patients each. Rules are expanded into dated Slot rows ahead of time.
+    """
+    doctor = models.ForeignKey(Doctor, on_delete= models.CASCADE, related_name= 'availability_rules')
+    weekday = models.PositiveSmallIntegerField(choices= WEEKDAYS)
+    start_time = models.TimeField()
+    end_time = models.TimeField()
+    slot_minutes = models.PositiveSmallIntegerField(default= 30)
+    capacity = models.PositiveSmallIntegerField(default= 1)
+    valid_from = models.DateField(default= timezone.localdate)
+    valid_until = models.DateField(null=True, blank=True)
+    is_active = models.BooleanField(default=True)
+
+    class Meta:
+        constraints = [
+            # a zero-length slot would never advance build_slots
+            models.CheckConstraint(condition=Q(slot_minutes__gte=1), name='schedule_rule_slot_minutes_positive'),
+        ]
+
+    def __str__(self):
+        return f"{self.doctor} - {self.get_weekday_display()} {self.start_time:%H:%M}-{self.end_time:%H:%M}"
+
+    def dates(self, start, end):
+        """Dates in [start, end] on which this rule applies."""
+        start = max(start, self.valid_from)
+        if self.valid_until:
+            end = min(end, self.valid_until)
+        day = start + timedelta(days=(self.weekday - start.weekday()) % 7)
+        while day <= end:
+            yield day
+            day += timedelta(days=7)
+
+    def build_slots(self, start, end):
+        step = timedelta(minutes=self.slot_minutes)
+        slots = []
+        for day in self.dates(start, end):
+            slot_start = datetime.combine(day, self.start_time)
+            day_end = datetime.combine(day, self.end_time)
+            while slot_start + step <= day_end:
+                slots.append(Slot(
+                    doctor_id=self.doctor_id,
+                    rule=self,
+                    date=day,
+                    start_time=slot_start.time(),
+                    end_time=(slot_start + step).time(),
+                    capacity=self.capacity,
+                ))
+                slot_start += step
+        return slots
+
+
+class SlotQuerySet(models.QuerySet):
+    def open(self):
+        return self.filter(booked__lt=F('capacity'))
+
+    def between(self, doctor_id, start, end):
+        """Open slots of one doctor between two dates, served by the (doctor, date, start_time) index."""
+        return self.open().filter(doctor_id=doctor_id, date__range=(start, end)).order_by('date', 'start_time')
+
+    def reserve(self, slot_id):
+        """Take one seat in the slot. Returns False when it is already full; safe under concurrent bookings."""
+        return bool(self.filter(pk=slot_id, booked__lt=F('capacity')).update(booked=F('booked') + 1))
+
+    def release(self, slot_id):
+        return bool(self.filter(pk=slot_id, booked__gt=0).update(booked=F('booked') - 1))
+
+
+class Slot(models.Model):
+    doctor = models.ForeignKey(Doctor, on_delete= models.CASCADE, related_name= 'slots')
+    rule = models.ForeignKey(AvailabilityRule, on_delete= models.SET_NULL, related_name= 'slots', null=True, blank=True)
+    date = models.DateField()
+    start_time = models.TimeField()
+    end_time = models.TimeField()
+    capacity = models.PositiveSmallIntegerField(default= 1)
+    booked = models.PositiveSmallIntegerField(default= 0)
+
+    objects = SlotQuerySet.as_manager()
+
+    class Meta:
+        ordering = ['date', 'start_time']
+        constraints = [
+            models.UniqueConstraint(fields=['doctor', 'date', 'start_time'], name='schedule_slot_unique_start'),
+            models.CheckConstraint(condition=Q(booked__lte=F('capacity')), name='schedule_slot_within_capacity'),
+        ]
+        indexes = [
+            # only slots with a free seat are indexed, so the open-slot lookup never walks full ones
+            models.Index(
+                fields=['doctor', 'date', 'start_time'],
+                condition=Q(booked__lt=F('capacity')),
+                name='schedule_slot_open_idx',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.date} {self.start_time:%H:%M}-{self.end_time:%H:%M}"
+
+    @property
+    def remaining(self):
+        return self.capacity - self.booked
+
+
+def expand_rules(start, end, rules=None):
+    """
+    Materialize slots for every active rule between two dates. Existing slots (and their bookings)
+    are left alone, so the expansion can be re-run at any time.
+    """
+    if rules is None:
+        rules = AvailabilityRule.objects.filter(is_active=True)
+    slots = []
+    for rule in rules:
+        slots.extend(rule.build_slots(start, end))
+    Slot.objects.bulk_create(slots, batch_size=1000, ignore_conflicts=True)
+    return len(slots)
+
+
+def sync_rule(rule, start, end):
+    """
+    Bring the slots a rule has from `start` on in line with it after an edit, a deactivation or
+    (with rule.is_active False) a deletion. Slots the rule no longer produces are deleted when
+    nothing references them, otherwise closed (capacity down to what is booked) so they keep their
+    appointments but take no more; the ones it still produces take its capacity, and missing ones
+    are created up to `end`.
+    """
+    end = max(end, rule.slots.aggregate(last=Max('date'))['last'] or end)
+    wanted = rule.build_slots(start, end) if rule.is_active else []
+    keys = {(slot.date, slot.start_time, slot.end_time) for slot in wanted}
+    current = rule.slots.filter(date__gte=start).values_list('pk', 'date', 'start_time', 'end_time')
+    stale = [pk for pk, *key in current if tuple(key) not in keys]
+
+    Slot.objects.filter(pk__in=stale, booked=0, appointments__isnull=True).delete()
+    Slot.objects.filter(pk__in=stale).update(capacity=F('booked'))
+    rule.slots.filter(date__gte=start).exclude(pk__in=stale).update(capacity=Greatest(rule.capacity, F('booked')))
+    Slot.objects.bulk_create(wanted, batch_size=1000, ignore_conflicts=True)
+    return len(wanted), len(stale)
@@ -0,0 +1,28 @@
+from rest_framework import serializers
+from . import models
+
+
+class AvailabilityRuleSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = models.AvailabilityRule
+        fields = '__all__'
+
+    def validate_slot_minutes(self, value):
+        if value < 1:
+            raise serializers.ValidationError("Slots must be at least one minute long.")
+        return value
+
+    def validate(self, attrs):
+        start_time = attrs.get('start_time', getattr(self.instance, 'start_time', None))
+        end_time = attrs.get('end_time', getattr(self.instance, 'end_time', None))
+        if start_time and end_time and start_time >= end_time:
+            raise serializers.ValidationError("end_time must be after start_time.")
+        return attrs
+
+
+class SlotSerializer(serializers.ModelSerializer):
+    remaining = serializers.IntegerField(read_only=True)
+
+    class Meta:
+        model = models.Slot
+        fields = ('id', 'doctor', 'date', 'start_time', 'end_time', 'capacity', 'booked', 'remaining')
@@ -0,0 +1,119 @@
+import datetime
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from appointment.models import Appointment
+from appointment.serializers import AppointmentSerializer
+from doctor.models import Doctor
+from .models import Slot
+
+
+class SlotBookingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.patient = User.objects.create(username='patient').patient
+        cls.doctor = Doctor.objects.create(user=User.objects.create(username='doctor'))
+        cls.slot = Slot.objects.create(
+            doctor=cls.doctor, date=timezone.localdate(), start_time=datetime.time(9), end_time=datetime.time(9, 30), capacity=2,
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.patient.user)
+
+    def book(self):
+        return self.client.post('/appointment/', {
+            'patient_id': self.patient.pk, 'slot_id': self.slot.pk, 'appointment_type': 'Online', 'symptom': 'Headache',
+        })
+
+    def booked(self):
+        self.slot.refresh_from_db()
+        return self.slot.booked
+
+    def test_bookings_take_seats_until_the_slot_is_full(self):
+        self.assertEqual(self.book().status_code, 201)
+        self.assertEqual(self.book().status_code, 201)
+        response = self.book()
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('slot_id', response.json())
+        # the rejected booking left nothing behind
+        self.assertEqual(Appointment.objects.count(), 2)
+        self.assertEqual(self.booked(), 2)
+        slots = self.client.get(f'/schedule/slots/?doctor_id={self.doctor.pk}').json()
+        self.assertEqual(slots, [])
+
+    def test_cancelling_and_deleting_release_the_seat(self):
+        first, second = self.book().json()['id'], self.book().json()['id']
+        self.assertEqual(self.client.patch(f'/appointment/{first}/', {'cancel': True}).status_code, 200)
+        self.assertEqual(self.booked(), 1)
+        # a cancelled booking no longer holds a seat to give back
+        self.assertEqual(self.client.delete(f'/appointment/{first}/').status_code, 204)
+        self.assertEqual(self.booked(), 1)
+        self.assertEqual(self.client.delete(f'/appointment/{second}/').status_code, 204)
+        self.assertEqual(self.booked(), 0)
+
+    def test_a_stale_copy_does_not_release_the_seat_again(self):
+        appointment_id = self.book().json()['id']
+        stale = Appointment.objects.get(pk=appointment_id)
+        self.book()
+        self.assertEqual(self.client.patch(f'/appointment/{appointment_id}/', {'cancel': True}).status_code, 200)
+        # the held seat is read from the stored row, not from the copy loaded before the cancel
+        serializer = AppointmentSerializer(stale, data={'cancel': True}, partial=True)
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+        self.assertEqual(self.booked(), 1)
+
+    def test_slot_listing_validates_doctor_id(self):
+        self.assertEqual(self.client.get('/schedule/slots/?doctor_id=abc').status_code, 400)
+        slots = self.client.get(f'/schedule/slots/?doctor_id={self.doctor.pk}').json()
+        self.assertEqual([(slot['id'], slot['remaining']) for slot in slots], [(self.slot.pk, 2)])
+
+
+class AvailabilityRuleTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.patient = User.objects.create(username='patient').patient
+        cls.doctor = Doctor.objects.create(user=User.objects.create(username='doctor'))
+        cls.admin = User.objects.create(username='admin', is_staff=True)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+        self.rule = self.client.post('/schedule/rules/', {
+            'doctor': self.doctor.pk, 'weekday': timezone.localdate().weekday(),
+            'start_time': '09:00', 'end_time': '10:00', 'slot_minutes': 30, 'capacity': 1,
+        }, format='json').json()
+
+    def slots(self):
+        return sorted(
+            (slot.start_time.strftime('%H:%M'), slot.capacity, slot.booked)
+            for slot in Slot.objects.filter(doctor=self.doctor, date=timezone.localdate())
+        )
+
+    def test_zero_length_slots_are_rejected(self):
+        response = self.client.patch(f"/schedule/rules/{self.rule['id']}/", {'slot_minutes': 0}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('slot_minutes', response.json())
+
+    def test_editing_a_rule_retires_the_slots_it_no_longer_makes(self):
+        self.assertEqual(self.slots(), [('09:00', 1, 0), ('09:30', 1, 0)])
+        booked = Slot.objects.get(doctor=self.doctor, date=timezone.localdate(), start_time=datetime.time(9, 30))
+        Appointment.objects.create(patient=self.patient, doctor=self.doctor, slot=booked, appointment_type='Online', symptom='Headache')
+        Slot.objects.reserve(booked.pk)
+
+        response = self.client.patch(f"/schedule/rules/{self.rule['id']}/", {'start_time': '10:00', 'end_time': '11:00', 'capacity': 2}, format='json')
+        self.assertEqual(response.status_code, 200)
+        # 09:00 was free and is gone; 09:30 keeps its booking but takes no more
+        self.assertEqual(self.slots(), [('09:30', 1, 1), ('10:00', 2, 0), ('10:30', 2, 0)])
+
+    def test_deactivating_or_deleting_a_rule_closes_its_slots(self):
+        self.client.patch(f"/schedule/rules/{self.rule['id']}/", {'is_active': False}, format='json')
+        self.assertEqual(self.slots(), [])
+
+        self.client.patch(f"/schedule/rules/{self.rule['id']}/", {'is_active': True}, format='json')
+        self.assertEqual(len(self.slots()), 2)
+        self.assertEqual(self.client.delete(f"/schedule/rules/{self.rule['id']}/").status_code, 204)
+        self.assertFalse(Slot.objects.open().filter(doctor=self.doctor).exists())
@@ -0,0 +1,77 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.shortcuts import render
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from rest_framework import viewsets
+from rest_framework.exceptions import ValidationError
+from . import models
+from . import serializers
+from core.mixins import SerializerTimingMixin
+from core.permissions import IsAdminOrReadOnly
+from doctor.views import FilterByDoctorId
+
+# Create your views here.
+class AvailabilityRuleViewset(SerializerTimingMixin, viewsets.ModelViewSet):
+    permission_classes = [IsAdminOrReadOnly]
+    queryset = models.AvailabilityRule.objects.all()
+    serializer_class = serializers.AvailabilityRuleSerializer
+    filter_backends = [FilterByDoctorId]
+
+    def perform_create(self, serializer):
+        with transaction.atomic():
+            self.expand(serializer.save())
+
+    def perform_update(self, serializer):
+        with transaction.atomic():
+            self.expand(serializer.save())
+
+    def perform_destroy(self, instance):
+        # the slots would outlive the rule, still open for booking
+        with transaction.atomic():
+            instance.is_active = False
+            self.expand(instance)
+            instance.delete()
+
+    def expand(self, rule):
+        today = timezone.localdate()
+        models.sync_rule(rule, today, today + timedelta(days=settings.SCHEDULE_HORIZON_DAYS))
+
+
+class SlotViewset(SerializerTimingMixin, viewsets.ReadOnlyModelViewSet):
+    """
+    Open slots: ?doctor_id=<id>&start=YYYY-MM-DD&end=YYYY-MM-DD (defaults to the scheduling horizon).
+    """
+    queryset = models.Slot.objects.all()
+    serializer_class = serializers.SlotSerializer
+
+    def get_queryset(self):
+        if self.action != 'list':
+            return super().get_queryset()
+
+        doctor_id = self.request.query_params.get('doctor_id')
+        if not doctor_id:
+            raise ValidationError({'doctor_id': 'This query parameter is required.'})
+        try:
+            doctor_id = int(doctor_id)
+        except ValueError:
+            raise ValidationError({'doctor_id': 'Expected an integer.'})
+
+        today = timezone.localdate()
+        start = self.parse_date_param('start') or today
+        end = self.parse_date_param('end') or today + timedelta(days=settings.SCHEDULE_HORIZON_DAYS)
+        return models.Slot.objects.between(doctor_id, start, end)
+
+    def parse_date_param(self, name):
+        value = self.request.query_params.get(name)
+        if not value:
+            return None
+        try:
+            parsed = parse_date(value)
+        except ValueError:
+            parsed = None
+        if parsed is None:
+            raise ValidationError({name: 'Expected a date in YYYY-MM-DD format.'})
+        return parsed
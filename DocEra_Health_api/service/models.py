@@ -1,7 +1,8 @@
 from django.db import models
+from core.images import ImageVariantsModel
 
 # Create your models here.
-class Service(models.Model):
+class Service(ImageVariantsModel):
     name = models.CharField(max_length= 20)
     description = models.TextField()
     image = models.ImageField(upload_to= "service/images/")
\ No newline at end of file
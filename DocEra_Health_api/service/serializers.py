@@ -1,7 +1,11 @@
 from rest_framework import serializers
 from . import models 
+from core.images import ImageVariantsField
 
 class ServiceSerializer(serializers.ModelSerializer):
+    image_variants = ImageVariantsField()
+
     class Meta:
         model = models.Service
-        fields = '__all__'
\ No newline at end of file
+        # variants_pending is the process_images queue flag, not part of the API
+        exclude = ('variants_pending',)
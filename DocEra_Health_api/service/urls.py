@@ -1,9 +1,9 @@
 from django.urls import path, include
-from rest_framework.routers import DefaultRouter
+from core.async_views import AsyncReadRouter
 from . import views
 
 
-router = DefaultRouter()
+router = AsyncReadRouter()
 
 router.register('', views.ServiceViewset)
 
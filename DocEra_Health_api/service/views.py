@@ -2,8 +2,14 @@ from django.shortcuts import render
 from rest_framework import viewsets
 from . import models
 from . import serializers
+from core.mixins import SerializerTimingMixin
+from core.pagination import KeysetPagination
+from core.cache import CachedResponseMixin
+from core.async_views import AsyncReadMixin
 
 # Create your views here.
-class ServiceViewset(viewsets.ModelViewSet):
+class ServiceViewset(CachedResponseMixin, AsyncReadMixin, SerializerTimingMixin, viewsets.ModelViewSet):
     queryset = models.Service.objects.all()
-    serializer_class = serializers.ServiceSerializer
\ No newline at end of file
+    serializer_class = serializers.ServiceSerializer
+    pagination_class = KeysetPagination
+    cursor_ordering = 'id'
\ No newline at end of file